@@ -0,0 +1,24 @@
+from django.contrib import admin
+
+from .models import Job, OutboxMessage
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Очередь фоновых задач: что ждёт, что упало и почему"""
+
+    list_display = ('pk', 'task', 'status', 'attempts', 'run_at', 'created')
+    list_filter = ('status', 'task')
+    search_fields = ('task', 'last_error')
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    """Исходящие письма, которые ещё не отправлены"""
+
+    list_display = (
+        'pk', 'subject', 'recipients', 'status', 'attempts', 'created',
+    )
+    list_filter = ('status',)
+    search_fields = ('subject', 'recipients', 'last_error')
+    exclude = ('content',)
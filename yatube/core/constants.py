@@ -0,0 +1,29 @@
+# Метка последней синхронизации реплики в кэше
+REPLICA_SYNCED_KEY = 'core:replica_synced:{}'
+# Отставшую больше чем на столько секунд реплику не используем
+REPLICA_MAX_LAG = 60
+# Реплики БД: после записи клиент читает только с реплик, синхронизированных
+# позже записи. Дольше REPLICA_MAX_LAG кука не нужна: любая свежая реплика
+# к этому времени запись уже содержит
+REPLICA_PIN_COOKIE = 'read_primary'
+REPLICA_PIN_SECONDS = REPLICA_MAX_LAG
+# С реплик читают только эти приложения, кроме форм правки
+REPLICA_NAMESPACES = ('posts', 'about')
+PRIMARY_VIEWS = ('posts:post_create', 'posts:post_edit')
+# Очередь фоновых задач (core.jobs): попытки и паузы между ними в секундах
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_DELAY = 10
+JOB_RETRY_MAX_DELAY = 60 * 60
+# Задачу упавшего воркера подхватит другой через столько секунд
+JOB_LEASE = 60 * 5
+JOB_BATCH_SIZE = 10
+JOB_POLL_INTERVAL = 1
+# Исходящая почта (core.outbox): писем за пачку, попытки отправки,
+# аренда пачки отправителем в секундах
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_LEASE = 60 * 5
+OUTBOX_POLL_INTERVAL = 1
+# Кэширование медиа в браузере: файлы по хэшу содержимого не меняются
+MEDIA_MAX_AGE = 60 * 60 * 24
+MEDIA_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
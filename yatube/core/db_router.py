@@ -0,0 +1,90 @@
+"""Маршрутизация запросов к БД между основной базой и репликами.
+
+Реплики перечислены в settings.DATABASE_REPLICAS. Какую базу читать,
+решает ReplicaMiddleware в начале запроса и кладёт выбор в contextvar;
+запись всегда идёт в основную базу. Реплика считается свежей, пока
+её метка синхронизации в кэше моложе REPLICA_MAX_LAG - метку ставит
+команда sync_replicas или внешний мониторинг репликации через
+mark_replica_synced(). Клиенту, который недавно писал, подходят только
+реплики, синхронизированные после его записи.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+from .constants import REPLICA_MAX_LAG, REPLICA_SYNCED_KEY
+
+_read_alias = ContextVar('read_alias', default=None)
+_wrote = ContextVar('wrote', default=False)
+
+
+def mark_replica_synced(alias, synced_at=None):
+    """Отмечает, что реплика догнала основную базу"""
+    cache.set(
+        REPLICA_SYNCED_KEY.format(alias),
+        synced_at or timezone.now(),
+        None,
+    )
+
+
+def fresh_replicas(since=None):
+    """Реплики, отставание которых не больше REPLICA_MAX_LAG.
+
+    С since - только синхронизированные не раньше этого момента.
+    """
+    aliases = list(settings.DATABASE_REPLICAS)
+    if not aliases:
+        return []
+    keys = {REPLICA_SYNCED_KEY.format(alias): alias for alias in aliases}
+    now = timezone.now()
+    return [
+        keys[key]
+        for key, synced_at in cache.get_many(keys).items()
+        if (now - synced_at).total_seconds() <= REPLICA_MAX_LAG
+        and (since is None or synced_at >= since)
+    ]
+
+
+def choose_replica(since=None):
+    replicas = fresh_replicas(since)
+    return random.choice(replicas) if replicas else None
+
+
+@contextmanager
+def read_from(alias):
+    """Направляет чтения внутри блока в базу alias, None - в основную"""
+    alias_token = _read_alias.set(alias)
+    wrote_token = _wrote.set(False)
+    try:
+        yield
+    finally:
+        _read_alias.reset(alias_token)
+        _wrote.reset(wrote_token)
+
+
+def wrote_to_primary():
+    """Была ли запись в основную базу внутри текущего read_from()"""
+    return _wrote.get()
+
+
+class ReplicaRouter:
+    """Чтения - с выбранной реплики, запись и миграции - в основную базу"""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # На всех базах одни и те же данные
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
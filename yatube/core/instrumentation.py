@@ -0,0 +1,147 @@
+"""Метрики запроса: SQL, шаблоны, кэш и миниатюры.
+
+ServerTimingMiddleware включает сбор для выбранной доли запросов и
+кладёт метрики в contextvar. Пока сбор не включён, обёртки ниже
+обходятся одним ContextVar.get(), поэтому их можно держать в
+продакшене. Время шаблонов включает запросы, выполненные при рендере.
+"""
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as django_backend
+
+_metrics = ContextVar('request_metrics', default=None)
+_MISSING = object()
+
+
+class RequestMetrics:
+    """Счётчики одного запроса, время в секундах"""
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.thumbnail_time = 0.0
+
+    def server_timing(self, total):
+        """Значение заголовка Server-Timing"""
+        return ', '.join((
+            f'db;dur={self.sql_time * 1000:.1f};'
+            f'desc="{self.sql_count} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'cache;desc="{self.cache_hits} hits, '
+            f'{self.cache_misses} misses"',
+            f'thumb;dur={self.thumbnail_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ))
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+def _time_query(metrics, execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.sql_count += 1
+        metrics.sql_time += time.perf_counter() - started
+
+
+@contextmanager
+def collect():
+    """Собирает метрики всего, что выполняется внутри блока"""
+    metrics = RequestMetrics()
+    token = _metrics.set(metrics)
+    try:
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(
+                    partial(_time_query, metrics),
+                ))
+            yield metrics
+    finally:
+        _metrics.reset(token)
+
+
+@contextmanager
+def timed(attr):
+    """Добавляет время выполнения блока к метрике attr, если идёт сбор"""
+    metrics = _metrics.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        setattr(metrics, attr, getattr(metrics, attr) + elapsed)
+
+
+def record_cache(hits, misses):
+    metrics = _metrics.get()
+    if metrics is not None:
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+
+
+def _counted_get(get):
+    def wrapper(self, key, default=None, version=None):
+        value = get(self, key, _MISSING, version)
+        record_cache(value is not _MISSING, value is _MISSING)
+        return default if value is _MISSING else value
+
+    return wrapper
+
+
+def _counted_get_many(get_many):
+    def wrapper(self, keys, version=None):
+        keys = list(keys)
+        # Базовый get_many зовёт get() по ключу - не считаем их дважды
+        token = _metrics.set(None)
+        try:
+            values = get_many(self, keys, version)
+        finally:
+            _metrics.reset(token)
+        record_cache(len(values), len(keys) - len(values))
+        return values
+
+    return wrapper
+
+
+def install_cache_metrics():
+    """Считает попадания и промахи во всех настроенных кэшах"""
+    for backend in {type(caches[alias]) for alias in settings.CACHES}:
+        if getattr(backend, '_counts_metrics', False):
+            continue
+        backend.get = _counted_get(backend.get)
+        backend.get_many = _counted_get_many(backend.get_many)
+        backend._counts_metrics = True
+
+
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        with timed('template_time'):
+            return super().render(context, request)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Шаблонизатор Django, замеряющий время рендера страницы"""
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
@@ -0,0 +1,179 @@
+"""Очередь фоновых задач в БД.
+
+enqueue() пишет задачу в таблицу в той же транзакции, что и изменения,
+которые её породили: задача видна воркерам только после коммита и не
+теряется при откате. Воркеры (manage.py run_workers) забирают задачи
+атомарным UPDATE, выполняют и удаляют; упавшие повторяются с
+экспоненциальной паузой, после JOB_MAX_ATTEMPTS попыток остаются в
+таблице со статусом failed. Задачи должны быть идемпотентными:
+задача упавшего воркера после JOB_LEASE выполнится ещё раз, если
+попытки не кончились, иначе тоже станет failed.
+
+С JOBS_EAGER = True задачи выполняются сразу при постановке - для
+разработки без воркеров.
+"""
+import json
+import logging
+import random
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .constants import (JOB_BATCH_SIZE, JOB_LEASE, JOB_MAX_ATTEMPTS,
+                        JOB_POLL_INTERVAL, JOB_RETRY_DELAY,
+                        JOB_RETRY_MAX_DELAY)
+from .models import Job
+
+logger = logging.getLogger(__name__)
+_tasks = {}
+
+
+def task(name):
+    """Декоратор: регистрирует функцию как фоновую задачу name"""
+
+    def register(func):
+        _tasks[name] = func
+        return func
+
+    return register
+
+
+def enqueue(name, *args, key=None, delay=0, max_attempts=JOB_MAX_ATTEMPTS,
+            **kwargs):
+    """Ставит задачу в очередь, аргументы должны сериализоваться в JSON.
+
+    Если задача с тем же key ещё ждёт в очереди, новая не ставится.
+    """
+    if name not in _tasks:
+        raise LookupError(f'Неизвестная задача: {name}')
+    if settings.JOBS_EAGER:
+        _tasks[name](*args, **kwargs)
+        return None
+
+    try:
+        with transaction.atomic():
+            return Job.objects.create(
+                task=name,
+                payload=json.dumps({'args': args, 'kwargs': kwargs}),
+                key=key,
+                max_attempts=max_attempts,
+                run_at=timezone.now() + timedelta(seconds=delay),
+            )
+    except IntegrityError:
+        if key is None:
+            raise
+        return Job.objects.filter(key=key).first()
+
+
+def _available(now):
+    # Задачи в очереди и задачи с истёкшей арендой: их воркер упал
+    return Q(status=Job.QUEUED, run_at__lte=now) | Q(
+        status=Job.RUNNING,
+        locked_until__lt=now,
+        attempts__lt=F('max_attempts'),
+    )
+
+
+def _fail_abandoned(now):
+    """Задачи, на которых воркер падал во всех попытках, - в failed.
+
+    Иначе задача, роняющая сам воркер, забиралась бы бесконечно.
+    """
+    failed = Job.objects.filter(
+        status=Job.RUNNING,
+        locked_until__lt=now,
+        attempts__gte=F('max_attempts'),
+    ).update(
+        status=Job.FAILED,
+        locked_until=None,
+        last_error='Воркер не завершил задачу ни в одной попытке',
+    )
+    if failed:
+        logger.error('Брошенных воркерами задач: %s', failed)
+
+
+def claim(batch_size=JOB_BATCH_SIZE):
+    """Забирает до batch_size задач, которых не взял другой воркер"""
+    now = timezone.now()
+    _fail_abandoned(now)
+    candidates = list(
+        Job.objects.filter(_available(now)).order_by('run_at').values_list(
+            'pk', flat=True,
+        )[:batch_size]
+    )
+    claimed = [
+        pk for pk in candidates
+        # Ключ освобождаем: правка после старта задачи поставит новую
+        if Job.objects.filter(_available(now), pk=pk).update(
+            status=Job.RUNNING,
+            key=None,
+            attempts=F('attempts') + 1,
+            locked_until=now + timedelta(seconds=JOB_LEASE),
+        )
+    ]
+    return list(Job.objects.filter(pk__in=claimed).order_by('run_at'))
+
+
+def retry_delay(attempts):
+    """Пауза перед следующей попыткой: экспонента с разбросом"""
+    delay = min(JOB_RETRY_DELAY * 2 ** (attempts - 1), JOB_RETRY_MAX_DELAY)
+    return delay * random.uniform(1, 1.5)
+
+
+def run_job(job):
+    """Выполняет задачу, возвращает True при успехе"""
+    try:
+        func = _tasks.get(job.task)
+        if func is None:
+            raise LookupError(f'Неизвестная задача: {job.task}')
+        data = json.loads(job.payload)
+        with transaction.atomic():
+            func(*data['args'], **data['kwargs'])
+            Job.objects.filter(pk=job.pk).delete()
+    except Exception:
+        error = traceback.format_exc()
+        queued = Job.objects.filter(pk=job.pk)
+        if job.attempts >= job.max_attempts:
+            logger.error('Задача %s не выполнена:\n%s', job, error)
+            queued.update(
+                status=Job.FAILED,
+                locked_until=None,
+                last_error=error,
+            )
+        else:
+            logger.warning('Задача %s упала, повторим:\n%s', job, error)
+            queued.update(
+                status=Job.QUEUED,
+                locked_until=None,
+                last_error=error,
+                run_at=timezone.now() + timedelta(
+                    seconds=retry_delay(job.attempts),
+                ),
+            )
+        return False
+
+    return True
+
+
+def work(once=False, batch_size=JOB_BATCH_SIZE,
+         poll_interval=JOB_POLL_INTERVAL, should_stop=lambda: False):
+    """Цикл воркера, возвращает число выполненных задач.
+
+    С once=True завершается, когда готовых к запуску задач не осталось.
+    """
+    done = 0
+    while not should_stop():
+        jobs = claim(batch_size)
+        for job in jobs:
+            done += run_job(job)
+        if not jobs:
+            if once:
+                break
+            time.sleep(poll_interval)
+
+    return done
@@ -0,0 +1,102 @@
+import multiprocessing
+import signal
+import time
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.constants import JOB_BATCH_SIZE, JOB_POLL_INTERVAL
+from core.jobs import work
+
+# Как часто родитель проверяет, живы ли воркеры
+SUPERVISE_INTERVAL = 1
+
+
+def worker_main(stop, batch_size, poll_interval):
+    """Точка входа процесса-воркера"""
+    # При запуске через spawn Django в новом процессе ещё не настроен
+    django.setup()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        work(
+            batch_size=batch_size,
+            poll_interval=poll_interval,
+            should_stop=stop.is_set,
+        )
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает процессы-воркеры очереди фоновых задач. Воркер, '
+        'завершившийся с ошибкой, перезапускается. SIGINT или SIGTERM '
+        'дают воркерам доделать текущие задачи'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=2,
+            help='Сколько процессов-воркеров запустить',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи в этом процессе и выйти',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=JOB_BATCH_SIZE,
+            help='Сколько задач воркер забирает за раз',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=JOB_POLL_INTERVAL,
+            help='Пауза в секундах, когда очередь пуста',
+        )
+
+    def handle(self, *args, **options):
+        if options['once']:
+            done = work(once=True, batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Выполнено задач: {done}'))
+            return
+
+        stop = multiprocessing.Event()
+        # Обработчик только ставит флаг: вызов stop.set() в нём мог бы
+        # повиснуть на замке события
+        stopping = []
+        signal.signal(signal.SIGTERM, lambda *args: stopping.append(True))
+        # Соединения с БД в дочерние процессы не наследуем
+        connections.close_all()
+        worker_args = (stop, options['batch_size'], options['poll_interval'])
+        workers = [
+            self.start(worker_args) for _ in range(options['processes'])
+        ]
+        self.stdout.write(f'Запущено воркеров: {len(workers)}')
+        try:
+            while not stopping:
+                time.sleep(SUPERVISE_INTERVAL)
+                for number, worker in enumerate(workers):
+                    if not stopping and not worker.is_alive():
+                        self.stderr.write(
+                            f'Воркер {worker.pid} завершился с кодом '
+                            f'{worker.exitcode}, перезапускаем'
+                        )
+                        workers[number] = self.start(worker_args)
+        except KeyboardInterrupt:
+            pass
+
+        stop.set()
+        for worker in workers:
+            worker.join()
+        self.stdout.write(self.style.SUCCESS('Воркеры остановлены'))
+
+    def start(self, worker_args):
+        worker = multiprocessing.Process(target=worker_main, args=worker_args)
+        worker.start()
+        return worker
@@ -0,0 +1,51 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from core.constants import OUTBOX_BATCH_SIZE, OUTBOX_POLL_INTERVAL
+from core.outbox import OutboxSender
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет письма из очереди исходящей почты пачками через '
+        'EMAIL_OUTBOX_BACKEND. SIGINT или SIGTERM дают доотправить '
+        'текущую пачку'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Отправить готовые письма и выйти',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=OUTBOX_BATCH_SIZE,
+            help='Сколько писем забирать за раз',
+        )
+        parser.add_argument(
+            '--rate',
+            type=float,
+            help='Не больше стольких писем в секунду, 0 - без ограничения',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=OUTBOX_POLL_INTERVAL,
+            help='Пауза в секундах, когда очередь пуста',
+        )
+
+    def handle(self, *args, **options):
+        stopping = []
+        if not options['once']:
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signum, lambda *args: stopping.append(True))
+        sender = OutboxSender(options['batch_size'], options['rate'])
+        sent = sender.run(
+            once=options['once'],
+            poll_interval=options['poll_interval'],
+            should_stop=lambda: bool(stopping),
+        )
+        self.stdout.write(self.style.SUCCESS(f'Отправлено писем: {sent}'))
@@ -0,0 +1,35 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.db_router import mark_replica_synced
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную SQLite-базу в файлы реплик. Заменяет '
+        'репликацию при локальной разработке: запускайте по крону'
+    )
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError('Копирование реплик есть только для SQLite')
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('В settings.DATABASE_REPLICAS нет реплик')
+
+        primary.ensure_connection()
+        for alias in settings.DATABASE_REPLICAS:
+            connections[alias].close()
+            target = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+            try:
+                # backup() копирует согласованный снимок базы
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            mark_replica_synced(alias)
+            self.stdout.write(f'{alias}: скопирована')
+
+        self.stdout.write(self.style.SUCCESS('Реплики синхронизированы'))
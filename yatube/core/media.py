@@ -0,0 +1,141 @@
+"""Раздача загруженных файлов из MEDIA_ROOT.
+
+Если перед Django стоит nginx или Apache (MEDIA_SENDFILE), представление
+только проверяет путь и возвращает X-Accel-Redirect или X-Sendfile:
+файл с диска, в том числе диапазоны Range, отдаёт сам веб-сервер.
+Иначе файл отдаёт FileResponse: WSGI-сервер с wsgi.file_wrapper
+(gunicorn, uWSGI) пересылает целый файл через os.sendfile(), не копируя
+его через Python. Диапазоны Range читаются кусками: не все серверы
+ограничивают sendfile длиной ответа.
+
+ETag строгий: по времени изменения и размеру файла. Имена картинок
+постов содержат хэш содержимого (posts.storage), такие файлы не
+меняются и кэшируются на год с immutable. Ответы об ошибках валидаторов
+и Cache-Control не получают.
+"""
+import mimetypes
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+
+from posts.storage import HASHED_NAME
+
+from .constants import MEDIA_IMMUTABLE_MAX_AGE, MEDIA_MAX_AGE
+
+BYTES_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+
+def file_etag(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def set_validators(response, path, stat):
+    """ETag, Last-Modified и кэширование файла path"""
+    response['ETag'] = file_etag(stat)
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Accept-Ranges'] = 'bytes'
+    if HASHED_NAME.search(path):
+        patch_cache_control(
+            response, public=True, max_age=MEDIA_IMMUTABLE_MAX_AGE,
+            immutable=True,
+        )
+    else:
+        patch_cache_control(response, public=True, max_age=MEDIA_MAX_AGE)
+
+
+def parse_range(request, stat):
+    """Запрошенный диапазон (начало, конец включительно) или None.
+
+    None - отдать файл целиком: Range нет, он не в байтах, диапазонов
+    несколько или If-Range не совпал с файлом.
+    """
+    header = request.META.get('HTTP_RANGE', '')
+    found = BYTES_RANGE.match(header.replace(' ', ''))
+    if not found or not any(found.groups()):
+        return None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range != file_etag(stat) and (
+        parse_http_date_safe(if_range) != int(stat.st_mtime)
+    ):
+        return None
+
+    size = stat.st_size
+    first, last = found.groups()
+    if not first:
+        # bytes=-N: последние N байт
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+class FileRange:
+    """Часть открытого файла: read() не выходит за конец диапазона"""
+
+    def __init__(self, file, start, end):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = end - start + 1
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def offloaded_response(path, fullpath):
+    """Пустой ответ, по которому файл отдаст веб-сервер"""
+    content_type, _ = mimetypes.guess_type(path)
+    response = HttpResponse(
+        content_type=content_type or 'application/octet-stream',
+    )
+    if settings.MEDIA_SENDFILE == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_REDIRECT_PREFIX + quote(path)
+        )
+    else:
+        response['X-Sendfile'] = fullpath
+    return response
+
+
+def file_response(request, path, fullpath, stat):
+    """Файл или его часть по заголовку Range"""
+    try:
+        file_range = parse_range(request, stat)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+
+    content_type, encoding = mimetypes.guess_type(path)
+    file = open(fullpath, 'rb')
+    if file_range is None:
+        response = FileResponse(file)
+        response['Content-Length'] = stat.st_size
+    else:
+        start, end = file_range
+        response = FileResponse(FileRange(file, start, end), status=206)
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = end - start + 1
+    # Сжатые файлы отдаём как есть, без Content-Encoding
+    response['Content-Type'] = (
+        'application/octet-stream' if encoding
+        else content_type or 'application/octet-stream'
+    )
+    return response
@@ -0,0 +1,114 @@
+import logging
+import random
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+
+from .constants import (PRIMARY_VIEWS, REPLICA_NAMESPACES, REPLICA_PIN_COOKIE,
+                        REPLICA_PIN_SECONDS)
+from .db_router import choose_replica, read_from, wrote_to_primary
+from .instrumentation import collect
+
+logger = logging.getLogger(__name__)
+
+
+class ServerTimingMiddleware:
+    """Метрики запроса в заголовке Server-Timing и лог медленных запросов.
+
+    Подробные метрики собираются для доли запросов
+    REQUEST_METRICS_SAMPLE_RATE, общее время - для всех. Заголовок видит
+    только персонал, если не включён REQUEST_METRICS_PUBLIC: метрики
+    раскрывают устройство сайта.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        metrics = None
+        if random.random() < settings.REQUEST_METRICS_SAMPLE_RATE:
+            with collect() as metrics:
+                response = self.get_response(request)
+        else:
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        if metrics is not None and self.can_see_metrics(request):
+            response['Server-Timing'] = metrics.server_timing(total)
+        if total * 1000 >= settings.REQUEST_METRICS_SLOW_MS:
+            match = request.resolver_match
+            logger.warning(
+                'Медленный запрос %s %s (%s): %.0f мс %s',
+                request.method,
+                request.path,
+                match.view_name if match else '-',
+                total * 1000,
+                metrics.as_dict() if metrics else '',
+            )
+
+        return response
+
+    def can_see_metrics(self, request):
+        if settings.REQUEST_METRICS_PUBLIC:
+            return True
+        user = getattr(request, 'user', None)
+        return user is not None and user.is_staff
+
+
+class ReplicaMiddleware:
+    """Отправляет чтения GET-запросов к лентам и страницам на реплики.
+
+    После записи ставит куку с временем записи, и следующие
+    REPLICA_PIN_SECONDS секунд клиент читает только с реплик,
+    синхронизированных позже, или с основной базы - видит свои
+    изменения, даже если реплика ещё не догнала.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        alias = None
+        if self.can_use_replica(request):
+            alias = choose_replica(since=self.last_write(request))
+
+        with read_from(alias):
+            response = self.get_response(request)
+            if wrote_to_primary():
+                response.set_cookie(
+                    REPLICA_PIN_COOKIE,
+                    str(timezone.now().timestamp()),
+                    max_age=REPLICA_PIN_SECONDS,
+                    httponly=True,
+                    samesite='Lax',
+                )
+
+        return response
+
+    def last_write(self, request):
+        """Время последней записи клиента из куки, None - не писал"""
+        value = request.COOKIES.get(REPLICA_PIN_COOKIE)
+        if value is None:
+            return None
+        try:
+            return datetime.fromtimestamp(float(value), timezone.utc)
+        except (ValueError, OverflowError, OSError):
+            # Непонятная кука: считаем, что запись была только что
+            return timezone.now()
+
+    def can_use_replica(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+
+        return (
+            match.namespace in REPLICA_NAMESPACES
+            and match.view_name not in PRIMARY_VIEWS
+        )
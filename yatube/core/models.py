@@ -0,0 +1,106 @@
+from django.db import models
+from django.utils import timezone
+
+from .constants import JOB_MAX_ATTEMPTS
+
+
+class Job(models.Model):
+    """Фоновая задача в очереди core.jobs"""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Не выполнена'),
+    )
+
+    task = models.CharField('Задача', max_length=100)
+    payload = models.TextField('Аргументы в JSON')
+    # Пока задача ждёт в очереди, вторую с тем же ключом не поставить
+    key = models.CharField(
+        'Ключ идемпотентности',
+        max_length=255,
+        unique=True,
+        null=True,
+        blank=True,
+    )
+    status = models.CharField(
+        'Состояние',
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED,
+    )
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveIntegerField(
+        'Попыток не больше',
+        default=JOB_MAX_ATTEMPTS,
+    )
+    run_at = models.DateTimeField('Выполнить не раньше', default=timezone.now)
+    locked_until = models.DateTimeField(
+        'Занята воркером до',
+        null=True,
+        blank=True,
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = (
+            models.Index(fields=('status', 'run_at'), name='job_queue_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.task} #{self.pk}'
+
+
+class OutboxMessage(models.Model):
+    """Письмо, ждущее отправки командой send_outbox"""
+
+    QUEUED = 'queued'
+    SENDING = 'sending'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (SENDING, 'Отправляется'),
+        (FAILED, 'Не отправлено'),
+    )
+
+    subject = models.CharField('Тема', max_length=255, blank=True)
+    recipients = models.TextField('Получатели')
+    # EmailMessage целиком, вместе с HTML-версией и вложениями
+    content = models.BinaryField('Письмо')
+    status = models.CharField(
+        'Состояние',
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED,
+    )
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    send_after = models.DateTimeField(
+        'Отправить не раньше',
+        default=timezone.now,
+    )
+    locked_until = models.DateTimeField(
+        'Занято отправителем до',
+        null=True,
+        blank=True,
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = (
+            models.Index(
+                fields=('status', 'send_after'),
+                name='outbox_queue_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.subject} -> {self.recipients}'
@@ -0,0 +1,213 @@
+"""Исходящая почта через таблицу.
+
+OutboxEmailBackend не отправляет письма, а сохраняет их в таблицу и
+сразу возвращает управление: запрос не ждёт почтовый сервер. Команда
+send_outbox забирает письма пачками и отправляет настоящим бэкендом
+EMAIL_OUTBOX_BACKEND. Соединение открывается один раз и живёт, пока в
+очереди есть письма; отправка идёт не чаще EMAIL_OUTBOX_RATE писем в
+секунду. Неотправленные письма повторяются с паузой, как задачи
+core.jobs, письма упавшего отправителя - тоже не больше
+OUTBOX_MAX_ATTEMPTS раз. Отправленные удаляются после пачки, поэтому
+при падении отправителя часть писем пачки может уйти повторно.
+"""
+import copy
+import logging
+import pickle
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import DatabaseError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .constants import (OUTBOX_BATCH_SIZE, OUTBOX_LEASE, OUTBOX_MAX_ATTEMPTS,
+                        OUTBOX_POLL_INTERVAL)
+from .jobs import retry_delay
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """Почтовый бэкенд, который ставит письма в очередь на отправку"""
+
+    def send_messages(self, email_messages):
+        rows = []
+        for message in email_messages:
+            recipients = message.recipients()
+            if not recipients:
+                continue
+            # Соединение не сохраняем: отправитель откроет своё
+            message = copy.copy(message)
+            message.connection = None
+            rows.append(OutboxMessage(
+                subject=message.subject[:255],
+                recipients=', '.join(recipients),
+                content=pickle.dumps(message),
+            ))
+        try:
+            OutboxMessage.objects.bulk_create(rows)
+        except DatabaseError:
+            if not self.fail_silently:
+                raise
+            return 0
+
+        return len(rows)
+
+
+def _available(now):
+    # Письма в очереди и письма упавшего отправителя
+    return Q(status=OutboxMessage.QUEUED, send_after__lte=now) | Q(
+        status=OutboxMessage.SENDING,
+        locked_until__lt=now,
+        attempts__lt=OUTBOX_MAX_ATTEMPTS,
+    )
+
+
+def _fail_abandoned(now):
+    """Письма, на которых отправитель падал во всех попытках, - в failed"""
+    failed = OutboxMessage.objects.filter(
+        status=OutboxMessage.SENDING,
+        locked_until__lt=now,
+        attempts__gte=OUTBOX_MAX_ATTEMPTS,
+    ).update(
+        status=OutboxMessage.FAILED,
+        locked_until=None,
+        last_error='Отправитель не завершил отправку ни в одной попытке',
+    )
+    if failed:
+        logger.error('Брошенных отправителем писем: %s', failed)
+
+
+def claim(batch_size=OUTBOX_BATCH_SIZE):
+    """Забирает пачку писем, которых не взял другой отправитель"""
+    now = timezone.now()
+    _fail_abandoned(now)
+    with transaction.atomic():
+        candidates = list(
+            OutboxMessage.objects.filter(_available(now)).order_by(
+                'pk',
+            ).values_list('pk', flat=True)[:batch_size]
+        )
+        claimed = [
+            pk for pk in candidates
+            if OutboxMessage.objects.filter(_available(now), pk=pk).update(
+                status=OutboxMessage.SENDING,
+                attempts=F('attempts') + 1,
+                locked_until=now + timedelta(seconds=OUTBOX_LEASE),
+            )
+        ]
+    return list(OutboxMessage.objects.filter(pk__in=claimed).order_by('pk'))
+
+
+def _failed(messages, error):
+    for message in messages:
+        queued = OutboxMessage.objects.filter(pk=message.pk)
+        if message.attempts >= OUTBOX_MAX_ATTEMPTS:
+            logger.error('Письмо %s не отправлено:\n%s', message.pk, error)
+            queued.update(
+                status=OutboxMessage.FAILED,
+                locked_until=None,
+                last_error=error,
+            )
+        else:
+            logger.warning('Письмо %s не ушло, повторим:\n%s',
+                           message.pk, error)
+            queued.update(
+                status=OutboxMessage.QUEUED,
+                locked_until=None,
+                last_error=error,
+                send_after=timezone.now() + timedelta(
+                    seconds=retry_delay(message.attempts),
+                ),
+            )
+
+
+class OutboxSender:
+    """Отправляет письма из очереди по одному соединению"""
+
+    def __init__(self, batch_size=OUTBOX_BATCH_SIZE, rate=None):
+        self.batch_size = batch_size
+        self.rate = settings.EMAIL_OUTBOX_RATE if rate is None else rate
+        self.connection = None
+        self._next_send = time.monotonic()
+
+    def _throttle(self):
+        if not self.rate:
+            return
+        delay = self._next_send - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next_send = max(self._next_send, time.monotonic()) + (
+            1 / self.rate
+        )
+
+    def _open(self):
+        if self.connection is None:
+            connection = get_connection(settings.EMAIL_OUTBOX_BACKEND)
+            connection.open()
+            self.connection = connection
+        return self.connection
+
+    def close(self):
+        if self.connection is not None:
+            connection, self.connection = self.connection, None
+            connection.close()
+
+    def send(self, messages):
+        """Отправляет пачку писем, возвращает число отправленных"""
+        try:
+            connection = self._open()
+        except Exception:
+            _failed(messages, traceback.format_exc())
+            return 0
+
+        sent = []
+        try:
+            for number, message in enumerate(messages):
+                self._throttle()
+                try:
+                    connection.send_messages([pickle.loads(message.content)])
+                except Exception:
+                    _failed([message], traceback.format_exc())
+                else:
+                    sent.append(message.pk)
+                    continue
+                # Соединение могло порваться - откроем заново
+                self.close()
+                try:
+                    connection = self._open()
+                except Exception:
+                    _failed(messages[number + 1:], traceback.format_exc())
+                    break
+        finally:
+            OutboxMessage.objects.filter(pk__in=sent).delete()
+
+        return len(sent)
+
+    def run(self, once=False, poll_interval=OUTBOX_POLL_INTERVAL,
+            should_stop=lambda: False):
+        """Цикл отправителя, возвращает число отправленных писем.
+
+        С once=True завершается, когда готовых к отправке писем не осталось.
+        """
+        sent = 0
+        try:
+            while not should_stop():
+                messages = claim(self.batch_size)
+                if messages:
+                    sent += self.send(messages)
+                    continue
+                # Очередь пуста: соединение не держим
+                self.close()
+                if once:
+                    break
+                time.sleep(poll_interval)
+        finally:
+            self.close()
+
+        return sent
@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.utils import timezone
+
+from posts.models import Post
+
+from ..constants import REPLICA_MAX_LAG, REPLICA_PIN_COOKIE
+from ..db_router import ReplicaRouter, choose_replica, mark_replica_synced
+from ..middleware import ReplicaMiddleware
+
+router = ReplicaRouter()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(SimpleTestCase):
+    """Проверка выбора базы для чтения"""
+
+    def setUp(self):
+        cache.clear()
+        mark_replica_synced('replica')
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        cache.clear()
+
+    def route(self, request, write=False):
+        """Куда пошло чтение во вью и что middleware ответил"""
+        seen = {}
+
+        def view(request):
+            seen['read'] = router.db_for_read(Post)
+            if write:
+                router.db_for_write(Post)
+            return HttpResponse()
+
+        response = ReplicaMiddleware(view)(request)
+        return seen['read'], response
+
+    def test_lagging_replica_is_skipped(self):
+        """Реплика без свежей метки синхронизации не используется"""
+        self.assertEqual(choose_replica(), 'replica')
+        mark_replica_synced(
+            'replica',
+            timezone.now() - timedelta(seconds=REPLICA_MAX_LAG + 1),
+        )
+        self.assertIsNone(choose_replica())
+        cache.clear()
+        self.assertIsNone(choose_replica())
+
+    def test_only_reading_views_use_replica(self):
+        """С реплики читают GET-запросы лент, но не формы и не POST"""
+        cases = {
+            self.factory.get('/'): 'replica',
+            self.factory.get('/about/tech/'): 'replica',
+            self.factory.get('/group/slug/'): 'replica',
+            self.factory.post('/'): None,
+            self.factory.get('/create/'): None,
+            self.factory.get('/posts/1/edit/'): None,
+            self.factory.get('/admin/'): None,
+        }
+        for request, expected in cases.items():
+            with self.subTest(path=request.path, method=request.method):
+                self.assertEqual(self.route(request)[0], expected)
+        self.assertIsNone(router.db_for_read(Post))
+
+    def test_read_your_writes(self):
+        """После записи клиент какое-то время читает с основной базы"""
+        read, response = self.route(self.factory.post('/create/'), True)
+        self.assertIn(REPLICA_PIN_COOKIE, response.cookies)
+
+        self.assertEqual(
+            response.cookies[REPLICA_PIN_COOKIE]['max-age'],
+            REPLICA_MAX_LAG,
+        )
+
+        request = self.factory.get('/')
+        request.COOKIES[REPLICA_PIN_COOKIE] = (
+            response.cookies[REPLICA_PIN_COOKIE].value
+        )
+        read, response = self.route(request)
+        self.assertIsNone(read)
+        self.assertNotIn(REPLICA_PIN_COOKIE, response.cookies)
+
+        # Реплика догнала запись - клиент снова читает с неё
+        mark_replica_synced('replica')
+        self.assertEqual(self.route(request)[0], 'replica')
@@ -0,0 +1,66 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+from ..instrumentation import collect
+
+
+class ServerTimingTests(TestCase):
+    """Проверка метрик запроса в заголовке Server-Timing"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        author = User.objects.create_user(username='author')
+        group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.create(text='Пост', author=author, group=group)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_header_has_metrics(self):
+        """Заголовок содержит время SQL, шаблонов и счётчики кэша"""
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        for metric in ('db;dur=', 'queries', 'tpl;dur=', 'cache;desc=',
+                       'thumb;dur=', 'total;dur='):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, timing)
+
+    def test_collect_counts_queries_and_cache(self):
+        """Сбор считает запросы, попадания и промахи кэша"""
+        cache.set('none', None)
+        cache.set('present', 1)
+        with collect() as metrics:
+            list(Post.objects.all())
+            cache.get('none')
+            cache.get('absent')
+            cache.get_many(['present', 'absent'])
+        self.assertEqual(metrics.sql_count, 1)
+        self.assertEqual(metrics.cache_hits, 2)
+        self.assertEqual(metrics.cache_misses, 2)
+
+    @override_settings(REQUEST_METRICS_PUBLIC=False)
+    def test_visitors_do_not_see_header(self):
+        """Посетителям, кроме персонала, метрики не показываются"""
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+        with override_settings(REQUEST_METRICS_PUBLIC=True):
+            response = self.client.get(reverse('about:author'))
+        self.assertTrue(response.has_header('Server-Timing'))
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=0)
+    def test_not_sampled_request_has_no_header(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    @override_settings(REQUEST_METRICS_SLOW_MS=0)
+    def test_slow_request_is_logged_with_view_name(self):
+        with self.assertLogs('core.middleware', 'WARNING') as logs:
+            self.client.get(reverse('posts:index'))
+        self.assertIn('posts:index', logs.output[0])
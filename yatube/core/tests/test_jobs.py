@@ -0,0 +1,126 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from posts.models import Post, User
+
+from ..jobs import claim, enqueue, run_job, task, work
+from ..models import Job
+
+calls = []
+
+
+@task('tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task('tests.fail')
+def fail():
+    raise ValueError('Задача упала')
+
+
+class JobQueueTests(TestCase):
+    """Проверка очереди фоновых задач"""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_deduplicates_by_key(self):
+        """Задача с тем же ключом не ставится, пока первая ждёт"""
+        first = enqueue('tests.record', 1, key='record')
+        second = enqueue('tests.record', 2, key='record')
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Job.objects.count(), 1)
+
+        claim()
+        enqueue('tests.record', 3, key='record')
+        self.assertEqual(Job.objects.count(), 2)
+
+    def test_unknown_task(self):
+        """Неизвестную задачу поставить нельзя"""
+        with self.assertRaises(LookupError):
+            enqueue('tests.unknown')
+
+    def test_work_runs_and_deletes_jobs(self):
+        """Воркер выполняет готовые задачи и удаляет их"""
+        enqueue('tests.record', 1)
+        enqueue('tests.record', 2)
+        enqueue('tests.record', 3, delay=60)
+        self.assertEqual(work(once=True), 2)
+        self.assertEqual(calls, [1, 2])
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_claimed_job_is_not_claimed_twice(self):
+        """Взятую задачу другой воркер не получит до конца аренды"""
+        job = enqueue('tests.record', 1)
+        self.assertEqual(claim(), [job])
+        self.assertEqual(claim(), [])
+
+        Job.objects.filter(pk=job.pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1),
+        )
+        [job] = claim()
+        self.assertEqual(job.attempts, 2)
+
+    def test_abandoned_job_fails_after_all_attempts(self):
+        """Задача, на которой воркер падает, не забирается бесконечно"""
+        job = enqueue('tests.record', 1, max_attempts=2)
+        for _ in range(2):
+            [job] = claim()
+            Job.objects.filter(pk=job.pk).update(
+                locked_until=timezone.now() - timedelta(seconds=1),
+            )
+        with self.assertLogs('core.jobs', 'ERROR'):
+            self.assertEqual(claim(), [])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_failed_job_is_retried_with_backoff(self):
+        """Упавшая задача откладывается, после всех попыток - failed"""
+        enqueue('tests.fail', max_attempts=2)
+        [job] = claim()
+        with self.assertLogs('core.jobs', 'WARNING'):
+            self.assertFalse(run_job(job))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('Задача упала', job.last_error)
+
+        Job.objects.update(run_at=timezone.now())
+        [job] = claim()
+        with self.assertLogs('core.jobs', 'ERROR'):
+            self.assertFalse(run_job(job))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(claim(), [])
+
+    def test_run_workers_once(self):
+        """run_workers --once выполняет очередь в текущем процессе"""
+        enqueue('tests.record', 1)
+        out = StringIO()
+        call_command('run_workers', '--once', stdout=out)
+        self.assertEqual(calls, [1])
+        self.assertIn('Выполнено задач: 1', out.getvalue())
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_mode(self):
+        """С JOBS_EAGER задача выполняется сразу"""
+        self.assertIsNone(enqueue('tests.record', 1))
+        self.assertEqual(calls, [1])
+        self.assertFalse(Job.objects.exists())
+
+    def test_post_save_queues_index_job(self):
+        """Сохранение поста ставит одну задачу индексации"""
+        author = User.objects.create_user(username='author')
+        post = Post.objects.create(text='Пост', author=author)
+        post.text = 'Новый текст'
+        post.save()
+        self.assertEqual(
+            list(Job.objects.values_list('task', 'key')),
+            [('posts.index_posts', f'search:post:{post.pk}')],
+        )
@@ -0,0 +1,137 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+CONTENT = b'0123456789'
+HASHED = 'posts/ab/cd/' + 'abcd' * 16 + '.jpg'
+
+
+class ServeMediaTests(TestCase):
+    """Проверка раздачи файлов из MEDIA_ROOT"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+        super().setUpClass()
+        for name in ('plain.txt', HASHED):
+            path = os.path.join(cls.media_root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(CONTENT)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    def get(self, name, **headers):
+        return self.client.get(settings.MEDIA_URL + name, **headers)
+
+    def content(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_serves_file_with_validators(self):
+        """Файл отдаётся целиком с ETag и заголовками кэширования"""
+        response = self.get('plain.txt')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.content(response), CONTENT)
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response['Content-Type'], 'text/plain')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertFalse(response['ETag'].startswith('W/'))
+        self.assertIn('Last-Modified', response)
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+        response = self.get(HASHED)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+
+    def test_not_modified(self):
+        """Совпавший ETag даёт 304 с теми же заголовками"""
+        etag = self.get('plain.txt')['ETag']
+        response = self.get('plain.txt', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertIn('max-age', response['Cache-Control'])
+
+    def test_byte_ranges(self):
+        """Range отдаёт часть файла, неверный диапазон - 416"""
+        cases = {
+            'bytes=2-5': (b'2345', 'bytes 2-5/10'),
+            'bytes=7-': (b'789', 'bytes 7-9/10'),
+            'bytes=-3': (b'789', 'bytes 7-9/10'),
+            'bytes=8-100': (b'89', 'bytes 8-9/10'),
+        }
+        for header, (content, content_range) in cases.items():
+            with self.subTest(range=header):
+                response = self.get('plain.txt', HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(self.content(response), content)
+                self.assertEqual(response['Content-Range'], content_range)
+                self.assertEqual(
+                    response['Content-Length'], str(len(content)),
+                )
+
+        response = self.get('plain.txt', HTTP_RANGE='bytes=10-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+        for header in ('ETag', 'Last-Modified', 'Cache-Control'):
+            with self.subTest(header=header):
+                self.assertNotIn(header, response)
+
+    def test_if_range(self):
+        """Range со старым If-Range игнорируется, файл отдаётся целиком"""
+        etag = self.get('plain.txt')['ETag']
+        response = self.get(
+            'plain.txt', HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE=etag,
+        )
+        self.assertEqual(response.status_code, 206)
+        response = self.get(
+            'plain.txt', HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"old"',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.content(response), CONTENT)
+
+    def test_missing_and_unsafe_paths(self):
+        """Чужие пути, каталоги и несуществующие файлы - 404"""
+        for name in ('missing.txt', 'posts/', '../manage.py'):
+            with self.subTest(name=name):
+                self.assertEqual(self.get(name).status_code, 404)
+        response = self.client.post(settings.MEDIA_URL + 'plain.txt')
+        self.assertEqual(response.status_code, 405)
+
+    def test_offload_to_web_server(self):
+        """С MEDIA_SENDFILE файл отдаёт веб-сервер по заголовку"""
+        with self.settings(MEDIA_SENDFILE='x-accel-redirect'):
+            response = self.get(HASHED)
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            settings.MEDIA_ACCEL_REDIRECT_PREFIX + HASHED,
+        )
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertIn('immutable', response['Cache-Control'])
+
+        with self.settings(MEDIA_SENDFILE='x-sendfile'):
+            response = self.get('plain.txt')
+        self.assertEqual(
+            response['X-Sendfile'],
+            os.path.join(self.media_root, 'plain.txt'),
+        )
+
+    def test_offloaded_ranges(self):
+        """С MEDIA_SENDFILE диапазоны разбирает веб-сервер"""
+        with self.settings(MEDIA_SENDFILE='x-sendfile'):
+            for header in ('bytes=2-5', 'bytes=10-'):
+                with self.subTest(range=header):
+                    response = self.get('plain.txt', HTTP_RANGE=header)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertIn('X-Sendfile', response)
+                    self.assertNotIn('Content-Range', response)
+                    self.assertEqual(response.content, b'')
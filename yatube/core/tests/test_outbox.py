@@ -0,0 +1,128 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import User
+
+from ..models import OutboxMessage
+from ..outbox import OutboxSender, claim
+
+opened = []
+
+
+class CountingBackend(EmailBackend):
+    def open(self):
+        opened.append(self)
+        return True
+
+
+class FailingBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionError('Почтовый сервер недоступен')
+
+
+@override_settings(
+    EMAIL_BACKEND='core.outbox.OutboxEmailBackend',
+    EMAIL_OUTBOX_BACKEND='core.tests.test_outbox.CountingBackend',
+    EMAIL_OUTBOX_RATE=0,
+)
+class OutboxTests(TestCase):
+    """Проверка очереди исходящей почты"""
+
+    def setUp(self):
+        opened.clear()
+
+    def send(self, count=1):
+        for number in range(count):
+            mail.send_mail(
+                f'Письмо {number}', 'Текст', 'from@example.com',
+                ['to@example.com'], html_message='<p>Текст</p>',
+            )
+
+    def test_backend_queues_messages(self):
+        """Письмо сохраняется в очередь, а не отправляется"""
+        self.send()
+        self.assertEqual(mail.outbox, [])
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.subject, 'Письмо 0')
+        self.assertEqual(message.recipients, 'to@example.com')
+
+    def test_password_reset_queues_email(self):
+        """Письмо сброса пароля уходит через очередь"""
+        User.objects.create_user(
+            'author', 'author@example.com', 'password',
+        )
+        response = self.client.post(
+            reverse('users:password_reset'),
+            {'email': 'author@example.com'},
+        )
+        self.assertRedirects(response, reverse('users:password_reset_done'))
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+        call_command('send_outbox', '--once', stdout=StringIO())
+        [message] = mail.outbox
+        self.assertEqual(message.to, ['author@example.com'])
+        self.assertIn('/auth/reset/', message.body)
+
+    def test_sender_drains_queue_over_one_connection(self):
+        """Пачки отправляются по одному соединению и удаляются"""
+        self.send(5)
+        out = StringIO()
+        call_command('send_outbox', '--once', '--batch-size=2', stdout=out)
+        self.assertIn('Отправлено писем: 5', out.getvalue())
+        self.assertEqual(
+            [message.subject for message in mail.outbox],
+            [f'Письмо {number}' for number in range(5)],
+        )
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+        self.assertEqual(len(opened), 1)
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    @mock.patch('core.outbox.time.sleep')
+    def test_rate_limit(self, sleep):
+        """Отправитель выдерживает паузу между письмами"""
+        self.send(3)
+        OutboxSender(rate=2).run(once=True)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(sleep.call_count, 2)
+
+    @override_settings(
+        EMAIL_OUTBOX_BACKEND='core.tests.test_outbox.FailingBackend',
+    )
+    @mock.patch('core.outbox.OUTBOX_MAX_ATTEMPTS', 2)
+    def test_failed_message_is_retried(self):
+        """Неотправленное письмо откладывается, после попыток - failed"""
+        self.send()
+        with self.assertLogs('core.outbox', 'WARNING'):
+            self.assertEqual(OutboxSender().run(once=True), 0)
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.status, OutboxMessage.QUEUED)
+        self.assertGreater(message.send_after, timezone.now())
+        self.assertIn('Почтовый сервер недоступен', message.last_error)
+
+        OutboxMessage.objects.update(send_after=timezone.now())
+        with self.assertLogs('core.outbox', 'ERROR'):
+            OutboxSender().run(once=True)
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxMessage.FAILED)
+
+    @mock.patch('core.outbox.OUTBOX_MAX_ATTEMPTS', 2)
+    def test_abandoned_message_fails_after_all_attempts(self):
+        """Письмо, на котором отправитель падает, не берётся бесконечно"""
+        self.send()
+        for _ in range(2):
+            [message] = claim()
+            OutboxMessage.objects.update(
+                locked_until=timezone.now() - timedelta(seconds=1),
+            )
+        with self.assertLogs('core.outbox', 'ERROR'):
+            self.assertEqual(claim(), [])
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxMessage.FAILED)
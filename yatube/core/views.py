@@ -1,4 +1,16 @@
+import os
+import stat as stat_module
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_safe
+
+from .media import (file_etag, file_response, offloaded_response,
+                    set_validators)
 
 
 def page_not_found(request, exception):
@@ -28,3 +40,31 @@ def permission_denied(request, exception):
     """View функция страницы 403"""
 
     return render(request, 'core/403.html', status=403)
+
+
+@require_safe
+def serve_media(request, path):
+    """Отдаёт загруженный файл из MEDIA_ROOT"""
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(fullpath)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404('Файл не найден')
+    if not stat_module.S_ISREG(stat.st_mode):
+        raise Http404('Файл не найден')
+
+    response = get_conditional_response(
+        request,
+        etag=file_etag(stat),
+        last_modified=int(stat.st_mtime),
+    )
+    if response is None:
+        # Range с MEDIA_SENDFILE тоже разбирает веб-сервер
+        if settings.MEDIA_SENDFILE:
+            response = offloaded_response(path, fullpath)
+        else:
+            response = file_response(request, path, fullpath, stat)
+    # Ответы об ошибках (412, 416) нельзя кэшировать как сам файл
+    if response.status_code < 400:
+        set_validators(response, path, stat)
+    return response
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from .models import Group, Post
+from .search import is_fts_available, match_query, matching_ids
 
 
 @admin.register(Post)
@@ -13,5 +14,15 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Ищет по полнотекстовому индексу вместо LIKE по всему тексту"""
+        if not search_term or not is_fts_available():
+            return super().get_search_results(request, queryset, search_term)
+        if not match_query(search_term):
+            # Без слов запрос FTS5 не составить, искать нечего
+            return queryset.none(), False
+
+        return queryset.filter(pk__in=matching_ids(search_term)), False
+
 
 admin.site.register(Group)
@@ -0,0 +1,178 @@
+"""JSON API для лент и постов - только чтение.
+
+Строки сериализуются прямо из .values(), модели не создаются. Поля
+ответа выбираются параметром ``?fields=id,text,author``, страницы
+листаются курсором ``?cursor=`` из поля ``next`` предыдущего ответа.
+"""
+from functools import wraps
+
+from django.contrib.auth import get_user_model
+from django.http import Http404, JsonResponse
+
+from .conditional import (conditional_get, group_validators, index_validators,
+                          post_validators, profile_validators)
+from .constants import POSTS_LIMIT
+from .models import Group, Post
+from .paginators import NEXT, KeysetPaginator, decode_cursor, encode_position
+from .thumbnails import field_file, prefetch_images, thumbnail_url
+
+User = get_user_model()
+# Поле ответа -> поле для values()
+API_FIELDS = {
+    'id': 'pk',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'updated': 'updated',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+}
+# Нужны для курсора, даже если их не просили
+CURSOR_FIELDS = ('pk', 'pub_date')
+JSON_PARAMS = {'ensure_ascii': False, 'separators': (',', ':')}
+
+
+class ApiError(Exception):
+    """Ошибка в параметрах запроса к API"""
+
+
+def _json(data, status=200):
+    return JsonResponse(data, status=status, json_dumps_params=JSON_PARAMS)
+
+
+def api_view(view):
+    """Декоратор: ошибки API отдаются в JSON, а не HTML-страницей"""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as error:
+            return _json({'error': str(error)}, status=400)
+        except Http404:
+            return _json({'error': 'Не найдено'}, status=404)
+
+    return wrapper
+
+
+def _requested_fields(request):
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(API_FIELDS)
+    fields = [field.strip() for field in raw.split(',') if field.strip()]
+    unknown = sorted(set(fields) - set(API_FIELDS))
+    if unknown:
+        raise ApiError(f'Неизвестные поля: {", ".join(unknown)}')
+
+    return fields
+
+
+def _values(queryset, fields):
+    lookups = {API_FIELDS[field] for field in fields}
+    return queryset.values(*lookups.union(CURSOR_FIELDS))
+
+
+def _serialize(rows, fields):
+    images = {}
+    if 'image' in fields:
+        images = {
+            row['image']: field_file(row['image'])
+            for row in rows if row['image']
+        }
+        prefetch_images(images.values())
+
+    results = []
+    for row in rows:
+        item = {field: row[API_FIELDS[field]] for field in fields}
+        if 'image' in item:
+            image = images.get(item['image'])
+            item['image'] = thumbnail_url(image) if image else None
+        results.append(item)
+
+    return results
+
+
+def _feed(request, queryset, **extra):
+    fields = _requested_fields(request)
+    paginator = KeysetPaginator(_values(queryset, fields), POSTS_LIMIT)
+    rows = paginator.object_list
+    cursor = request.GET.get('cursor')
+    if cursor:
+        position = decode_cursor(cursor)
+        if position is None or position[0] != NEXT:
+            raise ApiError('Некорректный курсор')
+        rows = paginator.seek(*position)
+
+    rows = list(rows[:POSTS_LIMIT + 1])
+    next_cursor = None
+    if len(rows) > POSTS_LIMIT:
+        rows = rows[:POSTS_LIMIT]
+        last = rows[-1]
+        next_cursor = encode_position(NEXT, last['pub_date'], last['pk'])
+
+    return _json({
+        **extra,
+        'results': _serialize(rows, fields),
+        'next': next_cursor,
+    })
+
+
+def _get_values(queryset, *fields, **lookup):
+    row = queryset.filter(**lookup).values(*fields).first()
+    if row is None:
+        raise Http404
+
+    return row
+
+
+@conditional_get(index_validators)
+@api_view
+def index(request):
+    """Лента всех постов"""
+    return _feed(request, Post.objects.all())
+
+
+@conditional_get(group_validators)
+@api_view
+def group_posts(request, slug):
+    """Лента сообщества"""
+    group = _get_values(
+        Group.objects.all(),
+        'pk', 'slug', 'title', 'description', 'posts_count',
+        slug=slug,
+    )
+    return _feed(
+        request,
+        Post.objects.filter(group_id=group.pop('pk')),
+        group=group,
+    )
+
+
+@conditional_get(profile_validators)
+@api_view
+def profile(request, username):
+    """Лента автора"""
+    author = _get_values(
+        User.objects.all(),
+        'pk', 'username', 'first_name', 'last_name', 'profile__posts_count',
+        username=username,
+    )
+    author['posts_count'] = author.pop('profile__posts_count') or 0
+    return _feed(
+        request,
+        Post.objects.filter(author_id=author.pop('pk')),
+        author=author,
+    )
+
+
+@conditional_get(post_validators)
+@api_view
+def post_detail(request, post_id):
+    """Отдельный пост"""
+    fields = _requested_fields(request)
+    row = _get_values(
+        Post.objects.all(),
+        *{API_FIELDS[field] for field in fields},
+        pk=post_id,
+    )
+    return _json(_serialize([row], fields)[0])
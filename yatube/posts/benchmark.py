@@ -0,0 +1,342 @@
+"""Нагрузочный бенчмарк страниц posts.urls.
+
+Сценарий - один URL: ленты на первой, средней и последней странице,
+пост, формы создания и правки. Каждый сценарий прогоняется в процессе
+через тестовый клиент и через локальный WSGI-сервер. Число запросов к
+БД берётся из заголовка Server-Timing (core.instrumentation), память -
+пик tracemalloc за отдельный запрос. Результат - JSON, который можно
+сравнить с прошлым прогоном.
+"""
+import http.client
+import math
+import re
+import resource
+import threading
+import time
+import tracemalloc
+from collections import namedtuple
+from statistics import mean, median
+from urllib.parse import urlencode
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models import F, Max
+from django.http import HttpRequest
+from django.middleware.csrf import get_token
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from .constants import FEED_ORDERING, POSTS_LIMIT
+from .models import Group, Post
+from .paginators import NEXT, encode_position
+
+User = get_user_model()
+Scenario = namedtuple('Scenario', 'name method path data')
+QUERIES = re.compile(r'"(\d+) queries"')
+
+
+def seed(posts, authors, groups, random_seed=0, workers=None, stdout=None):
+    """Заполняет базу воспроизводимым набором данных командой seed.
+
+    Картинок нет: замеряются страницы, а не подготовка миниатюр. Команда
+    сама ставит счётчики, поисковый индекс и кэши лент, ленты
+    пользователей собираются заново.
+    """
+    options = {}
+    if workers is not None:
+        options['workers'] = workers
+    call_command(
+        'seed',
+        users=authors,
+        groups=groups,
+        posts=posts,
+        image_share=0,
+        random_seed=random_seed,
+        stdout=stdout,
+        **options,
+    )
+    if settings.POSTS_TIMELINE_ENABLED:
+        call_command('rebuild_timelines', stdout=stdout)
+
+
+def dataset():
+    """Размер данных, на которых шёл прогон"""
+    return {
+        'posts': Post.objects.count(),
+        'authors': User.objects.count(),
+        'groups': Group.objects.count(),
+    }
+
+
+def _pages(count):
+    last = max((count - 1) // POSTS_LIMIT + 1, 1)
+    return {'first': 1, 'middle': (last + 1) // 2, 'last': last}
+
+
+def _with_query(path, **params):
+    return f'{path}?{urlencode(params)}'
+
+
+def scenarios(author):
+    """Сценарии для всех страниц posts.urls.
+
+    Ленты берутся самые большие: сообщество и автор с наибольшим
+    числом постов. Формы открывает и отправляет author.
+    """
+    result = []
+
+    def feed(name, path, queryset):
+        count = queryset.count()
+        for page, number in _pages(count).items():
+            result.append(Scenario(
+                f'{name}_{page}', 'GET', _with_query(path, page=number), None,
+            ))
+        middle = queryset.order_by(*FEED_ORDERING).values_list(
+            'pub_date', 'pk',
+        )[count // 2:count // 2 + 1]
+        for pub_date, pk in middle:
+            cursor = encode_position(NEXT, pub_date, pk)
+            result.append(Scenario(
+                f'{name}_cursor', 'GET', _with_query(path, cursor=cursor),
+                None,
+            ))
+
+    feed('index', reverse('posts:index'), Post.objects.all())
+    group = Group.objects.order_by('-posts_count').first()
+    if group is not None:
+        feed(
+            'group_list',
+            reverse('posts:group_list', args=(group.slug,)),
+            Post.objects.filter(group=group),
+        )
+    feed(
+        'profile',
+        reverse('posts:profile', args=(author.username,)),
+        Post.objects.filter(author=author),
+    )
+
+    post = Post.objects.filter(author=author).order_by(*FEED_ORDERING).first()
+    create = reverse('posts:post_create')
+    result += [
+        Scenario('post_create', 'GET', create, None),
+        Scenario('post_create_submit', 'POST', create, {
+            'text': 'Пост из бенчмарка',
+        }),
+    ]
+    if post is not None:
+        edit = reverse('posts:post_edit', args=(post.pk,))
+        result += [
+            Scenario(
+                'post_detail', 'GET',
+                reverse('posts:post_detail', args=(post.pk,)), None,
+            ),
+            Scenario('post_edit', 'GET', edit, None),
+            # Тот же текст: данные не меняются от прогона к прогону
+            Scenario('post_edit_submit', 'POST', edit, {
+                'text': post.text,
+                'group': post.group_id or '',
+            }),
+        ]
+
+    return result
+
+
+def most_active_author():
+    return User.objects.order_by(
+        F('profile__posts_count').desc(nulls_last=True), 'pk',
+    ).first()
+
+
+class ClientDriver:
+    """Запросы в процессе, через тестовый клиент Django"""
+
+    mode = 'inprocess'
+
+    def __init__(self, user):
+        self.client = Client()
+        self.client.force_login(user)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def request(self, scenario):
+        if scenario.method == 'POST':
+            response = self.client.post(scenario.path, scenario.data)
+        else:
+            response = self.client.get(scenario.path)
+        return response.status_code, response.get('Server-Timing', '')
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class ServerDriver:
+    """Запросы по HTTP к WSGI-серверу в отдельном потоке"""
+
+    mode = 'server'
+
+    def __init__(self, user):
+        client = Client()
+        client.force_login(user)
+        session = client.cookies[settings.SESSION_COOKIE_NAME].value
+        csrf_request = HttpRequest()
+        self.csrf_token = get_token(csrf_request)
+        self.cookie = (
+            f'{settings.SESSION_COOKIE_NAME}={session}; '
+            f'{settings.CSRF_COOKIE_NAME}='
+            f'{csrf_request.META["CSRF_COOKIE"]}'
+        )
+
+    def __enter__(self):
+        self.server = make_server(
+            '127.0.0.1', 0, WSGIHandler(), handler_class=_QuietHandler,
+        )
+        self.thread = threading.Thread(
+            target=self.server.serve_forever,
+            daemon=True,
+        )
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def request(self, scenario):
+        headers = {'Cookie': self.cookie}
+        body = None
+        if scenario.method == 'POST':
+            body = urlencode(scenario.data)
+            headers.update({
+                'Content-Type': 'application/x-www-form-urlencoded',
+                'X-CSRFToken': self.csrf_token,
+            })
+        connection = http.client.HTTPConnection(*self.server.server_address)
+        try:
+            connection.request(scenario.method, scenario.path, body, headers)
+            response = connection.getresponse()
+            response.read()
+            return response.status, response.getheader('Server-Timing', '')
+        finally:
+            connection.close()
+
+
+def percentile(values, q):
+    """Перцентиль q (0-100) методом ближайшего ранга"""
+    values = sorted(values)
+    rank = max(math.ceil(q / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def _queries(server_timing):
+    found = QUERIES.search(server_timing)
+    return int(found.group(1)) if found else None
+
+
+def run_scenario(driver, scenario, requests, warmup):
+    last_pk = Post.objects.aggregate(Max('pk'))['pk__max'] or 0
+    timings = []
+    queries = []
+    statuses = set()
+    for number in range(warmup + requests):
+        started = time.perf_counter()
+        status, server_timing = driver.request(scenario)
+        elapsed = (time.perf_counter() - started) * 1000
+        if number >= warmup:
+            timings.append(elapsed)
+            queries.append(_queries(server_timing))
+            statuses.add(status)
+
+    tracemalloc.start()
+    try:
+        driver.request(scenario)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    if scenario.method == 'POST':
+        # Убираем созданные бенчмарком посты, чтобы не менять данные
+        with transaction.atomic():
+            for post in Post.objects.filter(pk__gt=last_pk):
+                post.delete()
+
+    known = [count for count in queries if count is not None]
+    return {
+        'method': scenario.method,
+        'path': scenario.path,
+        'status': sorted(statuses),
+        'requests': requests,
+        'mean_ms': round(mean(timings), 3),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'queries': median(known) if known else None,
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def run(drivers, scenarios, requests, warmup, stdout=None):
+    """Прогоняет сценарии через каждый драйвер"""
+    results = {}
+    for driver in drivers:
+        with driver:
+            mode = results.setdefault(driver.mode, {})
+            for scenario in scenarios:
+                mode[scenario.name] = run_scenario(
+                    driver, scenario, requests, warmup,
+                )
+                if stdout:
+                    stdout.write(format_row(
+                        driver.mode, scenario.name, mode[scenario.name],
+                    ))
+
+    return {
+        'created': timezone.now().isoformat(),
+        'dataset': dataset(),
+        'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'results': results,
+    }
+
+
+def format_row(mode, name, result, baseline=None):
+    row = (
+        f'{mode:9} {name:24} p50 {result["p50_ms"]:8.2f} мс  '
+        f'p95 {result["p95_ms"]:8.2f} мс  p99 {result["p99_ms"]:8.2f} мс  '
+        f'запросов {result["queries"]}  память '
+        f'{result["peak_memory_kb"]:.0f} КБ'
+    )
+    if baseline:
+        changes = [
+            f'{key[:3]} {change(baseline[key], result[key]):+.1f}%'
+            for key in ('p50_ms', 'p95_ms')
+        ]
+        row += f'  ({", ".join(changes)})'
+
+    return row
+
+
+def change(before, after):
+    return (after - before) / before * 100 if before else 0.0
+
+
+def compare(report, baseline):
+    """Строки сравнения с прошлым прогоном для общих сценариев"""
+    rows = []
+    for mode, results in report['results'].items():
+        before = baseline.get('results', {}).get(mode, {})
+        for name, result in results.items():
+            if name in before:
+                rows.append(format_row(mode, name, result, before[name]))
+
+    return rows
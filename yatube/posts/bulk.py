@@ -0,0 +1,39 @@
+"""Массовая запись постов в обход сигналов: import_posts и seed.
+
+Сигналы на каждый пост правят счётчики, кэши лент и поисковый индекс.
+Команды пишут посты пачками и делают это сами - здесь общие для них
+части.
+"""
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from .counts import change_feed_counts
+from .models import Post
+from .page_cache import feed_tag, invalidate_tags
+from .timeline import reset_timelines
+
+
+@contextmanager
+def source_pub_date():
+    """Отключает auto_now_add у Post.pub_date: даты берём из источника.
+
+    Поле общее для процесса, поэтому только для команд: в процессе,
+    который обслуживает запросы, новые посты остались бы без даты.
+    """
+    field = Post._meta.get_field('pub_date')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def feeds_imported(feeds):
+    """Правит кэши лент после коммита пачки, как сигналы для одного поста"""
+    for feed, total in feeds.items():
+        change_feed_counts([feed], total)
+    if settings.POSTS_TIMELINE_ENABLED:
+        # Даты постов из источника произвольные - ленты соберутся заново
+        reset_timelines(list(feeds))
+    invalidate_tags(*[feed_tag(feed) for feed in feeds])
@@ -0,0 +1,105 @@
+"""Условные GET-запросы (ETag и Last-Modified) для лент и постов.
+
+Валидаторы считаются дешёвыми запросами до вызова вью: время последней
+правки постов ленты (по индексу) и размер ленты из счётчиков. Сообщество
+и автора берём из кэша lookups, как и сами вью. Если клиент прислал
+совпадающий If-None-Match или If-Modified-Since, он получает 304 без
+выборки страницы и рендера шаблонов.
+Имена авторов и названия сообществ видны на всех страницах, поэтому
+их правка сдвигает общую метку времени в кэше, входящую в валидаторы.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Max
+from django.http import Http404
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from .constants import NAMES_CHANGED_KEY
+from .counts import get_request_feed_count
+from .feeds import GLOBAL_FEED, author_feed, group_feed
+from .lookups import authors, groups
+from .models import Post
+from .page_cache import PAGE_PARAMS
+
+
+def names_changed():
+    """Отмечает правку имени автора или названия сообщества"""
+    cache.set(NAMES_CHANGED_KEY, timezone.now(), None)
+
+
+def _validators(request, last_modified, *parts):
+    names = cache.get(NAMES_CHANGED_KEY)
+    if names is not None and last_modified is not None:
+        last_modified = max(last_modified, names)
+    # Авторизованным показываем ссылки на правку - ETag у каждого свой
+    params = [request.GET.get(param, '') for param in PAGE_PARAMS]
+    raw = repr((request.user.pk, params, last_modified, names, parts))
+    return hashlib.md5(raw.encode()).hexdigest(), last_modified
+
+
+def _feed_validators(request, feed, queryset, counter=None, parts=()):
+    last_modified = queryset.aggregate(Max('updated'))['updated__max']
+    count = get_request_feed_count(request, feed, queryset, counter)
+    return _validators(request, last_modified, count, *parts)
+
+
+def index_validators(request):
+    return _feed_validators(request, GLOBAL_FEED, Post.objects.all())
+
+
+def group_validators(request, slug):
+    try:
+        group = groups.get_or_404(slug)
+    except Http404:
+        return None, None
+    return _feed_validators(
+        request,
+        group_feed(group.pk),
+        Post.objects.filter(group_id=group.pk),
+        group.posts_count,
+        (group.title, group.description),
+    )
+
+
+def profile_validators(request, username):
+    try:
+        author = authors.get_or_404(username)
+    except Http404:
+        return None, None
+    profile = getattr(author, 'profile', None)
+    return _feed_validators(
+        request,
+        author_feed(author.pk),
+        Post.objects.filter(author_id=author.pk),
+        profile and profile.posts_count,
+    )
+
+
+def post_validators(request, post_id):
+    updated = Post.objects.filter(pk=post_id).values_list(
+        'updated', flat=True,
+    ).first()
+    if updated is None:
+        return None, None
+    return _validators(request, updated)
+
+
+def conditional_get(get_validators):
+    """Декоратор: отвечает 304, если страница у клиента не устарела"""
+
+    def validators(request, *args, **kwargs):
+        # condition() спрашивает ETag и Last-Modified по отдельности
+        if not hasattr(request, 'conditional_validators'):
+            request.conditional_validators = get_validators(
+                request, *args, **kwargs,
+            )
+        return request.conditional_validators
+
+    return condition(
+        etag_func=lambda *args, **kwargs: validators(*args, **kwargs)[0],
+        last_modified_func=(
+            lambda *args, **kwargs: validators(*args, **kwargs)[1]
+        ),
+    )
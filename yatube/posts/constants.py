@@ -1,2 +1,60 @@
 POSTS_LIMIT = 10
 MAX_CHAR_LIMIT = 40
+# Порядок постов в лентах: id разрешает совпадения по дате публикации
+FEED_ORDERING = ('-pub_date', 'id')
+# Начиная с этой страницы ссылки пагинатора строятся курсором
+KEYSET_PAGE_THRESHOLD = 10
+# Ссылки на страницы: по краям ленты и вокруг текущей, остальное - «…»
+PAGE_RANGE_ON_ENDS = 2
+PAGE_RANGE_ON_EACH_SIDE = 3
+# Кэш количества постов в лентах
+COUNT_CACHE_KEY = 'posts:count:{}'
+COUNT_CACHE_TIMEOUT = 60 * 60 * 24
+# Ленты меньше этого размера проще посчитать, чем держать в кэше
+COUNT_CACHE_THRESHOLD = 1000
+# Оценка по статистике СУБД живёт в кэше недолго
+COUNT_ESTIMATE_TIMEOUT = 60 * 5
+# Предрассчитанные ленты: сколько id постов храним и как долго
+TIMELINE_CACHE_KEY = 'posts:timeline:{}'
+TIMELINE_LENGTH = 1000
+TIMELINE_TIMEOUT = 60 * 60
+# Блокировка ленты на время чтения-правки-записи и метка правки,
+# пропущенной из-за блокировки
+TIMELINE_LOCK_KEY = 'posts:timeline_lock:{}'
+TIMELINE_DIRTY_KEY = 'posts:timeline_dirty:{}'
+TIMELINE_LOCK_TIMEOUT = 10
+# Кэш страниц для анонимных посетителей
+PAGE_CACHE_KEY = 'posts:page:{}'
+PAGE_CACHE_TAG_KEY = 'posts:page_tag:{}'
+PAGE_CACHE_CLOCK_KEY = 'posts:page_clock'
+PAGE_CACHE_STATS_KEY = 'posts:page_stats:{}:{}'
+PAGE_CACHE_TIMEOUT = 60 * 15
+# Кэш отрендеренных постов в лентах
+FRAGMENT_CACHE_KEY = 'posts:fragment:{}'
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+# Размеры миниатюр из шаблонов posts/post.html и posts/post_detail.html
+THUMBNAIL_GEOMETRIES = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+THUMBNAIL_WORKERS = 2
+# Сколько записей о миниатюрах держать в памяти процесса
+THUMBNAIL_LRU_SIZE = 1024
+# Сколько секунд запись живёт в памяти процесса
+THUMBNAIL_LRU_TTL = 60
+# Поиск: больше стольких результатов не считаем и не показываем
+SEARCH_MAX_RESULTS = 1000
+# Сколько постов индексировать одним запросом
+SEARCH_INDEX_BATCH = 500
+# Выгрузка постов: сколько строк читать из БД за запрос
+EXPORT_CHUNK_SIZE = 2000
+# Когда последний раз правили имя автора или название сообщества
+NAMES_CHANGED_KEY = 'posts:names_changed'
+# Кэш поиска сообществ и авторов в памяти процесса
+LOOKUP_VERSION_KEY = 'posts:lookup:{}:{}'
+LOOKUP_CLOCK_KEY = 'posts:lookup_clock'
+LOOKUP_CACHE_SIZE = 1024
+LOOKUP_CACHE_TTL = 60
+# Картинки постов по хэшу содержимого: файл без ссылок удаляется не
+# раньше чем через столько секунд, пока его могут загрузить заново
+MEDIA_GC_GRACE = 60 * 60
+MEDIA_BATCH_SIZE = 1000
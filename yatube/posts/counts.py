@@ -0,0 +1,149 @@
+from core.jobs import enqueue
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.db.models import F
+from users.models import Profile
+
+from .constants import (COUNT_CACHE_KEY, COUNT_CACHE_THRESHOLD,
+                        COUNT_CACHE_TIMEOUT, COUNT_ESTIMATE_TIMEOUT)
+from .feeds import GLOBAL_FEED
+from .lookups import authors, groups
+from .models import Group, Post
+
+
+def _sqlite_estimate(table):
+    """Оценка по таблице sqlite_stat1, которую заполняет ANALYZE"""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+                [table],
+            )
+            row = cursor.fetchone()
+    except DatabaseError:
+        # ANALYZE ещё ни разу не запускали
+        return None
+
+    # Первое число - строк в таблице, остальные - средние по ключам
+    number = row[0].split()[0] if row else ''
+    return int(number) if number.isdigit() else None
+
+
+def _postgresql_estimate(table):
+    """Оценка по pg_class"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples FROM pg_class WHERE relname = %s',
+            [table],
+        )
+        row = cursor.fetchone()
+
+    return int(row[0]) if row and row[0] > 0 else None
+
+
+def estimate_count(feed):
+    """Примерный размер ленты по статистике СУБД, None если её нет.
+
+    Статистика знает только размер всей таблицы, поэтому оценить можно
+    лишь общую ленту: у сообществ и авторов есть свои счётчики.
+    """
+    if feed != GLOBAL_FEED:
+        return None
+    table = Post._meta.db_table
+    if connection.vendor == 'sqlite':
+        return _sqlite_estimate(table)
+    if connection.vendor == 'postgresql':
+        return _postgresql_estimate(table)
+
+    return None
+
+
+def get_feed_count(feed, queryset, counter=None):
+    """Количество постов в ленте: из кэша, по оценке или точным COUNT.
+
+    ``counter`` - денормализованный счётчик ленты, если он есть. Ему
+    верим только для больших лент: посты, записанные в обход сигналов
+    (bulk_create, update(), SQL), его не сдвигают, а маленькую ленту
+    дешевле посчитать точно.
+    """
+    if counter is not None and counter >= COUNT_CACHE_THRESHOLD:
+        return counter
+
+    key = COUNT_CACHE_KEY.format(feed)
+    count = cache.get(key)
+    if count is not None:
+        return count
+
+    estimate = estimate_count(feed)
+    if estimate is not None and estimate >= COUNT_CACHE_THRESHOLD:
+        cache.set(key, estimate, COUNT_ESTIMATE_TIMEOUT)
+        # Статистика могла устареть: точное число посчитает воркер
+        enqueue('posts.count_feed', feed, key=f'count:{feed}')
+        return estimate
+
+    return recount_feed(feed, queryset)
+
+
+def recount_feed(feed, queryset):
+    """Точный COUNT ленты, большие ленты запоминаются в кэше"""
+    key = COUNT_CACHE_KEY.format(feed)
+    count = queryset.count()
+    if count >= COUNT_CACHE_THRESHOLD:
+        cache.set(key, count, COUNT_CACHE_TIMEOUT)
+    else:
+        # Вместо оценки, если она была
+        cache.delete(key)
+
+    return count
+
+
+def get_request_feed_count(request, feed, queryset, counter=None):
+    """get_feed_count один раз за запрос.
+
+    Размер ленты нужен и валидаторам условного GET, и пагинатору, а
+    маленькие ленты не кэшируются и считались бы дважды.
+    """
+    counts = getattr(request, 'feed_counts', None)
+    if counts is None:
+        counts = request.feed_counts = {}
+    if feed not in counts:
+        counts[feed] = get_feed_count(feed, queryset, counter)
+    return counts[feed]
+
+
+def change_feed_counts(feeds, delta):
+    """Сдвигает закэшированные счётчики лент, холодные ключи не трогает"""
+    for feed in feeds:
+        try:
+            cache.incr(COUNT_CACHE_KEY.format(feed), delta)
+        except ValueError:
+            pass
+
+
+def change_group_posts_count(group_id, delta):
+    """Сдвигает счётчик постов сообщества в текущей транзакции"""
+    if group_id is not None:
+        Group.objects.filter(
+            pk=group_id,
+            posts_count__gte=-delta,
+        ).update(posts_count=F('posts_count') + delta)
+        # Ленты верят счётчику: копия в кэше сообществ должна обновиться
+        groups.invalidate(pk=group_id)
+
+
+def change_author_posts_count(author_id, delta):
+    """Сдвигает счётчик постов автора в текущей транзакции"""
+    updated = Profile.objects.filter(
+        user_id=author_id,
+        posts_count__gte=-delta,
+    ).update(posts_count=F('posts_count') + delta)
+    if not updated and delta > 0:
+        Profile.objects.get_or_create(
+            user_id=author_id,
+            defaults={
+                'posts_count': Post.objects.filter(
+                    author_id=author_id,
+                ).count(),
+            },
+        )
+    authors.invalidate(pk=author_id)
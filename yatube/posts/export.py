@@ -0,0 +1,102 @@
+"""Потоковая выгрузка постов в JSONL или CSV.
+
+Таблица читается пачками по id (keyset), каждая пачка - через
+iterator(), поэтому память не растёт вместе с таблицей. Поля записи
+совпадают с теми, что понимает команда import_posts.
+"""
+import csv
+import json
+import zlib
+
+from .constants import EXPORT_CHUNK_SIZE
+from .models import Post
+
+EXPORT_FIELDS = ('id', 'text', 'pub_date', 'author', 'group', 'image')
+QUERY_FIELDS = (
+    'pk', 'text', 'pub_date', 'author__username', 'group__slug', 'image',
+)
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+GZIP_CONTENT_TYPE = 'application/gzip'
+# wbits=31: поток в формате gzip, а не голый zlib
+GZIP_WBITS = 31
+
+
+def export_queryset(group=None, author=None, since=None, until=None):
+    """Посты для выгрузки с необязательными фильтрами"""
+    queryset = Post.objects.all()
+    if group:
+        queryset = queryset.filter(group__slug=group)
+    if author:
+        queryset = queryset.filter(author__username=author)
+    if since:
+        queryset = queryset.filter(pub_date__gte=since)
+    if until:
+        queryset = queryset.filter(pub_date__lt=until)
+
+    return queryset
+
+
+def iter_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Записи постов по порядку id, пачками без OFFSET"""
+    last_pk = 0
+    while True:
+        rows = queryset.filter(pk__gt=last_pk).order_by('pk').values_list(
+            *QUERY_FIELDS,
+        )[:chunk_size]
+        last_row = None
+        for last_row in rows.iterator(chunk_size=chunk_size):
+            row = dict(zip(EXPORT_FIELDS, last_row))
+            row['pub_date'] = row['pub_date'].isoformat()
+            row['group'] = row['group'] or ''
+            yield row
+        if last_row is None:
+            return
+        last_pk = last_row[0]
+
+
+def render_jsonl(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    """Буфер для csv.writer, который сразу возвращает записанное"""
+
+    def write(self, value):
+        return value
+
+
+def render_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow([row[field] for field in EXPORT_FIELDS])
+
+
+RENDERERS = {
+    'jsonl': render_jsonl,
+    'csv': render_csv,
+}
+
+
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(wbits=GZIP_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_posts(file_format='jsonl', gzip=False, chunk_size=EXPORT_CHUNK_SIZE,
+                 **filters):
+    """Выгрузка постов как поток байтов"""
+    rows = iter_rows(export_queryset(**filters), chunk_size)
+    chunks = (line.encode() for line in RENDERERS[file_format](rows))
+    if gzip:
+        return gzip_stream(chunks)
+
+    return chunks
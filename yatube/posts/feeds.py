@@ -0,0 +1,20 @@
+GLOBAL_FEED = 'all'
+
+
+def group_feed(group_id):
+    """Ключ ленты сообщества"""
+    return f'group:{group_id}'
+
+
+def author_feed(author_id):
+    """Ключ ленты автора"""
+    return f'author:{author_id}'
+
+
+def post_feeds(post):
+    """Ключи всех лент, в которые попадает пост"""
+    feeds = [GLOBAL_FEED, author_feed(post.author_id)]
+    if post.group_id is not None:
+        feeds.append(group_feed(post.group_id))
+
+    return feeds
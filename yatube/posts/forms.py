@@ -14,3 +14,20 @@ class PostForm(forms.ModelForm):
             'group': 'Сообщество к которой относится публикация',
             # 'image': 'Загрузите изображение'
         }
+
+
+class ExportForm(forms.Form):
+    """Параметры выгрузки постов для команды export_posts и вью"""
+
+    format = forms.ChoiceField(
+        choices=(('jsonl', 'JSONL'), ('csv', 'CSV')),
+        required=False,
+    )
+    gzip = forms.BooleanField(required=False)
+    group = forms.SlugField(required=False)
+    author = forms.CharField(required=False, max_length=150)
+    since = forms.DateTimeField(required=False)
+    until = forms.DateTimeField(required=False)
+
+    def clean_format(self):
+        return self.cleaned_data['format'] or 'jsonl'
@@ -0,0 +1,50 @@
+"""Фоновые задачи постов для очереди core.jobs.
+
+Задачи получают id, а данные читают сами на момент выполнения: так
+повторный или запоздавший запуск приводит индекс к текущему состоянию.
+"""
+from core.jobs import task
+from django.contrib.auth import get_user_model
+
+from .counts import recount_feed
+from .feeds import GLOBAL_FEED
+from .models import Group, Post
+from .search import index_posts, reindex_author, reindex_group
+from .thumbnails import field_file, generate_thumbnails
+
+User = get_user_model()
+
+
+@task('posts.index_posts')
+def index_posts_job(post_ids):
+    """Индексирует посты, удалённые - убирает из индекса"""
+    index_posts(post_ids)
+
+
+@task('posts.reindex_group')
+def reindex_group_job(group_id):
+    title = Group.objects.filter(pk=group_id).values_list(
+        'title', flat=True,
+    ).first()
+    if title is not None:
+        reindex_group(group_id, title)
+
+
+@task('posts.reindex_author')
+def reindex_author_job(user_id):
+    user = User.objects.filter(pk=user_id).first()
+    if user is not None:
+        reindex_author(user)
+
+
+@task('posts.generate_thumbnails')
+def generate_thumbnails_job(name):
+    generate_thumbnails(field_file(name))
+
+
+@task('posts.count_feed')
+def count_feed_job(feed):
+    """Заменяет оценку размера ленты точным числом"""
+    # По статистике СУБД оценивается только общая лента
+    if feed == GLOBAL_FEED:
+        recount_feed(feed, Post.objects.all())
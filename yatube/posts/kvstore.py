@@ -0,0 +1,102 @@
+"""Хранилище записей sorl-thumbnail с пакетной загрузкой.
+
+Тег {% thumbnail %} ищет запись о миниатюре в хранилище по одной за раз.
+Для ленты записи всех постов страницы загружаются заранее: одним
+get_many из кэша и одним запросом к БД для тех, что в кэше не нашлись.
+Найденные записи оседают в ограниченном LRU внутри процесса, оттуда их
+и читают теги при рендере. Запись живёт в LRU не дольше
+THUMBNAIL_LRU_TTL секунд: миниатюры удаляет и другой процесс
+(collect_media), а его удаление сбрасывает только общий кэш.
+"""
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE, KVStore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from .constants import THUMBNAIL_LRU_SIZE, THUMBNAIL_LRU_TTL
+
+
+class PrefetchingKVStore(KVStore):
+    """cached_db хранилище с prefetch() и LRU последних записей"""
+
+    # LRU общий для всех экземпляров: sorl создаёт хранилище лениво,
+    # а потоки сервера читают и пишут его параллельно
+    _recent = OrderedDict()
+    _lock = Lock()
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._recent[key] = (time.monotonic() + THUMBNAIL_LRU_TTL, value)
+            self._recent.move_to_end(key)
+            while len(self._recent) > THUMBNAIL_LRU_SIZE:
+                self._recent.popitem(last=False)
+
+    def _recall(self, key):
+        with self._lock:
+            entry = self._recent.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._recent[key]
+                return None
+            self._recent.move_to_end(key)
+            return value
+
+    def _forget(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._recent.pop(key, None)
+
+    def prefetch(self, image_files):
+        """Загружает записи для списка ImageFile пакетно"""
+        keys = {add_prefix(image_file.key) for image_file in image_files}
+        missing = [key for key in keys if self._recall(key) is None]
+        if not missing:
+            return
+
+        cached = self.cache.get_many(missing)
+        missing = [key for key in missing if key not in cached]
+        if missing:
+            stored = dict(
+                KVStoreModel.objects.filter(key__in=missing).values_list(
+                    'key', 'value',
+                )
+            )
+            # Как и _get_raw, запоминаем в кэше и отсутствие записи
+            found = {key: stored.get(key, EMPTY_VALUE) for key in missing}
+            self.cache.set_many(found, settings.THUMBNAIL_CACHE_TIMEOUT)
+            cached.update(found)
+
+        for key, value in cached.items():
+            # Отсутствие записи в LRU не держим: миниатюру может
+            # подготовить другой процесс
+            if value != EMPTY_VALUE:
+                self._remember(key, value)
+
+    def clear(self, delete_thumbnails=False):
+        with self._lock:
+            self._recent.clear()
+        super().clear(delete_thumbnails)
+
+    def _get_raw(self, key):
+        value = self._recall(key)
+        if value is not None:
+            return value
+
+        value = super()._get_raw(key)
+        if value is not None:
+            self._remember(key, value)
+        return value
+
+    def _set_raw(self, key, value):
+        super()._set_raw(key, value)
+        self._remember(key, value)
+
+    def _delete_raw(self, *keys):
+        self._forget(*keys)
+        super()._delete_raw(*keys)
@@ -0,0 +1,154 @@
+"""Кэш сообществ по slug и авторов по username в памяти процесса.
+
+Страницы сообществ и профилей ищут их строку на каждом запросе, а
+меняются эти строки редко. Найденные объекты лежат в ограниченном LRU
+процесса не дольше LOOKUP_CACHE_TTL секунд. Ненайденные slug и username
+тоже запоминаются - в отдельном LRU, чтобы поток 404 не вытеснял
+настоящие записи.
+
+Другие процессы узнают о правке по версиям в общем кэше: сигналы
+меняют версию объекта (по pk) или имени (для ненайденных), а запись в
+LRU годна, пока версия та же, что при её загрузке. Так попадание стоит
+одного cache.get вместо запроса к БД. Большие ленты берут число постов
+из posts_count записи, поэтому смена счётчика тоже меняет версию.
+
+pk найденного объекта известен только после запроса, поэтому версия
+начинается с номера сброса из общего счётчика, как в page_cache. Номер
+снимается до запроса: если версию объекта сменили позже, он мог
+загрузиться старым и в LRU не попадает.
+"""
+import hashlib
+import pickle
+import time
+import uuid
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.http import Http404
+
+from .constants import (LOOKUP_CACHE_SIZE, LOOKUP_CACHE_TTL,
+                        LOOKUP_CLOCK_KEY, LOOKUP_VERSION_KEY)
+from .models import Group
+
+User = get_user_model()
+
+
+class LookupCache:
+    """LRU объектов одной модели по уникальному полю"""
+
+    def __init__(self, name, get_queryset, field):
+        self.name = name
+        self.get_queryset = get_queryset
+        self.field = field
+        self._found = OrderedDict()
+        self._missing = OrderedDict()
+        self._lock = Lock()
+
+    def _version_key(self, kind, value):
+        # slug и username могут быть не ASCII и длинными - в ключ кэша
+        # идёт их хэш
+        digest = hashlib.md5(str(value).encode()).hexdigest()
+        return LOOKUP_VERSION_KEY.format(self.name, f'{kind}:{digest}')
+
+    def _remember(self, entries, key, entry):
+        with self._lock:
+            entries[key] = entry
+            entries.move_to_end(key)
+            while len(entries) > LOOKUP_CACHE_SIZE:
+                entries.popitem(last=False)
+
+    def _recall(self, entries, key):
+        with self._lock:
+            entry = entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del entries[key]
+                return None
+            entries.move_to_end(key)
+            return entry
+
+    def get_or_404(self, value):
+        """Объект с полем field == value или Http404"""
+        if not settings.POSTS_LOOKUP_CACHE_ENABLED:
+            return self._load(value)
+
+        found = self._recall(self._found, value)
+        if found is not None:
+            _, pk, version, data = found
+            if cache.get(self._version_key('pk', pk)) == version:
+                return pickle.loads(data)
+        missing = self._recall(self._missing, value)
+        # Версию читаем до запроса: создание объекта во время загрузки
+        # сменит её, и запомненный промах сразу устареет
+        name_version = cache.get(self._version_key('name', value))
+        if missing is not None and missing[1] == name_version:
+            raise Http404
+
+        expires = time.monotonic() + LOOKUP_CACHE_TTL
+        started = cache.get(LOOKUP_CLOCK_KEY, 0)
+        try:
+            obj = self._load(value)
+        except Http404:
+            self._remember(
+                self._missing, value, (expires, name_version),
+            )
+            raise
+        version = cache.get(self._version_key('pk', obj.pk))
+        if version is not None and _version_clock(version) > started:
+            return obj
+        self._remember(
+            self._found, value, (expires, obj.pk, version, pickle.dumps(obj)),
+        )
+        return obj
+
+    def _load(self, value):
+        obj = self.get_queryset().filter(**{self.field: value}).first()
+        if obj is None:
+            raise Http404(f'Не найдено: {value}')
+        return obj
+
+    def _bump(self, keys):
+        cache.add(LOOKUP_CLOCK_KEY, 0, None)
+        try:
+            clock = cache.incr(LOOKUP_CLOCK_KEY)
+        except ValueError:
+            clock = 0
+        version = f'{clock}:{uuid.uuid4().hex}'
+        cache.set_many({key: version for key in keys}, None)
+
+    def invalidate(self, pk=None, value=None):
+        """Сбрасывает записи объекта во всех процессах.
+
+        Версии меняются сразу и ещё раз после коммита: иначе параллельный
+        запрос мог бы успеть закэшировать строку до коммита.
+        """
+        keys = []
+        if pk is not None:
+            keys.append(self._version_key('pk', pk))
+        if value is not None:
+            keys.append(self._version_key('name', value))
+        self._bump(keys)
+        transaction.on_commit(lambda: self._bump(keys))
+
+    def clear(self):
+        with self._lock:
+            self._found.clear()
+            self._missing.clear()
+
+
+def _version_clock(version):
+    clock, separator, _ = version.partition(':')
+    return int(clock) if separator else 0
+
+
+groups = LookupCache('group', Group.objects.all, 'slug')
+authors = LookupCache(
+    'user',
+    lambda: User.objects.select_related('profile'),
+    'username',
+)
@@ -0,0 +1,123 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from posts import benchmark
+
+MODES = {
+    'inprocess': (benchmark.ClientDriver,),
+    'server': (benchmark.ServerDriver,),
+    'all': (benchmark.ClientDriver, benchmark.ServerDriver),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет p50/p95/p99, число запросов к БД и память для страниц '
+        'posts.urls. С --seed сначала заполняет базу тестовыми данными. '
+        '--seed и POST-сценарии пишут в базу, поэтому работают только с '
+        '--scratch на отдельной базе'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed',
+            action='store_true',
+            help='Заполнить базу перед прогоном',
+        )
+        parser.add_argument(
+            '--scratch',
+            action='store_true',
+            help='База отдельная, в неё можно писать: разрешает --seed и '
+                 'POST-сценарии',
+        )
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--authors', type=int, default=100)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument(
+            '--random-seed',
+            type=int,
+            default=0,
+            help='Зерно генератора: одинаковое зерно - одинаковые данные',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Сколько процессов генерируют данные для --seed',
+        )
+        parser.add_argument(
+            '--mode',
+            choices=MODES,
+            default='all',
+            help='В процессе, через WSGI-сервер или оба варианта',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=50,
+            help='Сколько замеров на каждый сценарий',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=5,
+            help='Сколько запросов сделать до замеров',
+        )
+        parser.add_argument('--output', help='Куда записать JSON с замерами')
+        parser.add_argument(
+            '--baseline',
+            help='JSON прошлого прогона для сравнения',
+        )
+
+    def handle(self, *args, **options):
+        if options['seed'] and not options['scratch']:
+            raise CommandError(
+                '--seed заполняет текущую базу: запустите на отдельной базе '
+                'с --scratch',
+            )
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as stream:
+                baseline = json.load(stream)
+        if options['seed']:
+            benchmark.seed(
+                options['posts'],
+                options['authors'],
+                options['groups'],
+                options['random_seed'],
+                workers=options['workers'],
+                stdout=self.stdout,
+            )
+
+        author = benchmark.most_active_author()
+        if author is None:
+            raise CommandError('В базе нет пользователей, запустите с --seed')
+        scenarios = benchmark.scenarios(author)
+        if not options['scratch']:
+            scenarios = [
+                scenario for scenario in scenarios if scenario.method == 'GET'
+            ]
+            self.stdout.write('POST-сценарии пропущены: нужен --scratch')
+        # Метрики нужны в каждом ответе, лог медленных запросов - нет
+        with override_settings(
+            REQUEST_METRICS_SAMPLE_RATE=1,
+            REQUEST_METRICS_PUBLIC=True,
+            REQUEST_METRICS_SLOW_MS=float('inf'),
+        ):
+            report = benchmark.run(
+                [driver(author) for driver in MODES[options['mode']]],
+                scenarios,
+                options['requests'],
+                options['warmup'],
+                stdout=self.stdout,
+            )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                json.dump(report, stream, ensure_ascii=False, indent=2)
+            self.stdout.write(f'Замеры записаны в {options["output"]}')
+        if baseline is not None:
+            self.stdout.write('Сравнение с прошлым прогоном:')
+            for row in benchmark.compare(report, baseline):
+                self.stdout.write(row)
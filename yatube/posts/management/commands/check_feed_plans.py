@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from posts.constants import POSTS_LIMIT
+from posts.models import Post
+from posts.paginators import NEXT, PREVIOUS, KeysetPaginator
+
+# Признак сортировки во временной структуре в плане запроса
+SORT_MARKERS = {
+    'sqlite': 'USE TEMP B-TREE',
+    'postgresql': 'Sort',
+}
+
+
+def feed_querysets():
+    """Запросы лент в том виде, в каком их строят вью-функции"""
+    feeds = {
+        'index': Post.objects.select_related('group', 'author'),
+        'group_list': Post.objects.filter(group_id=1).select_related(
+            'group', 'author',
+        ),
+        'profile': Post.objects.filter(author_id=1),
+    }
+    now = timezone.now()
+    for name, post_list in feeds.items():
+        paginator = KeysetPaginator(post_list, POSTS_LIMIT)
+        yield name, paginator.object_list[:POSTS_LIMIT]
+        yield (
+            f'{name} (курсор вперёд)',
+            paginator.seek(NEXT, now, 1)[:POSTS_LIMIT + 1],
+        )
+        yield (
+            f'{name} (курсор назад)',
+            paginator.seek(PREVIOUS, now, 1)[:POSTS_LIMIT + 1],
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Выводит план запросов лент (EXPLAIN QUERY PLAN) и завершается '
+        'ошибкой, если какой-то из них сортирует посты без индекса'
+    )
+
+    def handle(self, *args, **options):
+        marker = SORT_MARKERS.get(connection.vendor)
+        if marker is None:
+            raise CommandError(
+                f'Проверка планов для {connection.vendor} не поддерживается'
+            )
+
+        failed = []
+        for name, queryset in feed_querysets():
+            plan = queryset.explain()
+            self.stdout.write(f'{name}:\n{plan}\n')
+            if marker in plan:
+                failed.append(name)
+
+        if failed:
+            raise CommandError(
+                'Сортировка без индекса в запросах: ' + ', '.join(failed)
+            )
+        self.stdout.write(self.style.SUCCESS('Все ленты читаются по индексу'))
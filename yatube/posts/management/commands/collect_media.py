@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from posts.constants import MEDIA_GC_GRACE
+from posts.media import collect_garbage, collect_orphans, recount_references
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет картинки постов, на которые больше не ссылается ни один '
+        'пост, вместе с их миниатюрами'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recount',
+            action='store_true',
+            help='Сначала пересчитать ссылки по постам',
+        )
+        parser.add_argument(
+            '--orphans',
+            action='store_true',
+            help='Ещё обойти хранилище и удалить файлы без записи о ссылках',
+        )
+        parser.add_argument(
+            '--grace',
+            type=int,
+            default=MEDIA_GC_GRACE,
+            help='Не трогать файлы, которые менялись за столько секунд',
+        )
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            files = recount_references()
+            self.stdout.write(f'Файлов с картинками постов: {files}')
+        removed = collect_garbage(options['grace'])
+        if options['orphans']:
+            removed += collect_orphans(options['grace'])
+        self.stdout.write(self.style.SUCCESS(f'Удалено файлов: {removed}'))
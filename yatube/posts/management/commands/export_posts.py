@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.constants import EXPORT_CHUNK_SIZE
+from posts.export import export_posts
+from posts.forms import ExportForm
+
+
+class Command(BaseCommand):
+    help = 'Потоково выгружает посты в JSONL или CSV, при желании в gzip'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            help='Файл для выгрузки, по умолчанию - stdout',
+        )
+        parser.add_argument('--format', default='jsonl', help='jsonl или csv')
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжать выгрузку gzip',
+        )
+        parser.add_argument('--group', help='slug сообщества')
+        parser.add_argument('--author', help='username автора')
+        parser.add_argument('--since', help='Посты не раньше этой даты')
+        parser.add_argument('--until', help='Посты раньше этой даты')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help='Сколько строк читать из БД за запрос',
+        )
+
+    def handle(self, *args, **options):
+        form = ExportForm(options)
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+
+        params = form.cleaned_data
+        chunks = export_posts(
+            file_format=params['format'],
+            gzip=params['gzip'],
+            chunk_size=options['chunk_size'],
+            group=params['group'],
+            author=params['author'],
+            since=params['since'],
+            until=params['until'],
+        )
+        if options['output'] is None:
+            # Байты пишем в поток под self.stdout, чтобы работал
+            # call_command(stdout=...).
+            stream = self.stdout._out
+            self.write(getattr(stream, 'buffer', stream), chunks)
+            return
+        with open(options['output'], 'wb') as output:
+            self.write(output, chunks)
+
+    def write(self, output, chunks):
+        for chunk in chunks:
+            output.write(chunk)
+        output.flush()
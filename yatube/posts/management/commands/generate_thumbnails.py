@@ -0,0 +1,68 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.constants import THUMBNAIL_WORKERS
+from posts.models import Post
+from posts.thumbnails import generate_thumbnails
+
+CHUNK_SIZE = 500
+
+
+def image_chunks(chunk_size):
+    """Картинки постов по порядку id, пачками"""
+    last_pk = 0
+    while True:
+        chunk = list(
+            Post.objects.exclude(image='').filter(pk__gt=last_pk).order_by(
+                'pk',
+            ).only('pk', 'image')[:chunk_size]
+        )
+        if not chunk:
+            return
+        yield [post.image for post in chunk]
+        last_pk = chunk[-1].pk
+
+
+def _generate(image):
+    try:
+        generate_thumbnails(image)
+        return None
+    except Exception as error:
+        return f'{image}: {error}'
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Готовит миниатюры для картинок всех постов в несколько потоков'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=THUMBNAIL_WORKERS,
+            help='Количество потоков',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Сколько постов читать из БД за запрос',
+        )
+
+    def handle(self, *args, **options):
+        done = failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            for images in image_chunks(options['chunk_size']):
+                for error in executor.map(_generate, images):
+                    if error is None:
+                        done += 1
+                    else:
+                        failed += 1
+                        self.stderr.write(error)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Миниатюры готовы для {done} картинок, ошибок: {failed}'
+        ))
@@ -0,0 +1,241 @@
+import csv
+import json
+import os
+import sys
+import time
+from collections import Counter
+from functools import partial
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from posts.bulk import feeds_imported, source_pub_date
+from posts.counts import change_author_posts_count, change_group_posts_count
+from posts.feeds import post_feeds
+from posts.media import recount_references
+from posts.models import Group, ImportCheckpoint, Post
+from posts.search import index_posts
+
+User = get_user_model()
+FORMATS = ('jsonl', 'csv')
+CHUNK_SIZE = 10000
+BATCH_SIZE = 1000
+
+
+def read_records(stream, file_format):
+    """Записи источника по одной: словари из CSV или строки JSONL"""
+    if file_format == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            yield line
+
+
+def parse_record(record):
+    if isinstance(record, str):
+        try:
+            record = json.loads(record)
+        except ValueError as error:
+            raise ValidationError(f'Некорректный JSON: {error}')
+    if not isinstance(record, dict):
+        raise ValidationError('Запись должна быть объектом')
+
+    return record
+
+
+def chunked(records, size):
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает посты из JSONL или CSV пачками. Поля записи: text, '
+        'author (username), group (slug), pub_date, image. После сбоя '
+        'повторный запуск продолжит с последней сохранённой пачки'
+    )
+    stealth_options = ('stdin',)
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Файл с постами, "-" - читать из stdin',
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Формат источника, по умолчанию - по расширению файла',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Сколько записей загружать за транзакцию',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько постов вставлять одним INSERT',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Имя источника для продолжения, по умолчанию - путь к файлу',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Загрузить источник с начала, забыв сохранённую позицию',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'jsonl'
+        )
+        source = options['checkpoint'] or (
+            'stdin' if path == '-' else os.path.abspath(path)
+        )
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(source=source)
+        if options['restart']:
+            checkpoint.position = 0
+            checkpoint.save()
+        elif checkpoint.position:
+            self.stdout.write(
+                f'Продолжаем с записи {checkpoint.position + 1}'
+            )
+
+        self.authors = {}
+        self.groups = {}
+        if path == '-':
+            stream = options.get('stdin', sys.stdin)
+            self.import_stream(stream, file_format, checkpoint, options)
+            return
+        with open(path, encoding='utf-8', newline='') as stream:
+            self.import_stream(stream, file_format, checkpoint, options)
+
+    def import_stream(self, stream, file_format, checkpoint, options):
+        records = islice(
+            read_records(stream, file_format),
+            checkpoint.position,
+            None,
+        )
+        started = time.monotonic()
+        created = errors = 0
+        with source_pub_date():
+            for chunk in chunked(records, options['chunk_size']):
+                posts, failed = self.build_posts(chunk, checkpoint.position)
+                with transaction.atomic():
+                    last_pk = Post.objects.aggregate(Max('pk'))['pk__max']
+                    Post.objects.bulk_create(
+                        posts,
+                        batch_size=options['batch_size'],
+                    )
+                    self.update_counters(posts)
+                    # bulk_create в SQLite не возвращает id новых постов
+                    index_posts(Post.objects.filter(
+                        pk__gt=last_pk or 0,
+                    ).values_list('pk', flat=True))
+                    checkpoint.position += len(chunk)
+                    checkpoint.save()
+                created += len(posts)
+                errors += failed
+                rate = created / max(time.monotonic() - started, 1e-6)
+                self.stdout.write(
+                    f'Записей обработано: {checkpoint.position}, '
+                    f'загружено постов: {created}, ошибок: {errors}, '
+                    f'{rate:.0f} постов/с'
+                )
+
+        if created:
+            # bulk_create обходит сигналы, считающие ссылки на картинки
+            recount_references()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено постов: {created} за {elapsed:.1f} с, '
+            f'ошибок: {errors}'
+        ))
+
+    def resolve(self, records):
+        """Дополняет карты авторов и сообществ одним запросом на пачку"""
+        usernames = {record.get('author') for record in records}
+        usernames -= set(self.authors)
+        self.authors.update(
+            User.objects.filter(username__in=usernames).values_list(
+                'username', 'pk',
+            )
+        )
+        slugs = {record.get('group') for record in records}
+        slugs -= set(self.groups)
+        self.groups.update(
+            Group.objects.filter(slug__in=slugs).values_list('slug', 'pk')
+        )
+
+    def build_posts(self, chunk, position):
+        records = []
+        failed = 0
+        for number, record in enumerate(chunk, start=position + 1):
+            try:
+                records.append((number, parse_record(record)))
+            except ValidationError as error:
+                self.report(number, error)
+                failed += 1
+        self.resolve([record for _, record in records])
+
+        posts = []
+        for number, record in records:
+            try:
+                posts.append(self.build_post(record))
+            except ValidationError as error:
+                self.report(number, error)
+                failed += 1
+
+        return posts, failed
+
+    def build_post(self, record):
+        author = record.get('author')
+        if author not in self.authors:
+            raise ValidationError(f'Неизвестный автор: {author}')
+        group = record.get('group') or None
+        if group is not None and group not in self.groups:
+            raise ValidationError(f'Неизвестное сообщество: {group}')
+
+        post = Post(
+            text=record.get('text') or '',
+            author_id=self.authors[author],
+            group_id=self.groups.get(group),
+            pub_date=record.get('pub_date') or None,
+            image=record.get('image') or '',
+        )
+        # Автора и сообщество уже нашли, остальное проверяют валидаторы
+        post.clean_fields(exclude=('author', 'group'))
+        if post.pub_date is None:
+            post.pub_date = timezone.now()
+        elif timezone.is_naive(post.pub_date):
+            post.pub_date = timezone.make_aware(post.pub_date)
+
+        return post
+
+    def update_counters(self, posts):
+        """bulk_create обходит сигналы - счётчики правим сами"""
+        groups = Counter(post.group_id for post in posts)
+        for group_id, total in groups.items():
+            change_group_posts_count(group_id, total)
+        authors = Counter(post.author_id for post in posts)
+        for author_id, total in authors.items():
+            change_author_posts_count(author_id, total)
+        feeds = Counter(feed for post in posts for feed in post_feeds(post))
+        transaction.on_commit(partial(feeds_imported, feeds))
+
+    def report(self, number, error):
+        self.stderr.write(f'Запись {number}: {"; ".join(error.messages)}')
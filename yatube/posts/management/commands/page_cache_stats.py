@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts.page_cache import HIT, MISS, get_stats
+
+CACHED_VIEWS = ('index', 'group_posts', 'profile', 'post_detail')
+
+
+class Command(BaseCommand):
+    help = 'Показывает долю попаданий в кэш страниц по вью-функциям'
+
+    def handle(self, *args, **options):
+        for view_name, stats in get_stats(CACHED_VIEWS).items():
+            total = stats[HIT] + stats[MISS]
+            ratio = stats[HIT] / total if total else 0
+            self.stdout.write(
+                f'{view_name}: попаданий {stats[HIT]}, '
+                f'промахов {stats[MISS]}, доля попаданий {ratio:.1%}'
+            )
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.constants import SEARCH_INDEX_BATCH
+from posts.models import Post
+from posts.search import clear_index, index_posts, is_fts_available
+
+from .recount_posts import batches
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново строит поисковый индекс постов. Нужна после массовой '
+        'записи в обход сигналов: update(), raw SQL'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=SEARCH_INDEX_BATCH,
+            help='Сколько постов индексировать за один запрос',
+        )
+
+    def handle(self, *args, **options):
+        if not is_fts_available():
+            self.stdout.write('Поисковый индекс есть только в SQLite')
+            return
+
+        total = 0
+        # Одна транзакция: поиск не увидит наполовину пустой индекс
+        with transaction.atomic():
+            clear_index()
+            for pks in batches(Post.objects.all(), options['batch_size']):
+                index_posts(pks)
+                total += len(pks)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано постов: {total}'
+        ))
@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from posts.feeds import GLOBAL_FEED, author_feed, group_feed
+from posts.models import Group, Post
+from posts.timeline import build_timeline
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Заново собирает предрассчитанные ленты постов в кэше'
+
+    def handle(self, *args, **options):
+        build_timeline(GLOBAL_FEED, Post.objects.all())
+        total = 1
+        for pk in Group.objects.values_list('pk', flat=True).iterator():
+            build_timeline(group_feed(pk), Post.objects.filter(group_id=pk))
+            total += 1
+        authors = User.objects.filter(posts__isnull=False).distinct()
+        for pk in authors.values_list('pk', flat=True).iterator():
+            build_timeline(author_feed(pk), Post.objects.filter(author_id=pk))
+            total += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Собрано лент: {total}'))
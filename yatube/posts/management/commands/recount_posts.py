@@ -0,0 +1,96 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from posts import lookups
+from posts.models import Group, Post
+from users.models import Profile
+
+User = get_user_model()
+BATCH_SIZE = 1000
+
+
+def batches(queryset, batch_size):
+    """Нарезает id из queryset на пачки, не загружая их все в память"""
+    last_pk = 0
+    while True:
+        pks = list(
+            queryset.filter(pk__gt=last_pk).order_by('pk').values_list(
+                'pk', flat=True,
+            )[:batch_size]
+        )
+        if not pks:
+            return
+        yield pks
+        last_pk = pks[-1]
+
+
+def count_posts_by(field, pks):
+    """Количество постов для каждого значения поля из пачки"""
+    return dict(
+        Post.objects.filter(**{f'{field}__in': pks}).order_by().values(
+            field,
+        ).annotate(total=Count('pk')).values_list(field, 'total')
+    )
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов у сообществ и авторов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько сообществ или авторов пересчитывать за транзакцию',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        groups = self.recount_groups(batch_size)
+        authors = self.recount_authors(batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано сообществ: {groups}, авторов: {authors}'
+        ))
+
+    def recount_groups(self, batch_size):
+        total = 0
+        for pks in batches(Group.objects.all(), batch_size):
+            with transaction.atomic():
+                counts = count_posts_by('group', pks)
+                groups = list(
+                    Group.objects.select_for_update().filter(pk__in=pks)
+                )
+                for group in groups:
+                    group.posts_count = counts.get(group.pk, 0)
+                Group.objects.bulk_update(groups, ('posts_count',))
+                for pk in pks:
+                    lookups.groups.invalidate(pk=pk)
+            total += len(pks)
+
+        return total
+
+    def recount_authors(self, batch_size):
+        total = 0
+        for pks in batches(User.objects.all(), batch_size):
+            with transaction.atomic():
+                counts = count_posts_by('author', pks)
+                profiles = list(
+                    Profile.objects.select_for_update().filter(
+                        user_id__in=pks,
+                    )
+                )
+                for profile in profiles:
+                    profile.posts_count = counts.get(profile.user_id, 0)
+                Profile.objects.bulk_update(profiles, ('posts_count',))
+                missing = set(pks) - {profile.user_id for profile in profiles}
+                Profile.objects.bulk_create(
+                    Profile(user_id=pk, posts_count=counts.get(pk, 0))
+                    for pk in missing
+                )
+                for pk in pks:
+                    lookups.authors.invalidate(pk=pk)
+            total += len(pks)
+
+        return total
@@ -0,0 +1,308 @@
+import io
+import os
+import random
+import time
+from collections import Counter
+from datetime import timedelta
+from multiprocessing import Pool
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+from PIL import Image
+
+from posts import seeding
+from posts.bulk import feeds_imported
+from posts.feeds import GLOBAL_FEED
+from posts.media import recount_references
+from posts.models import Group, Post
+from posts.search import index_new_posts
+from users.models import Profile
+
+User = get_user_model()
+BATCH_SIZE = 10000
+IMAGE_SIZE = (960, 640)
+
+
+def fast_writes():
+    """Сгенерированные данные не жалко: SQLite не ждёт fsync на пачках"""
+    # Внутри транзакции (например, в тестах) SQLite прагму не меняет
+    if connection.vendor == 'sqlite' and not connection.in_atomic_block:
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous = OFF')
+
+
+def generated(pool, tasks, window):
+    """Пачки от воркеров по порядку, не больше window наперёд.
+
+    Иначе при медленной вставке все сгенерированные строки копились бы
+    в памяти родителя.
+    """
+    for start in range(0, len(tasks), window):
+        yield from pool.imap(seeding.generate_posts,
+                             tasks[start:start + window])
+
+
+def next_id(model):
+    return (model.objects.aggregate(Max('pk'))['pk__max'] or 0) + 1
+
+
+def insert_rows(model, fields, rows):
+    """Вставляет строки одним executemany, в обход ORM и сигналов"""
+    columns = ', '.join(
+        connection.ops.quote_name(model._meta.get_field(name).column)
+        for name in fields
+    )
+    placeholders = ', '.join(['%s'] * len(fields))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {connection.ops.quote_name(model._meta.db_table)} '
+            f'({columns}) VALUES ({placeholders})',
+            rows,
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Быстро заполняет базу пользователями, сообществами и постами: '
+        'активность авторов по закону Ципфа, сообщества разного размера, '
+        'часть постов с картинками. Строки генерируют процессы-воркеры, '
+        'в базу они пишутся пачками через executemany'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--groups', type=int, default=100)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument(
+            '--image-share',
+            type=float,
+            default=0.1,
+            help='Доля постов с картинкой',
+        )
+        parser.add_argument(
+            '--images',
+            type=int,
+            default=20,
+            help='Сколько разных картинок сгенерировать для постов',
+        )
+        parser.add_argument(
+            '--no-group-share',
+            type=float,
+            default=0.3,
+            help='Доля постов без сообщества',
+        )
+        parser.add_argument(
+            '--zipf',
+            type=float,
+            default=1.1,
+            help='Показатель закона Ципфа для активности авторов',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='За сколько последних дней распределить посты',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Сколько процессов генерируют строки',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько строк вставлять за транзакцию',
+        )
+        parser.add_argument(
+            '--random-seed',
+            type=int,
+            default=0,
+            help='Зерно генератора: одинаковое зерно - одинаковые данные',
+        )
+
+    def handle(self, *args, **options):
+        if options['posts'] and not options['users']:
+            raise CommandError('Постам нужны авторы: задайте --users')
+        started = time.monotonic()
+        fast_writes()
+
+        author_ids = self.create_users(options)
+        group_ids = self.create_groups(options)
+        images = self.create_images(options)
+        authors, groups = self.create_posts(
+            options, author_ids, group_ids, images,
+        )
+        self.update_counters(author_ids, authors, groups, options)
+        if images:
+            # Посты вставлены в обход сигналов, считающих ссылки на файлы
+            recount_references()
+        if connection.vendor == 'sqlite':
+            # Оценки размера лент (posts.counts) берутся из статистики
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        if options['posts']:
+            feeds_imported({GLOBAL_FEED: options['posts']})
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей: {len(author_ids)}, сообществ: '
+            f'{len(group_ids)}, постов: {options["posts"]} '
+            f'за {elapsed:.1f} с'
+        ))
+
+    def create_users(self, options):
+        first_id = next_id(User)
+        ids = range(first_id, first_id + options['users'])
+        first_names, last_names = seeding.names(options['random_seed'])
+        rnd = random.Random(options['random_seed'])
+        # Войти под сгенерированными пользователями нельзя
+        password = make_password(None)
+        now = timezone.now()
+        fields = (
+            'id', 'password', 'is_superuser', 'username', 'first_name',
+            'last_name', 'email', 'is_staff', 'is_active', 'date_joined',
+        )
+        for start in range(0, len(ids), options['batch_size']):
+            with transaction.atomic():
+                insert_rows(User, fields, [
+                    (
+                        pk, password, False, f'seed_{pk}',
+                        rnd.choice(first_names), rnd.choice(last_names),
+                        f'seed_{pk}@example.com', False, True,
+                        connection.ops.adapt_datetimefield_value(now),
+                    )
+                    for pk in ids[start:start + options['batch_size']]
+                ])
+
+        return ids
+
+    def create_groups(self, options):
+        first_id = next_id(Group)
+        ids = range(first_id, first_id + options['groups'])
+        fake = seeding.faker(options['random_seed'])
+        with transaction.atomic():
+            insert_rows(
+                Group,
+                ('id', 'title', 'slug', 'description', 'posts_count'),
+                [
+                    (
+                        pk, fake.catch_phrase()[:200], f'seed-{pk}',
+                        fake.paragraph(), 0,
+                    )
+                    for pk in ids
+                ],
+            )
+
+        return ids
+
+    def create_images(self, options):
+        """Несколько картинок в хранилище, которые делят между собой посты"""
+        if not options['posts'] or not options['image_share']:
+            return []
+        field = Post._meta.get_field('image')
+        rnd = random.Random(options['random_seed'])
+        names = []
+        for number in range(options['images']):
+            color = tuple(rnd.randrange(256) for _ in range(3))
+            content = io.BytesIO()
+            Image.new('RGB', IMAGE_SIZE, color).save(content, 'JPEG')
+            names.append(field.storage.save(
+                field.generate_filename(None, f'seed_{number}.jpg'),
+                ContentFile(content.getvalue()),
+            ))
+
+        return names
+
+    def create_posts(self, options, author_ids, group_ids, images):
+        """Вставляет посты, возвращает число постов у авторов и сообществ"""
+        total = options['posts']
+        batch_size = options['batch_size']
+        now = timezone.now()
+        worker_options = {
+            'random_seed': options['random_seed'],
+            'first_id': next_id(Post),
+            'total': total,
+            'since': (now - timedelta(days=options['days'])).timestamp(),
+            'until': now.timestamp(),
+            'author_ids': author_ids,
+            'group_ids': group_ids,
+            'zipf': options['zipf'],
+            'no_group': options['no_group_share'],
+            'images': images,
+            'image_share': options['image_share'],
+        }
+        tasks = [
+            (offset, min(batch_size, total - offset))
+            for offset in range(0, total, batch_size)
+        ]
+        authors = Counter()
+        groups = Counter()
+        adapt = connection.ops.adapt_datetimefield_value
+        fields = (
+            'id', 'text', 'pub_date', 'updated', 'author', 'group', 'image',
+        )
+        workers = max(options['workers'], 1)
+        pool = None
+        if workers == 1:
+            seeding.init_worker(worker_options)
+            batches = map(seeding.generate_posts, tasks)
+        else:
+            # Соединение с базой в дочерние процессы не наследуем
+            connections.close_all()
+            pool = Pool(
+                workers,
+                initializer=seeding.init_worker,
+                initargs=(worker_options,),
+            )
+            batches = generated(pool, tasks, workers * 4)
+            fast_writes()
+
+        created = 0
+        started = time.monotonic()
+        try:
+            for rows in batches:
+                with transaction.atomic():
+                    insert_rows(Post, fields, [
+                        # updated совпадает с pub_date: постов не правили
+                        (pk, text, *[adapt(pub_date)] * 2, author, group,
+                         image)
+                        for pk, text, pub_date, author, group, image in rows
+                    ])
+                    index_new_posts(rows[0][0], rows[-1][0])
+                authors.update(row[3] for row in rows)
+                groups.update(row[4] for row in rows if row[4] is not None)
+                created += len(rows)
+                rate = created / max(time.monotonic() - started, 1e-6)
+                self.stdout.write(
+                    f'Постов: {created} из {total}, {rate:.0f} постов/с'
+                )
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        return authors, groups
+
+    def update_counters(self, author_ids, authors, groups, options):
+        """Счётчики сразу верные: посчитаны по сгенерированным строкам"""
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(
+                f'UPDATE {Group._meta.db_table} SET posts_count = %s '
+                f'WHERE id = %s',
+                [(total, pk) for pk, total in groups.items()],
+            )
+        # Профили обычно заводит сигнал на создание пользователя
+        batch_size = options['batch_size']
+        for start in range(0, len(author_ids), batch_size):
+            with transaction.atomic():
+                insert_rows(Profile, ('user', 'posts_count'), [
+                    (pk, authors[pk])
+                    for pk in author_ids[start:start + batch_size]
+                ])
@@ -0,0 +1,146 @@
+"""Ссылки на картинки постов и удаление ненужных файлов.
+
+Хранилище posts.storage кладёт одинаковые загрузки в один файл, поэтому
+удалять файл вместе с постом нельзя. Сигналы постов считают ссылки в
+MediaFile в той же транзакции, что и сам пост. Файл без ссылок удаляет
+collect_media, но не раньше MEDIA_GC_GRACE: за это время ту же картинку
+может снова загрузить другой пост. Повторная загрузка обновляет время
+записи и файла (HashedStorage), и отсчёт начинается заново.
+"""
+import posixpath
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from sorl.thumbnail import delete
+
+from .constants import MEDIA_BATCH_SIZE, MEDIA_GC_GRACE
+from .models import MediaFile, Post
+from .storage import HASHED_NAME
+from .thumbnails import field_file
+
+
+def acquire(name):
+    """Добавляет ссылку на файл"""
+    now = timezone.now()
+    referenced = MediaFile.objects.filter(name=name)
+    if referenced.update(references=F('references') + 1, updated=now):
+        return
+    try:
+        with transaction.atomic():
+            MediaFile.objects.create(name=name, references=1)
+    except IntegrityError:
+        # Запись одновременно завёл другой пост
+        referenced.update(references=F('references') + 1, updated=now)
+
+
+def release(name):
+    """Убирает ссылку на файл"""
+    MediaFile.objects.filter(name=name, references__gt=0).update(
+        references=F('references') - 1,
+        updated=timezone.now(),
+    )
+
+
+def set_references(counts):
+    """Записывает число ссылок {путь: постов}, у остальных файлов - 0"""
+    with transaction.atomic():
+        MediaFile.objects.update(references=0)
+        known = MediaFile.objects.in_bulk(list(counts), field_name='name')
+        for name, media in known.items():
+            media.references = counts[name]
+        MediaFile.objects.bulk_update(
+            known.values(), ['references'], batch_size=MEDIA_BATCH_SIZE,
+        )
+        MediaFile.objects.bulk_create(
+            (
+                MediaFile(name=name, references=total)
+                for name, total in counts.items() if name not in known
+            ),
+            batch_size=MEDIA_BATCH_SIZE,
+        )
+
+
+def recount_references():
+    """Пересчитывает ссылки по постам, возвращает число файлов"""
+    # Подсчёт и запись в одной транзакции: пост, созданный между ними,
+    # иначе потерял бы свою ссылку
+    with transaction.atomic():
+        counts = dict(
+            Post.objects.exclude(image='').values_list('image').annotate(
+                Count('pk'),
+            ).order_by()
+        )
+        set_references(counts)
+    return len(counts)
+
+
+def _remove(name):
+    # sorl удалит миниатюры, их записи и сам файл
+    delete(field_file(name))
+
+
+def _modified_since(storage, name, cutoff):
+    try:
+        return storage.get_modified_time(name) >= cutoff
+    except FileNotFoundError:
+        return False
+
+
+def collect_garbage(grace=MEDIA_GC_GRACE):
+    """Удаляет файлы без ссылок старше grace секунд, возвращает их число"""
+    cutoff = timezone.now() - timedelta(seconds=grace)
+    unreferenced = MediaFile.objects.filter(references=0, updated__lt=cutoff)
+    removed = 0
+    storage = Post._meta.get_field('image').storage
+    for name in list(unreferenced.values_list('name', flat=True)):
+        # На файл могли сослаться, пока шёл обход
+        if not unreferenced.filter(name=name).delete()[0]:
+            continue
+        # Ту же картинку могли только что загрузить: storage обновил
+        # время файла, а ссылку пост возьмёт при сохранении
+        if _modified_since(storage, name, cutoff):
+            continue
+        _remove(name)
+        removed += 1
+
+    return removed
+
+
+def _stored_names(storage, directory, depth=2):
+    directories, files = storage.listdir(directory)
+    if depth:
+        for child in directories:
+            yield from _stored_names(
+                storage, posixpath.join(directory, child), depth - 1,
+            )
+    else:
+        for name in files:
+            yield posixpath.join(directory, name)
+
+
+def collect_orphans(grace=MEDIA_GC_GRACE):
+    """Удаляет файлы по хэшу, о которых не знают ни посты, ни MediaFile.
+
+    Такие остаются от загрузок, пост которых не сохранился. Обходит всё
+    хранилище, поэтому запускается редко. Возвращает число файлов.
+    """
+    field = Post._meta.get_field('image')
+    storage = field.storage
+    directory = field.upload_to.rstrip('/')
+    if not storage.exists(directory):
+        return 0
+    cutoff = timezone.now() - timedelta(seconds=grace)
+    removed = 0
+    for name in _stored_names(storage, directory):
+        if (
+            HASHED_NAME.search(name)
+            and storage.get_modified_time(name) < cutoff
+            and not MediaFile.objects.filter(name=name).exists()
+            and not Post.objects.filter(image=name).exists()
+        ):
+            _remove(name)
+            removed += 1
+
+    return removed
@@ -0,0 +1,38 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:10
+
+from django.db import migrations
+
+CREATE_SQL = [
+    "CREATE VIRTUAL TABLE posts_post_fts USING fts5("
+    "text, group_title, author_name, tokenize = 'unicode61')",
+    "INSERT INTO posts_post_fts (rowid, text, group_title, author_name) "
+    "SELECT p.id, p.text, COALESCE(g.title, ''), "
+    "u.username || ' ' || u.first_name || ' ' || u.last_name "
+    "FROM posts_post p JOIN auth_user u ON u.id = p.author_id "
+    "LEFT JOIN posts_group g ON g.id = p.group_id",
+]
+DROP_SQL = [
+    'DROP TABLE IF EXISTS posts_post_fts',
+]
+
+
+def run_on_sqlite(statements):
+    # Индекс FTS5 есть только в SQLite, на других СУБД поиск идёт по LIKE
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_group_posts_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE_SQL), run_on_sqlite(DROP_SQL)),
+    ]
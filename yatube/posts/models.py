@@ -2,6 +2,7 @@ from django.contrib.auth import get_user_model
 from django.db import models
 
 from .constants import MAX_CHAR_LIMIT
+from .storage import HashedStorage
 from .validators import validate_not_empty
 
 User = get_user_model()
@@ -16,6 +17,7 @@ class Post(models.Model):
         help_text='Введите текст вашей публикации',
     )
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
+    updated = models.DateTimeField('Дата изменения', auto_now=True)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -34,16 +36,48 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=HashedStorage(),
         blank=True,
         help_text='Загрузите изображение',
     )
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('-pub_date', 'id'),
+                name='post_feed_idx',
+            ),
+            models.Index(
+                fields=('group', '-pub_date', 'id'),
+                name='post_group_feed_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date', 'id'),
+                name='post_author_feed_idx',
+            ),
+            # Время последней правки ленты для ETag и Last-Modified
+            models.Index(fields=('updated',), name='post_updated_idx'),
+            models.Index(
+                fields=('group', 'updated'),
+                name='post_group_updated_idx',
+            ),
+            models.Index(
+                fields=('author', 'updated'),
+                name='post_author_updated_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text[:MAX_CHAR_LIMIT]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Значения из БД нужны сигналам, чтобы увидеть смену группы
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
 
 class Group(models.Model):
     """Модель сообществ сайта"""
@@ -51,6 +85,42 @@ class Group(models.Model):
     title = models.CharField('Название сообщества', max_length=200)
     slug = models.SlugField('Адрес страницы сообщества', unique=True)
     description = models.TextField('Описание сообщества')
+    posts_count = models.PositiveIntegerField(
+        'Количество постов',
+        default=0,
+        editable=False,
+    )
 
     def __str__(self):
         return self.title
+
+
+class ImportCheckpoint(models.Model):
+    """Сколько записей источника уже загрузила команда import_posts"""
+
+    source = models.CharField('Источник', max_length=255, unique=True)
+    position = models.PositiveIntegerField('Загружено записей', default=0)
+    updated = models.DateTimeField('Обновлено', auto_now=True)
+
+    def __str__(self):
+        return f'{self.source}: {self.position}'
+
+
+class MediaFile(models.Model):
+    """Файл картинки в хранилище и сколько постов на него ссылается"""
+
+    name = models.CharField('Путь в хранилище', max_length=255, unique=True)
+    references = models.PositiveIntegerField('Ссылок', default=0)
+    updated = models.DateTimeField('Обновлено', auto_now=True)
+
+    class Meta:
+        indexes = (
+            # Файлы без ссылок для collect_media
+            models.Index(
+                fields=('references', 'updated'),
+                name='media_unreferenced_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.name}: {self.references}'
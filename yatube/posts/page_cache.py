@@ -0,0 +1,190 @@
+"""Кэш готовых страниц для анонимных посетителей.
+
+Вместе со страницей хранятся версии её тегов: ленты, постов, авторов
+и сообществ, которые на ней показаны. Сигналы меняют версию тега, и все
+страницы с этим тегом перестают совпадать при следующем чтении.
+
+Версия начинается с номера сброса из общего счётчика. Перед рендером
+запоминается текущий номер: если хоть один тег страницы сбросили позже,
+страница могла собраться из старых данных и в кэш не попадает.
+"""
+import hashlib
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from .constants import (PAGE_CACHE_CLOCK_KEY, PAGE_CACHE_KEY,
+                        PAGE_CACHE_STATS_KEY, PAGE_CACHE_TAG_KEY,
+                        PAGE_CACHE_TIMEOUT)
+
+HIT = 'hits'
+MISS = 'misses'
+# Параметры запроса, от которых зависит страница
+PAGE_PARAMS = ('page', 'cursor')
+
+
+def feed_tag(feed):
+    return f'feed:{feed}'
+
+
+def post_tag(post_id):
+    return f'post:{post_id}'
+
+
+def author_tag(author_id):
+    return f'author:{author_id}'
+
+
+def group_tag(group_id):
+    return f'group:{group_id}'
+
+
+def add_page_tags(request, *tags):
+    """Помечает кэшируемую страницу тегами"""
+    page_tags = getattr(request, 'page_cache_tags', None)
+    if page_tags is not None:
+        page_tags.update(tags)
+
+
+def add_post_tags(request, posts):
+    """Помечает страницу тегами показанных на ней постов"""
+    for post in posts:
+        add_page_tags(request, post_tag(post.pk), author_tag(post.author_id))
+        if post.group_id is not None:
+            add_page_tags(request, group_tag(post.group_id))
+
+
+def _clock():
+    return cache.get(PAGE_CACHE_CLOCK_KEY, 0)
+
+
+def _tick():
+    cache.add(PAGE_CACHE_CLOCK_KEY, 0, None)
+    try:
+        return cache.incr(PAGE_CACHE_CLOCK_KEY)
+    except ValueError:
+        return 0
+
+
+def _version(clock):
+    return f'{clock}:{uuid.uuid4().hex}'
+
+
+def _version_clock(version):
+    clock, separator, _ = version.partition(':')
+    return int(clock) if separator else 0
+
+
+def invalidate_tags(*tags):
+    """Меняет версии тегов, сбрасывая все страницы с ними"""
+    version = _version(_tick())
+    cache.set_many(
+        {PAGE_CACHE_TAG_KEY.format(tag): version for tag in tags},
+        None,
+    )
+
+
+def _tag_versions(tags):
+    keys = {PAGE_CACHE_TAG_KEY.format(tag): tag for tag in tags}
+    versions = cache.get_many(keys)
+    missing = {key: _version(0) for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def _page_key(view_name, args, kwargs, request):
+    params = [request.GET.get(param, '') for param in PAGE_PARAMS]
+    raw = repr((view_name, args, sorted(kwargs.items()), params))
+    return PAGE_CACHE_KEY.format(hashlib.md5(raw.encode()).hexdigest())
+
+
+def _count(view_name, outcome):
+    key = PAGE_CACHE_STATS_KEY.format(view_name, outcome)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def get_stats(view_names):
+    """Попадания и промахи кэша страниц по вью-функциям"""
+    keys = {
+        PAGE_CACHE_STATS_KEY.format(name, outcome): (name, outcome)
+        for name in view_names
+        for outcome in (HIT, MISS)
+    }
+    stats = {name: {HIT: 0, MISS: 0} for name in view_names}
+    for key, value in cache.get_many(keys).items():
+        name, outcome = keys[key]
+        stats[name][outcome] = value
+
+    return stats
+
+
+def _is_cacheable(request):
+    return (
+        settings.POSTS_PAGE_CACHE_ENABLED
+        and request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+    )
+
+
+def _get_response(key):
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    versions, content, content_type = entry
+    current = cache.get_many(
+        [PAGE_CACHE_TAG_KEY.format(tag) for tag in versions],
+    )
+    for tag, version in versions.items():
+        if current.get(PAGE_CACHE_TAG_KEY.format(tag)) != version:
+            return None
+
+    return HttpResponse(content, content_type=content_type)
+
+
+def cache_page_for_anonymous(view):
+    """Декоратор: отдаёт анонимным посетителям страницу из кэша"""
+    view_name = view.__name__
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not _is_cacheable(request):
+            return view(request, *args, **kwargs)
+
+        key = _page_key(view_name, args, kwargs, request)
+        response = _get_response(key)
+        if response is not None:
+            _count(view_name, HIT)
+            return response
+
+        _count(view_name, MISS)
+        request.page_cache_tags = set()
+        # Теги известны только после рендера, поэтому до него снимаем
+        # номер сброса: версии новее него значат, что данные менялись
+        started = _clock()
+        response = view(request, *args, **kwargs)
+        if (
+            response.status_code == 200
+            and not response.cookies
+            and request.page_cache_tags
+        ):
+            versions = _tag_versions(request.page_cache_tags)
+            if all(
+                _version_clock(version) <= started
+                for version in versions.values()
+            ):
+                entry = (versions, response.content, response['Content-Type'])
+                cache.set(key, entry, PAGE_CACHE_TIMEOUT)
+
+        return response
+
+    return wrapper
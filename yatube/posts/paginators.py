@@ -0,0 +1,204 @@
+import base64
+import binascii
+import json
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from .constants import (FEED_ORDERING, KEYSET_PAGE_THRESHOLD,
+                        PAGE_RANGE_ON_EACH_SIDE, PAGE_RANGE_ON_ENDS)
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def encode_position(direction, pub_date, pk):
+    """Упаковывает позицию в ленте в непрозрачную строку-курсор"""
+    raw = json.dumps([direction, pub_date.isoformat(), pk])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def encode_cursor(post, direction):
+    """Курсор, указывающий на пост"""
+    return encode_position(direction, post.pub_date, post.pk)
+
+
+def decode_cursor(cursor):
+    """Распаковывает курсор, для битого курсора возвращает None"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        direction, pub_date, pk = json.loads(raw.decode())
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        return None
+    if direction not in (NEXT, PREVIOUS) or pub_date is None:
+        return None
+
+    return direction, pub_date, pk
+
+
+class ElidedPageRangeMixin:
+    """Сокращённый список номеров страниц для пагинатора.
+
+    Повторяет Paginator.get_elided_page_range из Django 3.2: число
+    ссылок не зависит от длины ленты.
+    """
+
+    ELLIPSIS = '…'
+
+    def get_elided_page_range(self, number=1,
+                              on_each_side=PAGE_RANGE_ON_EACH_SIDE,
+                              on_ends=PAGE_RANGE_ON_ENDS):
+        number = self.validate_number(number)
+        if self.num_pages <= (on_each_side + on_ends) * 2:
+            yield from self.page_range
+            return
+
+        if number > 1 + on_each_side + on_ends + 1:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+
+        if number < self.num_pages - on_each_side - on_ends - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield self.ELLIPSIS
+            yield from range(self.num_pages - on_ends + 1, self.num_pages + 1)
+        else:
+            yield from range(number + 1, self.num_pages + 1)
+
+
+class ElidedPageMixin:
+    @property
+    def elided_page_range(self):
+        """Номера страниц для includes/paginator.html"""
+        return self.paginator.get_elided_page_range(self.number)
+
+
+class KeysetPage(ElidedPageMixin, Page):
+    """Страница ленты, умеющая строить ссылки как по номеру, так и курсором"""
+
+    def __init__(self, object_list, number, paginator, has_more=False,
+                 is_cursor=False, direction=NEXT):
+        super().__init__(object_list, number, paginator)
+        self.is_cursor = is_cursor
+        self._has_more = has_more
+        self._direction = direction
+
+    def has_next(self):
+        if not self.is_cursor:
+            return super().has_next()
+        if self._direction == NEXT:
+            return self._has_more
+        return bool(self.object_list)
+
+    def has_previous(self):
+        if not self.is_cursor:
+            return super().has_previous()
+        if self._direction == PREVIOUS:
+            return self._has_more
+        return bool(self.object_list)
+
+    @property
+    def next_query(self):
+        """Query-string ссылки на следующую страницу"""
+        if not self.is_cursor and self.number < KEYSET_PAGE_THRESHOLD:
+            return f'page={self.number + 1}'
+        return 'cursor=' + encode_cursor(self[-1], NEXT)
+
+    @property
+    def previous_query(self):
+        """Query-string ссылки на предыдущую страницу"""
+        if not self.is_cursor:
+            return f'page={self.number - 1}'
+        return 'cursor=' + encode_cursor(self[0], PREVIOUS)
+
+
+class KeysetPaginator(ElidedPageRangeMixin, Paginator):
+    """Пагинатор ленты постов с переходом по курсору на глубоких страницах.
+
+    Первые страницы по-прежнему доступны по ``?page=``, дальше ссылки
+    строятся курсором по паре ``(pub_date, id)``: такой запрос ищет
+    по индексу вместо ``OFFSET`` и не требует ``COUNT(*)``.
+    Через ``count`` можно передать функцию, возвращающую размер ленты
+    без запроса к БД, а через ``timeline`` - предрассчитанные id постов
+    ленты и признак того, что лента в них поместилась целиком.
+    """
+
+    def __init__(self, object_list, per_page, count=None, timeline=None,
+                 **kwargs):
+        super().__init__(object_list.order_by(*FEED_ORDERING), per_page,
+                         **kwargs)
+        self._count = count
+        self.timeline = timeline
+
+    @cached_property
+    def count(self):
+        if self.timeline is not None and self.timeline[1]:
+            return len(self.timeline[0])
+        if self._count is None:
+            return self.object_list.count()
+        return self._count()
+
+    def page(self, number):
+        if self.timeline is None:
+            return super().page(number)
+
+        ids, complete = self.timeline
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        if top > len(ids) and not complete:
+            # Страница за пределами предрассчитанной ленты
+            return super().page(number)
+
+        ids = ids[bottom:top]
+        posts = self.object_list.in_bulk(ids)
+        return self._get_page(
+            [posts[pk] for pk in ids if pk in posts],
+            number,
+            self,
+        )
+
+    def _get_page(self, *args, **kwargs):
+        return KeysetPage(*args, **kwargs)
+
+    def seek(self, direction, pub_date, pk):
+        """Посты ленты после позиции ``(pub_date, pk)`` или перед ней"""
+        if direction == NEXT:
+            seek = Q(pub_date__lte=pub_date) & ~Q(pub_date=pub_date,
+                                                  pk__lte=pk)
+            return self.object_list.filter(seek)
+
+        seek = Q(pub_date__gte=pub_date) & ~Q(pub_date=pub_date, pk__gte=pk)
+        return self.object_list.filter(seek).reverse()
+
+    def get_cursor_page(self, cursor):
+        """Возвращает страницу, следующую за курсором или перед ним"""
+        position = decode_cursor(cursor)
+        if position is None:
+            return self.get_page(1)
+
+        direction, pub_date, pk = position
+        queryset = self.seek(direction, pub_date, pk)
+        object_list = list(queryset[:self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if direction == PREVIOUS:
+            object_list.reverse()
+            if not has_more:
+                # Дошли до начала ленты - отдаём обычную первую страницу
+                return self.get_page(1)
+
+        return self._get_page(
+            object_list,
+            None,
+            self,
+            has_more=has_more,
+            is_cursor=True,
+            direction=direction,
+        )
@@ -0,0 +1,218 @@
+"""Полнотекстовый поиск по постам.
+
+В SQLite индекс - виртуальная таблица FTS5 с текстом поста, названием
+сообщества и именем автора (миграция 0010). Сигналы ставят в очередь
+core.jobs задачи posts.index_posts, posts.reindex_group и
+posts.reindex_author; воркер выполнит их после коммита, и до того поиск
+показывает старое состояние. bulk_create и update() сигналы обходят:
+после них нужен index_posts() или команда rebuild_search_index.
+Триггеры в БД здесь не подходят: SQLite-миграции Django пересоздают
+таблицы, и триггеры на них теряются. На других СУБД поиск откатывается
+на icontains.
+"""
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.paginator import Page, Paginator
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .constants import FEED_ORDERING, SEARCH_INDEX_BATCH, SEARCH_MAX_RESULTS
+from .models import Group, Post
+from .paginators import ElidedPageMixin, ElidedPageRangeMixin
+
+User = get_user_model()
+SEARCH_TABLE = 'posts_post_fts'
+WORD = re.compile(r'\w+')
+
+
+def is_fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def _execute(sql, params=()):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall() if cursor.description else None
+
+
+def _placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def author_name(user):
+    """Имя автора в индексе, как его собирает index_posts()"""
+    return f'{user.username} {user.first_name} {user.last_name}'
+
+
+def _insert_posts(condition, params):
+    _execute(
+        f'INSERT INTO {SEARCH_TABLE} (rowid, text, group_title, '
+        f"author_name) SELECT p.id, p.text, COALESCE(g.title, ''), "
+        f"u.username || ' ' || u.first_name || ' ' || u.last_name "
+        f'FROM {Post._meta.db_table} p '
+        f'JOIN {User._meta.db_table} u ON u.id = p.author_id '
+        f'LEFT JOIN {Group._meta.db_table} g ON g.id = p.group_id '
+        f'WHERE {condition}',
+        params,
+    )
+
+
+def index_posts(post_ids):
+    """Заново индексирует посты с данными id"""
+    if not is_fts_available():
+        return
+    post_ids = list(post_ids)
+    for start in range(0, len(post_ids), SEARCH_INDEX_BATCH):
+        batch = post_ids[start:start + SEARCH_INDEX_BATCH]
+        in_batch = _placeholders(batch)
+        _execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({in_batch})',
+            batch,
+        )
+        _insert_posts(f'p.id IN ({in_batch})', batch)
+
+
+def index_new_posts(first_id, last_id):
+    """Индексирует только что вставленные посты с id из диапазона.
+
+    Быстрее index_posts(): одна вставка без удаления старых записей.
+    """
+    if is_fts_available():
+        _insert_posts('p.id BETWEEN %s AND %s', (first_id, last_id))
+
+
+def unindex_posts(post_ids):
+    """Убирает посты из индекса"""
+    if not is_fts_available():
+        return
+    post_ids = list(post_ids)
+    for start in range(0, len(post_ids), SEARCH_INDEX_BATCH):
+        batch = post_ids[start:start + SEARCH_INDEX_BATCH]
+        _execute(
+            f'DELETE FROM {SEARCH_TABLE} '
+            f'WHERE rowid IN ({_placeholders(batch)})',
+            batch,
+        )
+
+
+def _reindex_column(column, value, field, pk):
+    if not is_fts_available():
+        return
+    _execute(
+        f'UPDATE {SEARCH_TABLE} SET {column} = %s WHERE rowid IN '
+        f'(SELECT id FROM {Post._meta.db_table} WHERE {field} = %s)',
+        (value, pk),
+    )
+
+
+def reindex_group(group_id, title):
+    """Меняет название сообщества у всех его постов в индексе"""
+    _reindex_column('group_title', title, 'group_id', group_id)
+
+
+def reindex_author(user):
+    """Меняет имя автора у всех его постов в индексе"""
+    _reindex_column('author_name', author_name(user), 'author_id', user.pk)
+
+
+def clear_index():
+    if is_fts_available():
+        _execute(f'DELETE FROM {SEARCH_TABLE}')
+
+
+def match_query(text):
+    """Превращает ввод пользователя в безопасный запрос FTS5.
+
+    Каждое слово ищется по префиксу, все слова должны встретиться в посте.
+    """
+    return ' '.join(f'"{word}"*' for word in WORD.findall(text))
+
+
+def matching_ids(query):
+    """Подзапрос id постов, подходящих под запрос"""
+    return RawSQL(
+        f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s',
+        (match_query(query),),
+    )
+
+
+class SearchResults:
+    """Найденные посты по релевантности (bm25) для Paginator.
+
+    Отдаёт срезы запросом к индексу с LIMIT/OFFSET, а сами посты
+    загружает по id. Результаты после SEARCH_MAX_RESULTS не считаем
+    и не показываем: для частых слов COUNT по индексу дорог.
+    """
+
+    def __init__(self, queryset, query):
+        self.queryset = queryset
+        self.match = match_query(query)
+
+    def count(self):
+        if not self.match:
+            return 0
+        (count,), = _execute(
+            f'SELECT COUNT(*) FROM (SELECT rowid FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s LIMIT %s)',
+            (self.match, SEARCH_MAX_RESULTS),
+        )
+        return count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        if not self.match:
+            return []
+
+        start = index.start or 0
+        stop = min(index.stop or SEARCH_MAX_RESULTS, SEARCH_MAX_RESULTS)
+        rows = _execute(
+            f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} '
+            f'MATCH %s ORDER BY rank LIMIT %s OFFSET %s',
+            (self.match, max(stop - start, 0), start),
+        )
+        ids = [pk for pk, in rows]
+        posts = self.queryset.in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+def search_posts(queryset, query):
+    """Посты, подходящие под запрос, в порядке релевантности"""
+    if is_fts_available():
+        return SearchResults(queryset, query)
+
+    words = WORD.findall(query)
+    if not words:
+        return queryset.none()
+    condition = Q()
+    for word in words:
+        condition &= (
+            Q(text__icontains=word)
+            | Q(group__title__icontains=word)
+            | Q(author__username__icontains=word)
+        )
+    return queryset.filter(condition).order_by(*FEED_ORDERING)
+
+
+class SearchPage(ElidedPageMixin, Page):
+    """Страница поиска со ссылками для includes/paginator.html"""
+
+    is_cursor = False
+
+    @property
+    def next_query(self):
+        return f'page={self.next_page_number()}'
+
+    @property
+    def previous_query(self):
+        return f'page={self.previous_page_number()}'
+
+
+class SearchPaginator(ElidedPageRangeMixin, Paginator):
+    def _get_page(self, *args, **kwargs):
+        return SearchPage(*args, **kwargs)
@@ -0,0 +1,107 @@
+"""Генерация строк для команды seed.
+
+Функции работают в процессах-воркерах и не трогают ни ORM, ни базу:
+воркер получает номер пачки и возвращает готовые кортежи для INSERT.
+Каждая пачка генерируется своим Random от зерна и номера, поэтому
+результат не зависит от числа воркеров.
+"""
+import random
+from bisect import bisect
+from datetime import datetime, timezone
+from itertools import accumulate
+
+from faker import Faker
+
+# Сколько разных предложений собрать для текстов постов
+SENTENCES = 5000
+NAMES = 500
+_state = {}
+
+
+def zipf_weights(count, exponent):
+    """Накопленные веса закона Ципфа: k-й по активности - 1 / k^s"""
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)
+    ))
+
+
+def lognormal_weights(count, rnd, sigma=1.5):
+    """Накопленные веса логнормального распределения размеров"""
+    return list(accumulate(
+        rnd.lognormvariate(0, sigma) for _ in range(count)
+    ))
+
+
+def pick(rnd, ids, cum_weights):
+    """Случайный id с данными накопленными весами"""
+    index = bisect(cum_weights, rnd.random() * cum_weights[-1])
+    return ids[min(index, len(ids) - 1)]
+
+
+def faker(random_seed):
+    fake = Faker('ru_RU')
+    fake.seed_instance(random_seed)
+    return fake
+
+
+def names(random_seed):
+    """Наборы имён и фамилий, из которых собираются пользователи"""
+    fake = faker(random_seed)
+    return (
+        [fake.first_name() for _ in range(NAMES)],
+        [fake.last_name() for _ in range(NAMES)],
+    )
+
+
+def init_worker(options):
+    """Готовит в воркере словарь предложений и веса авторов и сообществ"""
+    fake = faker(options['random_seed'])
+    rnd = random.Random(options['random_seed'])
+    _state.update(
+        options,
+        sentences=[fake.sentence() for _ in range(SENTENCES)],
+        author_weights=zipf_weights(
+            len(options['author_ids']),
+            options['zipf'],
+        ),
+        group_weights=lognormal_weights(len(options['group_ids']), rnd),
+    )
+
+
+def generate_posts(task):
+    """Строки постов пачки (offset, size) для INSERT.
+
+    Кортеж: id, text, pub_date, author_id, group_id, image.
+    Даты растут вместе с id и равномерно покрывают период.
+    """
+    offset, size = task
+    options = _state
+    rnd = random.Random(options['random_seed'] * 1000003 + offset)
+    period = options['until'] - options['since']
+    rows = []
+    for index in range(offset, offset + size):
+        timestamp = options['since'] + period * (
+            (index + rnd.random()) / options['total']
+        )
+        pub_date = datetime.fromtimestamp(timestamp, timezone.utc)
+        group_id = None
+        if options['group_ids'] and rnd.random() >= options['no_group']:
+            group_id = pick(
+                rnd, options['group_ids'], options['group_weights'],
+            )
+        image = ''
+        if options['images'] and rnd.random() < options['image_share']:
+            image = rnd.choice(options['images'])
+        rows.append((
+            options['first_id'] + index,
+            ' '.join(rnd.choices(
+                options['sentences'],
+                k=rnd.randint(1, 8),
+            )),
+            pub_date,
+            pick(rnd, options['author_ids'], options['author_weights']),
+            group_id,
+            image,
+        ))
+
+    return rows
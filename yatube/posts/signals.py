@@ -0,0 +1,167 @@
+from functools import partial
+
+from core.jobs import enqueue
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .conditional import names_changed
+from .counts import (change_author_posts_count, change_feed_counts,
+                     change_group_posts_count)
+from . import jobs  # noqa: F401 - регистрирует задачи posts.*
+from .feeds import group_feed, post_feeds
+from .lookups import authors, groups
+from .media import acquire, release
+from .models import Group, Post
+from .page_cache import (author_tag, feed_tag, group_tag, invalidate_tags,
+                         post_tag)
+from .search import reindex_group
+from .thumbnails import queue_thumbnails
+from .timeline import push_post, remove_post, reset_timelines
+
+User = get_user_model()
+# Поля поста, которые попадают в поисковый индекс
+SEARCH_FIELDS = ('text', 'group_id', 'author_id')
+
+
+def _group_feeds(group_id):
+    return [] if group_id is None else [group_feed(group_id)]
+
+
+def _remember_loaded_values(instance):
+    """Запоминает сохранённые значения полей, возвращает прежние"""
+    loaded = getattr(instance, '_loaded_values', {})
+    instance._loaded_values = {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+    }
+    return loaded
+
+
+def _only_last_login(update_fields):
+    return update_fields is not None and set(update_fields) == {'last_login'}
+
+
+def _queue_index(post_id):
+    enqueue('posts.index_posts', [post_id], key=f'search:post:{post_id}')
+
+
+def _feeds_changed(post_id, added, removed, created=False):
+    """Правит кэши после коммита: счётчики, ленты и страницы"""
+    change_feed_counts(added, 1)
+    change_feed_counts(removed, -1)
+    if settings.POSTS_TIMELINE_ENABLED:
+        if created:
+            push_post(post_id, added)
+        else:
+            remove_post(post_id, removed)
+            # Место поста в новой ленте неизвестно - соберём её заново
+            reset_timelines(added)
+    invalidate_tags(
+        post_tag(post_id),
+        *[feed_tag(feed) for feed in added + removed],
+    )
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    """Обновляет счётчики, ленты и кэш страниц после сохранения поста"""
+    loaded = _remember_loaded_values(instance)
+    old_group_id = loaded.get('group_id', instance.group_id)
+    added = removed = []
+    if created:
+        change_author_posts_count(instance.author_id, 1)
+        change_group_posts_count(instance.group_id, 1)
+        added = post_feeds(instance)
+    elif old_group_id != instance.group_id:
+        change_group_posts_count(old_group_id, -1)
+        change_group_posts_count(instance.group_id, 1)
+        added = _group_feeds(instance.group_id)
+        removed = _group_feeds(old_group_id)
+
+    transaction.on_commit(
+        partial(_feeds_changed, instance.pk, added, removed, created),
+    )
+    if created or any(
+        loaded.get(field) != getattr(instance, field)
+        for field in SEARCH_FIELDS
+    ):
+        _queue_index(instance.pk)
+    old_image = str(loaded.get('image', ''))
+    image_changed = old_image != instance.image.name
+    if created or image_changed:
+        if instance.image:
+            acquire(instance.image.name)
+        if old_image:
+            release(old_image)
+    if (
+        settings.POSTS_THUMBNAILS_PREGENERATE
+        and instance.image
+        and (created or image_changed)
+    ):
+        queue_thumbnails(instance.image)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    """Убирает удалённый пост из счётчиков, лент и кэша страниц"""
+    change_author_posts_count(instance.author_id, -1)
+    change_group_posts_count(instance.group_id, -1)
+    if instance.image:
+        release(instance.image.name)
+    _queue_index(instance.pk)
+    transaction.on_commit(
+        partial(_feeds_changed, instance.pk, [], post_feeds(instance)),
+    )
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleting(sender, instance, **kwargs):
+    """Убирает название сообщества из индекса, пока посты ещё в нём"""
+    reindex_group(instance.pk, '')
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    """Ставит в очередь обновление названия сообщества в индексе"""
+    if not created:
+        enqueue(
+            'posts.reindex_group',
+            instance.pk,
+            key=f'search:group:{instance.pk}',
+        )
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    """Сбрасывает страницы, на которых показано сообщество"""
+    groups.invalidate(instance.pk, instance.slug)
+    tag = group_tag(instance.pk)
+    transaction.on_commit(lambda: invalidate_tags(tag))
+    transaction.on_commit(names_changed)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    """Ставит в очередь обновление имени автора в индексе"""
+    if not created and not _only_last_login(update_fields):
+        enqueue(
+            'posts.reindex_author',
+            instance.pk,
+            key=f'search:author:{instance.pk}',
+        )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    """Сбрасывает страницы автора, кроме как при обновлении last_login"""
+    if _only_last_login(update_fields):
+        return
+    authors.invalidate(instance.pk, instance.username)
+    tag = author_tag(instance.pk)
+    transaction.on_commit(lambda: invalidate_tags(tag))
+    transaction.on_commit(names_changed)
@@ -0,0 +1,76 @@
+"""Хранилище картинок постов с адресацией по содержимому.
+
+Загрузка по пути читается кусками через SHA-256, файл ложится в
+<каталог upload_to>/ab/cd/<хэш>.<расширение>. Два уровня каталогов по
+256 вариантов держат их размер небольшим и при миллионах файлов, а
+одинаковые загрузки хранятся один раз. Сколько постов ссылается на
+файл, считает posts.media, файлы без ссылок удаляет collect_media.
+"""
+import hashlib
+import os
+import posixpath
+import re
+
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+HASHED_NAME = re.compile(r'(?:^|/)[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.\w*$')
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def hashed_name(name, digest):
+    """Путь файла с хэшем digest в каталоге загрузки name"""
+    extension = os.path.splitext(name)[1].lower()
+    directory = posixpath.dirname(name)
+    if HASHED_NAME.search(name):
+        # Файл из этого же хранилища: каталоги шардов не вкладываем
+        directory = posixpath.dirname(posixpath.dirname(directory))
+    return posixpath.join(
+        directory,
+        digest[:2],
+        digest[2:4],
+        digest + extension,
+    )
+
+
+@deconstructible
+class HashedStorage(FileSystemStorage):
+    """FileSystemStorage, раскладывающее файлы по хэшу содержимого"""
+
+    def get_available_name(self, name, max_length=None):
+        # Исходное имя не важно: путь выберет _save по содержимому.
+        # Путь по хэшу занят, только если тот же файл пишут параллельно
+        if HASHED_NAME.search(name):
+            return super().get_available_name(name, max_length)
+        return name
+
+    def _save(self, name, content):
+        name = hashed_name(name, content_hash(content))
+        if self.exists(name) and self._reuse(name):
+            return name
+        return super()._save(name, content)
+
+    def _reuse(self, name):
+        """Откладывает удаление файла, который загрузили заново.
+
+        Ссылку пост возьмёт только при сохранении, а до тех пор
+        collect_media не должен считать файл брошенным. False - файл
+        уже удалили.
+        """
+        # models импортирует этот модуль
+        from .models import MediaFile
+
+        MediaFile.objects.filter(name=name).update(updated=timezone.now())
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return False
+        return True
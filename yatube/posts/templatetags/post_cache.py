@@ -0,0 +1,69 @@
+import hashlib
+
+from django import template
+from django.core.cache import cache
+
+from ..constants import FRAGMENT_CACHE_KEY, FRAGMENT_CACHE_TIMEOUT
+
+register = template.Library()
+
+
+def fragment_key(post, vary_on):
+    """Ключ фрагмента: меняется вместе с постом, его автором и группой"""
+    author = post.author
+    group = post.group
+    version = (
+        post.pk,
+        post.text,
+        post.pub_date.isoformat(),
+        post.image.name,
+        author.username,
+        author.get_full_name(),
+        group and (group.slug, group.title),
+        vary_on,
+    )
+    digest = hashlib.md5(repr(version).encode()).hexdigest()
+    return FRAGMENT_CACHE_KEY.format(digest)
+
+
+class PostCacheNode(template.Node):
+    def __init__(self, nodelist, post, vary_on):
+        self.nodelist = nodelist
+        self.post = post
+        self.vary_on = vary_on
+
+    def render(self, context):
+        post = self.post.resolve(context)
+        vary_on = tuple(
+            bool(var.resolve(context, ignore_failures=True))
+            for var in self.vary_on
+        )
+        key = fragment_key(post, vary_on)
+        content = cache.get(key)
+        if content is None:
+            content = self.nodelist.render(context)
+            cache.set(key, content, FRAGMENT_CACHE_TIMEOUT)
+
+        return content
+
+
+@register.tag
+def postcache(parser, token):
+    """Кэширует разметку поста, не зависящую от зрителя.
+
+    Использование: ``{% postcache post flag1 flag2 %}...{% endpostcache %}``,
+    где флаги - переменные, от истинности которых зависит разметка.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag requires at least 1 argument."
+        )
+    nodelist = parser.parse(('endpostcache',))
+    parser.delete_first_token()
+
+    return PostCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]],
+    )
@@ -0,0 +1,130 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from core.jobs import work
+from core.models import Job
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..constants import POSTS_LIMIT
+from ..models import Group, Post
+from .test_thumbnails import uploaded_gif
+
+User = get_user_model()
+
+
+@override_settings(POSTS_THUMBNAILS_PREGENERATE=False)
+class ApiTests(TestCase):
+    """Проверка JSON API лент и постов"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='author',
+            first_name='Лев',
+            last_name='Толстой',
+        )
+        cls.group = Group.objects.create(title='Group', slug='group')
+        for i in range(POSTS_LIMIT + 2):
+            Post.objects.create(
+                author=cls.user,
+                group=cls.group,
+                text=f'Пост {i}',
+            )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Пост с картинкой',
+            image=uploaded_gif(),
+        )
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def get_json(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return response.json()
+
+    def test_feeds_follow_cursor_without_models(self):
+        """Ленты листаются курсором, строки не превращаются в модели"""
+        expected = list(Post.objects.order_by('-pub_date', 'id').values_list(
+            'pk', flat=True,
+        ))
+        url = reverse('posts:api_index')
+        with mock.patch.object(Post, 'from_db', side_effect=AssertionError):
+            first = self.get_json(url, fields='id')
+            second = self.get_json(url, fields='id', cursor=first['next'])
+        self.assertEqual(first['results'][0], {'id': expected[0]})
+        self.assertEqual(
+            [row['id'] for row in first['results'] + second['results']],
+            expected,
+        )
+        self.assertIsNone(second['next'])
+
+    def test_group_and_profile(self):
+        """Ленты сообщества и автора отдают и сам объект"""
+        data = self.get_json(
+            reverse('posts:api_group_list', args=('group',)),
+            fields='text,group',
+        )
+        self.assertEqual(data['group']['posts_count'], POSTS_LIMIT + 2)
+        self.assertEqual(set(data['results'][0]), {'text', 'group'})
+        self.assertEqual(data['results'][0]['group'], 'group')
+
+        data = self.get_json(reverse('posts:api_profile', args=('author',)))
+        self.assertEqual(data['author']['first_name'], 'Лев')
+        self.assertEqual(data['author']['posts_count'], POSTS_LIMIT + 3)
+        self.assertEqual(data['results'][0]['author'], 'author')
+
+    def test_post_detail_with_thumbnail(self):
+        """Пост отдаётся с адресом миниатюры картинки"""
+        data = self.get_json(
+            reverse('posts:api_post_detail', args=(self.post.pk,)),
+        )
+        self.assertEqual(data['text'], 'Пост с картинкой')
+        self.assertEqual(data['image'], self.post.image.url)
+        self.assertTrue(Job.objects.filter(
+            task='posts.generate_thumbnails',
+        ).exists())
+
+        work(once=True)
+        data = self.get_json(
+            reverse('posts:api_post_detail', args=(self.post.pk,)),
+        )
+        self.assertTrue(
+            data['image'].startswith(settings.MEDIA_URL + 'cache/'),
+        )
+
+    def test_errors(self):
+        """Ошибки отдаются в JSON"""
+        cases = (
+            (reverse('posts:api_index'), {'fields': 'id,password'}, 400),
+            (reverse('posts:api_index'), {'cursor': 'broken'}, 400),
+            (reverse('posts:api_group_list', args=('missing',)), {}, 404),
+            (reverse('posts:api_post_detail', args=(0,)), {}, 404),
+        )
+        for url, params, status in cases:
+            with self.subTest(url=url, params=params):
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, status)
+                self.assertIn('error', response.json())
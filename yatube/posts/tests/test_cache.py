@@ -0,0 +1,243 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from ..constants import POSTS_LIMIT, TIMELINE_CACHE_KEY
+from ..feeds import GLOBAL_FEED, group_feed
+from ..models import Group, Post
+from ..templatetags.post_cache import fragment_key
+from ..timeline import _locked, get_timeline, push_post
+
+User = get_user_model()
+
+
+@override_settings(POSTS_TIMELINE_ENABLED=True)
+class TimelineTests(TransactionTestCase):
+    """Проверка предрассчитанных лент"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author')
+        self.group = Group.objects.create(title='Group', slug='group')
+        self.other_group = Group.objects.create(title='Other', slug='other')
+        for i in range(POSTS_LIMIT + 2):
+            Post.objects.create(
+                author=self.user,
+                group=self.group,
+                text=f'Пост {i}',
+            )
+
+    def tearDown(self):
+        cache.clear()
+
+    def feed_ids(self, url):
+        response = self.client.get(url)
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_feed_pages_follow_timeline(self):
+        """Страницы ленты совпадают с выборкой из БД"""
+        expected = list(Post.objects.order_by('-pub_date', 'id').values_list(
+            'pk', flat=True,
+        ))
+        index = reverse('posts:index')
+        self.assertEqual(self.feed_ids(index), expected[:POSTS_LIMIT])
+        self.assertEqual(
+            self.feed_ids(index + '?page=2'),
+            expected[POSTS_LIMIT:],
+        )
+
+    def test_writes_update_cached_timeline(self):
+        """Создание, перенос в другую группу и удаление правят ленты"""
+        ids, complete = get_timeline(GLOBAL_FEED, Post.objects.all())
+        self.assertTrue(complete)
+        get_timeline(group_feed(self.group.pk), self.group.posts.all())
+
+        post = Post.objects.create(author=self.user, text='Новый пост')
+        self.assertEqual(
+            get_timeline(GLOBAL_FEED, Post.objects.none())[0],
+            [post.pk] + ids,
+        )
+
+        moved = Post.objects.get(pk=ids[0])
+        moved.group = self.other_group
+        moved.save()
+        group_ids, _ = get_timeline(
+            group_feed(self.group.pk),
+            Post.objects.none(),
+        )
+        self.assertNotIn(moved.pk, group_ids)
+        self.assertEqual(
+            self.feed_ids(reverse('posts:group_list', args=('other',))),
+            [moved.pk],
+        )
+
+        post_id = post.pk
+        post.delete()
+        self.assertNotIn(
+            post_id,
+            get_timeline(GLOBAL_FEED, Post.objects.none())[0],
+        )
+
+    def test_update_under_foreign_lock_resets_timeline(self):
+        """Правка, которой помешала блокировка, не теряется"""
+        key = TIMELINE_CACHE_KEY.format(GLOBAL_FEED)
+        get_timeline(GLOBAL_FEED, Post.objects.all())
+        with _locked(GLOBAL_FEED) as locked:
+            self.assertTrue(locked)
+            # Держатель блокировки прочитал ленту до новой записи
+            stale = cache.get(key)
+            push_post(0, [GLOBAL_FEED])
+            self.assertIsNone(cache.get(key))
+            cache.set(key, stale)
+        self.assertIsNone(cache.get(key))
+
+        get_timeline(GLOBAL_FEED, Post.objects.all())
+        push_post(0, [GLOBAL_FEED])
+        self.assertEqual(
+            get_timeline(GLOBAL_FEED, Post.objects.none())[0][0], 0,
+        )
+
+    def test_rebuild_command(self):
+        """Команда rebuild_timelines собирает ленты заново"""
+        call_command('rebuild_timelines', stdout=StringIO())
+        ids, _ = get_timeline(
+            group_feed(self.group.pk),
+            Post.objects.none(),
+        )
+        self.assertEqual(len(ids), POSTS_LIMIT + 2)
+
+
+@override_settings(POSTS_PAGE_CACHE_ENABLED=True)
+class PageCacheTests(TransactionTestCase):
+    """Проверка кэша страниц для анонимных посетителей"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author')
+        self.other = User.objects.create_user(username='other')
+        self.group = Group.objects.create(title='Group', slug='group')
+        self.other_group = Group.objects.create(title='Other', slug='other')
+        self.post = Post.objects.create(
+            author=self.user,
+            group=self.group,
+            text='Пост',
+        )
+        self.pages = {
+            'index': reverse('posts:index'),
+            'group': reverse('posts:group_list', args=('group',)),
+            'other_group': reverse('posts:group_list', args=('other',)),
+            'profile': reverse('posts:profile', args=('author',)),
+            'other_profile': reverse('posts:profile', args=('other',)),
+        }
+
+    def tearDown(self):
+        cache.clear()
+
+    def is_cached(self, url):
+        """Страница отдана из кэша, без рендера шаблона"""
+        return self.client.get(url).context is None
+
+    def warm_up(self):
+        for url in self.pages.values():
+            self.client.get(url)
+
+    def test_new_post_purges_only_its_feeds(self):
+        """Новый пост сбрасывает главную, свою группу и автора"""
+        self.warm_up()
+        Post.objects.create(author=self.user, group=self.group, text='Новый')
+        expected = {
+            'index': False,
+            'group': False,
+            'other_group': True,
+            'profile': False,
+            'other_profile': True,
+        }
+        for name, cached in expected.items():
+            with self.subTest(page=name):
+                self.assertEqual(self.is_cached(self.pages[name]), cached)
+
+    def test_group_and_user_changes(self):
+        """Правка сообщества и автора сбрасывает страницы с ними"""
+        self.warm_up()
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertFalse(self.is_cached(self.pages['group']))
+        self.assertFalse(self.is_cached(self.pages['index']))
+        self.assertTrue(self.is_cached(self.pages['other_group']))
+
+        self.warm_up()
+        self.other.first_name = 'Имя'
+        self.other.save()
+        self.assertFalse(self.is_cached(self.pages['other_profile']))
+        self.assertTrue(self.is_cached(self.pages['profile']))
+
+    def test_page_changed_during_render_is_not_cached(self):
+        """Страница, чьи данные сменились во время рендера, не кэшируется"""
+        def edit_post(page_obj):
+            self.post.text = 'Новый текст'
+            self.post.save()
+
+        with mock.patch(
+            'posts.views.prefetch_thumbnails', side_effect=edit_post,
+        ):
+            self.client.get(self.pages['index'])
+        self.assertFalse(self.is_cached(self.pages['index']))
+        self.assertTrue(self.is_cached(self.pages['index']))
+
+    def test_authorized_user_bypasses_cache(self):
+        """Авторизованный пользователь всегда получает свежую страницу"""
+        self.warm_up()
+        self.client.force_login(self.other)
+        self.assertFalse(self.is_cached(self.pages['index']))
+
+    def test_stats_command(self):
+        """Команда page_cache_stats выводит попадания и промахи"""
+        self.client.get(self.pages['index'])
+        self.client.get(self.pages['index'])
+        out = StringIO()
+        call_command('page_cache_stats', stdout=out)
+        self.assertIn('index: попаданий 1, промахов 1', out.getvalue())
+
+
+class PostFragmentCacheTests(TransactionTestCase):
+    """Проверка кэша отрендеренных постов"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author')
+        self.other = User.objects.create_user(username='other')
+        self.post = Post.objects.create(author=self.user, text='Пост')
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_fragment_is_reused_and_follows_changes(self):
+        """Фрагмент берётся из кэша, пока пост и автор не изменились"""
+        index = reverse('posts:index')
+        self.client.get(index)
+        key = fragment_key(Post.objects.get(pk=self.post.pk), (False, False))
+        self.assertIsNotNone(cache.get(key))
+        cache.set(key, 'Фрагмент из кэша')
+        self.assertContains(self.client.get(index), 'Фрагмент из кэша')
+
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        self.user.first_name = 'Лев'
+        self.user.last_name = 'Толстой'
+        self.user.save()
+        response = self.client.get(index)
+        self.assertContains(response, 'Исправленный пост')
+        self.assertContains(response, 'Лев Толстой')
+
+    def test_edit_link_is_per_viewer(self):
+        """Ссылка на редактирование не попадает в общий кэш"""
+        index = reverse('posts:index')
+        self.client.force_login(self.user)
+        self.assertContains(self.client.get(index), 'Редактировать')
+        self.client.force_login(self.other)
+        self.assertNotContains(self.client.get(index), 'Редактировать')
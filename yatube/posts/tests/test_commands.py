@@ -0,0 +1,319 @@
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db.models import Count
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from users.models import Profile
+
+from ..models import Group, ImportCheckpoint, Post
+from ..search import matching_ids
+
+User = get_user_model()
+
+
+class CheckFeedPlansTests(TestCase):
+    """Проверка команды check_feed_plans"""
+
+    def test_feeds_use_indexes(self):
+        """Все запросы лент читаются по индексам"""
+        out = StringIO()
+        call_command('check_feed_plans', stdout=out)
+        self.assertNotIn('TEMP B-TREE', out.getvalue())
+
+    def test_sort_without_index_fails(self):
+        """Запрос с сортировкой без индекса роняет команду"""
+        feeds = [('text', Post.objects.order_by('text'))]
+        with mock.patch(
+            'posts.management.commands.check_feed_plans.feed_querysets',
+            return_value=feeds,
+        ):
+            with self.assertRaises(CommandError):
+                call_command('check_feed_plans', stdout=StringIO())
+
+
+class RecountPostsTests(TestCase):
+    """Проверка команды recount_posts"""
+
+    def test_recount_fixes_bulk_created_posts(self):
+        """Команда пересчитывает счётчики после bulk_create"""
+        user = User.objects.create_user(username='author')
+        group = Group.objects.create(title='Group', slug='group')
+        Post.objects.bulk_create(
+            Post(author=user, group=group, text='Пост') for i in range(3)
+        )
+        call_command('recount_posts', batch_size=1, stdout=StringIO())
+        user.profile.refresh_from_db()
+        group.refresh_from_db()
+        self.assertEqual(user.profile.posts_count, 3)
+        self.assertEqual(group.posts_count, 3)
+
+
+class ImportPostsTests(TestCase):
+    """Проверка команды import_posts"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Group', slug='group')
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'posts.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def write_jsonl(self, records):
+        with open(self.path, 'w', encoding='utf-8') as file:
+            for record in records:
+                file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def test_import_validates_rows_and_updates_counters(self):
+        """Корректные записи загружаются с датой источника, ошибки - нет"""
+        self.write_jsonl([
+            {
+                'text': 'Старый пост',
+                'author': 'author',
+                'group': 'group',
+                'pub_date': '2015-03-01T10:00:00Z',
+            },
+            {'text': 'Пост без группы', 'author': 'author'},
+            {'text': '', 'author': 'author'},
+            {'text': 'Чужой пост', 'author': 'nobody'},
+            {'text': 'Пост', 'author': 'author', 'pub_date': 'вчера'},
+        ])
+        err = StringIO()
+        call_command('import_posts', self.path, chunk_size=2,
+                     stdout=StringIO(), stderr=err)
+
+        self.assertEqual(Post.objects.count(), 2)
+        old_post = Post.objects.get(text='Старый пост')
+        self.assertEqual(old_post.pub_date.year, 2015)
+        self.assertEqual(old_post.group, self.group)
+        self.assertEqual(len(err.getvalue().splitlines()), 3)
+        self.assertIn('Запись 4: Неизвестный автор: nobody', err.getvalue())
+        self.user.profile.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertEqual(self.user.profile.posts_count, 2)
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertEqual(
+            ImportCheckpoint.objects.get(source=self.path).position,
+            5,
+        )
+
+    def test_import_resumes_after_crash(self):
+        """После сбоя загрузка продолжается с непрочитанной пачки"""
+        self.write_jsonl([
+            {'text': f'Пост {i}', 'author': 'author'} for i in range(5)
+        ])
+        bulk_create = Post.objects.bulk_create
+        calls = []
+
+        def crash_on_second_chunk(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError('Сбой')
+            return bulk_create(*args, **kwargs)
+
+        with mock.patch.object(
+            Post.objects,
+            'bulk_create',
+            side_effect=crash_on_second_chunk,
+        ):
+            with self.assertRaises(RuntimeError):
+                call_command('import_posts', self.path, chunk_size=2,
+                             stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 2)
+
+        out = StringIO()
+        call_command('import_posts', self.path, chunk_size=2, stdout=out)
+        self.assertIn('Продолжаем с записи 3', out.getvalue())
+        self.assertEqual(
+            sorted(Post.objects.values_list('text', flat=True)),
+            [f'Пост {i}' for i in range(5)],
+        )
+
+    def test_import_csv_from_stdin(self):
+        """CSV читается из stdin"""
+        stdin = StringIO(
+            'text,author,group\n'
+            'Пост из CSV,author,group\n'
+        )
+        call_command('import_posts', '-', format='csv', stdin=stdin,
+                     stdout=StringIO())
+        self.assertTrue(
+            Post.objects.filter(text='Пост из CSV', group=self.group).exists()
+        )
+
+
+class ExportPostsTests(TestCase):
+    """Проверка команды export_posts"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(title='Group', slug='group')
+        Post.objects.bulk_create(
+            Post(author=cls.user, group=cls.group, text=f'Пост {i}')
+            for i in range(5)
+        )
+        Post.objects.create(author=cls.other, text='Пост без группы')
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_export_reads_in_chunks_and_imports_back(self):
+        """Выгрузка идёт пачками, и import_posts загружает её обратно"""
+        path = os.path.join(self.tmp_dir, 'posts.jsonl')
+        with self.assertNumQueries(4):
+            call_command('export_posts', output=path, chunk_size=2)
+        with open(path, encoding='utf-8') as file:
+            rows = [json.loads(line) for line in file]
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[-1]['author'], 'other')
+        self.assertEqual(rows[0]['group'], 'group')
+
+        Post.objects.all().delete()
+        call_command('import_posts', path, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 6)
+        response = self.client.get(reverse('posts:search'), {'q': 'пост'})
+        self.assertEqual(response.context['page_obj'].paginator.count, 6)
+
+    def test_export_csv_gzip_with_filters(self):
+        """CSV в gzip с фильтром по сообществу"""
+        path = os.path.join(self.tmp_dir, 'posts.csv.gz')
+        call_command('export_posts', output=path, format='csv', gzip=True,
+                     group='group')
+        with gzip.open(path, 'rt', encoding='utf-8', newline='') as file:
+            rows = list(csv.DictReader(file))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual({row['group'] for row in rows}, {'group'})
+
+    def test_export_to_stdout(self):
+        """Без --output выгрузка идёт в переданный stdout"""
+        stdout = BytesIO()
+        call_command('export_posts', stdout=stdout, author='other')
+        rows = stdout.getvalue().decode('utf-8').splitlines()
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(json.loads(rows[0])['text'], 'Пост без группы')
+
+    def test_invalid_options(self):
+        """Неверные параметры выгрузки роняют команду"""
+        with self.assertRaises(CommandError):
+            call_command('export_posts', format='xml')
+
+
+class BenchmarkTests(TestCase):
+    """Проверка команды benchmark"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_seed_and_measure_every_page(self):
+        """Прогон заполняет базу и замеряет все страницы без ошибок"""
+        output = os.path.join(self.tmp_dir, 'bench.json')
+        call_command(
+            'benchmark', '--seed', '--scratch', '--posts', '30',
+            '--authors', '3', '--groups', '2', '--workers', '1',
+            '--mode', 'inprocess', '--requests', '2', '--warmup', '0',
+            '--output', output,
+            stdout=StringIO(),
+        )
+        with open(output, encoding='utf-8') as stream:
+            report = json.load(stream)
+
+        self.assertEqual(report['dataset']['posts'], 30)
+        self.assertEqual(Post.objects.count(), 30)
+        results = report['results']['inprocess']
+        for name in ('index_last', 'group_list_cursor', 'profile_middle',
+                     'post_detail', 'post_create_submit', 'post_edit'):
+            with self.subTest(name=name):
+                self.assertLess(max(results[name]['status']), 400)
+                self.assertGreater(results[name]['queries'], 0)
+                self.assertLessEqual(
+                    results[name]['p50_ms'], results[name]['p99_ms'],
+                )
+
+    def test_writes_require_scratch(self):
+        """Без --scratch команда не пишет в базу"""
+        with self.assertRaises(CommandError):
+            call_command('benchmark', '--seed', stdout=StringIO())
+        self.assertFalse(Post.objects.exists())
+
+        author = User.objects.create_user(username='author')
+        Post.objects.create(author=author, text='Пост')
+        output = os.path.join(self.tmp_dir, 'bench.json')
+        call_command(
+            'benchmark', '--mode', 'inprocess', '--requests', '1',
+            '--warmup', '0', '--output', output, stdout=StringIO(),
+        )
+        with open(output, encoding='utf-8') as stream:
+            results = json.load(stream)['results']['inprocess']
+        self.assertIn('post_edit', results)
+        self.assertNotIn('post_create_submit', results)
+        self.assertNotIn('post_edit_submit', results)
+        self.assertEqual(Post.objects.count(), 1)
+
+
+class SeedTests(TestCase):
+    """Проверка команды seed"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_seed_creates_consistent_data(self):
+        """Посты, счётчики, картинки и поисковый индекс согласованы"""
+        with override_settings(MEDIA_ROOT=self.tmp_dir):
+            call_command(
+                'seed', '--users', '20', '--groups', '3', '--posts', '300',
+                '--images', '2', '--image-share', '0.5', '--workers', '1',
+                '--batch-size', '100', stdout=StringIO(),
+            )
+
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Post.objects.count(), 300)
+        posts = list(Post.objects.order_by('pk'))
+        self.assertEqual(
+            [post.pub_date for post in posts],
+            sorted(post.pub_date for post in posts),
+        )
+        images = {post.image.name for post in posts if post.image}
+        self.assertEqual(len(images), 2)
+        for name in images:
+            self.assertTrue(os.path.exists(os.path.join(self.tmp_dir, name)))
+
+        for group in Group.objects.annotate(total=Count('posts')):
+            self.assertEqual(group.posts_count, group.total)
+        profiles = Profile.objects.annotate(total=Count('user__posts'))
+        self.assertEqual(profiles.count(), 20)
+        for profile in profiles:
+            self.assertEqual(profile.posts_count, profile.total)
+        # Активность авторов по Ципфу: первый пишет больше всех
+        top = profiles.order_by('-posts_count', 'user_id').first()
+        self.assertEqual(top.user_id, User.objects.order_by('pk')[0].pk)
+
+        for post in posts[::50]:
+            with self.subTest(post=post.pk):
+                self.assertTrue(Post.objects.filter(
+                    pk=post.pk,
+                ).filter(pk__in=matching_ids(post.text)).exists())
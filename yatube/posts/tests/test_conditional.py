@@ -0,0 +1,102 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..lookups import authors, groups
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TransactionTestCase):
+    """Проверка ETag и Last-Modified у лент и постов"""
+
+    def setUp(self):
+        cache.clear()
+        groups.clear()
+        authors.clear()
+        self.user = User.objects.create_user(username='author')
+        self.group = Group.objects.create(title='Group', slug='group')
+        self.post = Post.objects.create(
+            author=self.user,
+            group=self.group,
+            text='Пост',
+        )
+        self.pages = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=('group',)),
+            reverse('posts:profile', args=('author',)),
+            reverse('posts:post_detail', args=(self.post.pk,)),
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_pages_are_not_modified(self):
+        """Повторный запрос без изменений получает 304 без выборки страницы"""
+        for url in self.pages:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn('Last-Modified', response)
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.revalidate(url, response)
+                self.assertEqual(response.status_code, 304)
+                # Только запросы валидаторов: ни постов, ни шаблонов
+                self.assertFalse(response.templates)
+                for query in queries.captured_queries:
+                    self.assertNotIn('"posts_post"."text"', query['sql'])
+                    # Сообщество и автор берутся из кэша lookups
+                    self.assertNotIn('FROM "posts_group"', query['sql'])
+                    self.assertNotIn('FROM "auth_user"', query['sql'])
+
+    def test_changes_update_validators(self):
+        """Правка поста и переименование сообщества меняют ETag"""
+        responses = {url: self.client.get(url) for url in self.pages}
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        for url, response in responses.items():
+            with self.subTest(url=url):
+                self.assertEqual(self.revalidate(url, response).status_code,
+                                 200)
+
+        index = reverse('posts:index')
+        response = self.client.get(index)
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertEqual(self.revalidate(index, response).status_code, 200)
+
+        response = self.client.get(index)
+        Post.objects.create(author=self.user, text='Новый пост')
+        self.assertEqual(self.revalidate(index, response).status_code, 200)
+
+    def test_if_modified_since(self):
+        """Страница без правок не отдаётся заново по If-Modified-Since"""
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        response = self.client.get(
+            url,
+            HTTP_IF_MODIFIED_SINCE=self.client.get(url)['Last-Modified'],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_validators_differ_per_user(self):
+        """Авторизованный пользователь не получает ETag анонима"""
+        url = reverse('posts:index')
+        response = self.client.get(url)
+        self.client.force_login(self.user)
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_missing_objects_are_not_found(self):
+        """Для несуществующих страниц валидаторов нет - вью отдаёт 404"""
+        for url in (
+            reverse('posts:group_list', args=('missing',)),
+            reverse('posts:profile', args=('missing',)),
+            reverse('posts:post_detail', args=(self.post.pk + 1,)),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
@@ -74,3 +74,30 @@ class FormsTests(TestCase):
             form_data['group'],
         )
         self.assertEqual(Post.objects.get(id=self.post.id).author, self.user)
+
+    def test_post_counters_follow_create_edit_and_delete(self):
+        """Счётчики постов автора и сообществ следуют за публикациями"""
+        other_group = Group.objects.create(title='Other', slug='other')
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост для счётчиков', 'group': self.group.id},
+        )
+        self.user.profile.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertEqual(self.user.profile.posts_count, 2)
+        self.assertEqual(self.group.posts_count, 2)
+
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+            data={'text': 'Другая группа', 'group': other_group.id},
+        )
+        self.group.refresh_from_db()
+        other_group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertEqual(other_group.posts_count, 1)
+
+        Post.objects.get(id=self.post.id).delete()
+        self.user.profile.refresh_from_db()
+        other_group.refresh_from_db()
+        self.assertEqual(self.user.profile.posts_count, 1)
+        self.assertEqual(other_group.posts_count, 0)
@@ -0,0 +1,120 @@
+import warnings
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import CacheKeyWarning, cache
+from django.http import Http404
+from django.test import TestCase, override_settings
+
+from ..lookups import LookupCache, authors, groups
+from ..models import Group
+
+User = get_user_model()
+
+
+class LookupCacheTests(TestCase):
+    """Проверка кэша сообществ и авторов в памяти процесса"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='group',
+            description='Описание',
+        )
+        cls.user = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+        groups.clear()
+        authors.clear()
+
+    def test_repeated_lookup_skips_db(self):
+        """Повторный поиск не ходит в БД"""
+        with self.assertNumQueries(1):
+            groups.get_or_404('group')
+        with self.assertNumQueries(0):
+            group = groups.get_or_404('group')
+        self.assertEqual(group, self.group)
+        with self.assertNumQueries(1):
+            authors.get_or_404('author')
+        with self.assertNumQueries(0):
+            author = authors.get_or_404('author')
+        self.assertEqual(author.profile.posts_count, 0)
+
+    def test_hits_are_independent_copies(self):
+        """Правка полученного объекта не портит кэш"""
+        groups.get_or_404('group').title = 'Испорчено'
+        self.assertEqual(groups.get_or_404('group').title, 'Группа')
+
+    def test_unknown_slug_is_cached_until_created(self):
+        """Ненайденный slug запоминается до создания сообщества"""
+        with self.assertNumQueries(1), self.assertRaises(Http404):
+            groups.get_or_404('new')
+        with self.assertNumQueries(0), self.assertRaises(Http404):
+            groups.get_or_404('new')
+
+        Group.objects.create(title='Новая', slug='new', description='')
+        self.assertEqual(groups.get_or_404('new').title, 'Новая')
+
+    def test_non_ascii_names_make_valid_cache_keys(self):
+        """Имена не ASCII не дают предупреждений о ключах кэша"""
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            with self.assertRaises(Http404):
+                groups.get_or_404('группа ' * 40)
+            User.objects.create_user(username='лев_толстой')
+            authors.get_or_404('лев_толстой')
+        self.assertFalse([
+            warning for warning in caught
+            if issubclass(warning.category, CacheKeyWarning)
+        ])
+
+    def test_change_during_load_is_not_cached(self):
+        """Объект, сменившийся во время загрузки, не запоминается"""
+        load = groups._load
+
+        def load_and_change(value):
+            obj = load(value)
+            groups.invalidate(pk=obj.pk)
+            return obj
+
+        with mock.patch.object(groups, '_load', load_and_change):
+            groups.get_or_404('group')
+        with self.assertNumQueries(1):
+            groups.get_or_404('group')
+        with self.assertNumQueries(0):
+            groups.get_or_404('group')
+
+    def test_rename_invalidates_entry(self):
+        """Переименование сбрасывает запись по старому имени"""
+        user = User.objects.get(pk=self.user.pk)
+        authors.get_or_404('author')
+        user.username = 'renamed'
+        user.save()
+        with self.assertRaises(Http404):
+            authors.get_or_404('author')
+        self.assertEqual(authors.get_or_404('renamed').pk, user.pk)
+
+    def test_last_login_keeps_entry(self):
+        """Обновление last_login не сбрасывает запись автора"""
+        user = User.objects.get(pk=self.user.pk)
+        authors.get_or_404('author')
+        user.save(update_fields=['last_login'])
+        with self.assertNumQueries(0):
+            authors.get_or_404('author')
+
+    def test_invalidation_from_other_process(self):
+        """Версия в общем кэше сбрасывает записи других процессов"""
+        groups.get_or_404('group')
+        # Кэш того же имени в другом процессе
+        other = LookupCache('group', Group.objects.all, 'slug')
+        Group.objects.filter(pk=self.group.pk).update(title='Изменена')
+        other.invalidate(self.group.pk)
+        self.assertEqual(groups.get_or_404('group').title, 'Изменена')
+
+    @override_settings(POSTS_LOOKUP_CACHE_ENABLED=False)
+    def test_disabled_cache_always_queries(self):
+        groups.get_or_404('group')
+        with self.assertNumQueries(1):
+            groups.get_or_404('group')
@@ -0,0 +1,150 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from sorl.thumbnail import get_thumbnail
+
+from ..media import collect_garbage
+from ..models import MediaFile, Post
+from ..storage import HASHED_NAME
+from .test_thumbnails import uploaded_gif
+
+User = get_user_model()
+
+
+@override_settings(POSTS_THUMBNAILS_PREGENERATE=False)
+class HashedMediaTests(TestCase):
+    """Проверка хранилища картинок по хэшу и подсчёта ссылок"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+
+    def create_post(self, name='small.gif'):
+        return Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=uploaded_gif(name),
+        )
+
+    def references(self, name):
+        return MediaFile.objects.get(name=name).references
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(self.media_root, name))
+
+    def test_identical_uploads_share_file(self):
+        """Одинаковые загрузки лежат в одном файле по хэшу"""
+        first = self.create_post()
+        second = self.create_post()
+        other = self.create_post('other.gif')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertNotEqual(first.image.name, other.image.name)
+        self.assertRegex(first.image.name, HASHED_NAME)
+        self.assertTrue(first.image.name.startswith('posts/'))
+        self.assertTrue(self.exists(first.image.name))
+        self.assertEqual(self.references(first.image.name), 2)
+
+    def test_references_follow_posts(self):
+        """Ссылки считаются при смене картинки и удалении поста"""
+        first = self.create_post()
+        second = self.create_post()
+        name = first.image.name
+
+        second = Post.objects.get(pk=second.pk)
+        second.image = uploaded_gif('other.gif')
+        second.save()
+        self.assertEqual(self.references(name), 1)
+        self.assertEqual(self.references(second.image.name), 1)
+
+        first.delete()
+        self.assertEqual(self.references(name), 0)
+
+    def test_collect_removes_unreferenced_files(self):
+        """collect_media удаляет файлы без ссылок вместе с миниатюрами"""
+        kept = self.create_post()
+        removed = self.create_post('other.gif')
+        name = removed.image.name
+        thumbnail = get_thumbnail(removed.image, '10x10')
+        self.assertTrue(self.exists(thumbnail.name))
+        removed.delete()
+
+        call_command('collect_media', stdout=StringIO())
+        self.assertTrue(self.exists(name))
+
+        out = StringIO()
+        call_command('collect_media', '--grace', '0', stdout=out)
+        self.assertIn('Удалено файлов: 1', out.getvalue())
+        self.assertFalse(self.exists(name))
+        self.assertFalse(self.exists(thumbnail.name))
+        self.assertTrue(self.exists(kept.image.name))
+        self.assertFalse(MediaFile.objects.filter(name=name).exists())
+
+    def test_recount_and_orphans(self):
+        """Пересчёт чинит ссылки, обход хранилища находит ничейные файлы"""
+        post = self.create_post()
+        MediaFile.objects.update(references=5)
+        storage = Post._meta.get_field('image').storage
+        orphan = storage.save('posts/orphan.gif', ContentFile(b'orphan'))
+
+        call_command(
+            'collect_media', '--recount', '--orphans', '--grace', '0',
+            stdout=StringIO(),
+        )
+        self.assertEqual(self.references(post.image.name), 1)
+        self.assertTrue(self.exists(post.image.name))
+        self.assertFalse(self.exists(orphan))
+
+    def test_reupload_postpones_collection(self):
+        """Повторная загрузка файла, ждущего удаления, его сохраняет"""
+        post = self.create_post()
+        name = post.image.name
+        post.delete()
+        hour_ago = time.time() - 60 * 60
+        os.utime(os.path.join(self.media_root, name), (hour_ago, hour_ago))
+        MediaFile.objects.update(
+            updated=timezone.now() - timedelta(hours=1),
+        )
+
+        # Форма уже сохранила файл, а пост ещё не записан
+        storage = Post._meta.get_field('image').storage
+        self.assertEqual(storage.save('posts/small.gif', uploaded_gif()), name)
+        self.assertEqual(collect_garbage(grace=60), 0)
+        self.assertTrue(self.exists(name))
+
+    def test_import_counts_references(self):
+        """import_posts считает ссылки на картинки загруженных постов"""
+        name = self.create_post().image.name
+        path = os.path.join(self.media_root, 'posts.jsonl')
+        with open(path, 'w', encoding='utf-8') as stream:
+            for number in range(2):
+                stream.write(json.dumps({
+                    'text': f'Импорт {number}',
+                    'author': 'author',
+                    'image': name,
+                }) + '\n')
+
+        call_command('import_posts', path, stdout=StringIO())
+        self.assertEqual(self.references(name), 3)
@@ -0,0 +1,179 @@
+from unittest import mock
+
+from core.jobs import work
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..constants import KEYSET_PAGE_THRESHOLD, POSTS_LIMIT
+from ..counts import estimate_count, get_feed_count
+from ..feeds import GLOBAL_FEED, author_feed
+from ..models import Post
+from ..paginators import ElidedPageRangeMixin, decode_cursor
+
+User = get_user_model()
+POSTS_COUNT = POSTS_LIMIT * (KEYSET_PAGE_THRESHOLD + 2) + 3
+
+
+class KeysetPaginatorTests(TestCase):
+    """Проверка постраничного вывода лент курсором"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}')
+            for i in range(POSTS_COUNT)
+        )
+        cls.posts = list(Post.objects.order_by('-pub_date', 'id'))
+
+    def get_page(self, query=''):
+        response = self.client.get(reverse('posts:index') + query)
+        return response.context['page_obj']
+
+    def test_last_shallow_page_links_to_cursor(self):
+        """С последней страницы по номеру ссылка ведёт на курсор"""
+        page_obj = self.get_page(f'?page={KEYSET_PAGE_THRESHOLD}')
+        self.assertTrue(page_obj.next_query.startswith('cursor='))
+        self.assertIsNotNone(decode_cursor(page_obj.next_query[7:]))
+
+    def test_cursor_pages_walk_whole_feed(self):
+        """Переходы курсором вперёд и назад проходят ленту без пропусков"""
+        page_obj = self.get_page(f'?page={KEYSET_PAGE_THRESHOLD}')
+        seen = list(page_obj)
+        while page_obj.has_next():
+            page_obj = self.get_page('?' + page_obj.next_query)
+            self.assertTrue(page_obj.is_cursor)
+            seen.extend(page_obj)
+        start = POSTS_LIMIT * (KEYSET_PAGE_THRESHOLD - 1)
+        self.assertEqual(seen, self.posts[start:])
+
+        previous = self.get_page('?' + page_obj.previous_query)
+        self.assertEqual(
+            list(previous),
+            self.posts[-POSTS_LIMIT - 3:-3],
+        )
+
+    def test_page_links_are_elided(self):
+        """Пагинатор показывает края ленты и страницы рядом с текущей"""
+        page_obj = self.get_page()
+        self.assertEqual(
+            list(page_obj.elided_page_range),
+            [1, 2, 3, 4, '…', 12, 13],
+        )
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'page=13')
+        self.assertNotContains(response, 'page=11"')
+
+    def test_broken_cursor_returns_first_page(self):
+        """Битый курсор отдаёт первую страницу"""
+        page_obj = self.get_page('?cursor=not-a-cursor')
+        self.assertEqual(page_obj.number, 1)
+        self.assertEqual(list(page_obj), self.posts[:POSTS_LIMIT])
+
+
+@mock.patch('posts.counts.COUNT_CACHE_THRESHOLD', 3)
+class FeedCountTests(TransactionTestCase):
+    """Проверка кэшируемых счётчиков лент"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author')
+        for i in range(3):
+            Post.objects.create(author=self.user, text=f'Пост {i}')
+
+    def tearDown(self):
+        cache.clear()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE name = 'sqlite_stat1'"
+            )
+            if cursor.fetchone():
+                cursor.execute('DELETE FROM sqlite_stat1')
+
+    def test_count_is_cached_and_follows_signals(self):
+        """Счётчик берётся из кэша и сдвигается при создании и удалении"""
+        feed = author_feed(self.user.pk)
+        self.assertEqual(get_feed_count(feed, self.user.posts.all()), 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_feed_count(feed, self.user.posts.all()), 3)
+
+        post = Post.objects.create(author=self.user, text='Ещё пост')
+        self.assertEqual(get_feed_count(feed, self.user.posts.all()), 4)
+        post.delete()
+        self.assertEqual(get_feed_count(feed, self.user.posts.all()), 3)
+
+    def test_counter_is_trusted(self):
+        """Денормализованный счётчик отдаётся без запросов и кэша"""
+        feed = author_feed(self.user.pk)
+        self.user.profile.refresh_from_db()
+        counter = self.user.profile.posts_count
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                get_feed_count(feed, self.user.posts.all(), counter), 3,
+            )
+
+    @mock.patch('posts.counts.COUNT_CACHE_THRESHOLD', 1000)
+    def test_feed_is_counted_once_per_request(self):
+        """Валидаторы и пагинатор делят один подсчёт ленты"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('posts:index'))
+        counts = [
+            query for query in queries.captured_queries
+            if 'COUNT(' in query['sql']
+        ]
+        self.assertEqual(len(counts), 1)
+
+    def test_cold_cache_uses_estimate(self):
+        """Без кэша размер большой ленты оценивается по статистике"""
+        self.assertIsNone(estimate_count(GLOBAL_FEED))
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.assertEqual(estimate_count(GLOBAL_FEED), 3)
+        self.assertIsNone(estimate_count(author_feed(self.user.pk)))
+
+    def test_estimate_is_replaced_by_exact_count(self):
+        """Устаревшую оценку заменяет точный подсчёт в фоне"""
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Без сигналов {i}') for i in range(2)
+        )
+        self.assertEqual(get_feed_count(GLOBAL_FEED, Post.objects.all()), 3)
+
+        work(once=True)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                get_feed_count(GLOBAL_FEED, Post.objects.all()), 5,
+            )
+
+
+class ListPaginator(ElidedPageRangeMixin, Paginator):
+    pass
+
+
+class ElidedPageRangeTests(SimpleTestCase):
+    """Проверка сокращённого списка страниц"""
+
+    def get_range(self, count, number):
+        paginator = ListPaginator(range(count), POSTS_LIMIT)
+        return list(paginator.get_elided_page_range(number))
+
+    def test_short_feed_lists_all_pages(self):
+        self.assertEqual(self.get_range(50, 3), [1, 2, 3, 4, 5])
+
+    def test_links_count_does_not_depend_on_feed_size(self):
+        """Число ссылок не растёт вместе с лентой"""
+        for count in (10 ** 4, 10 ** 6):
+            with self.subTest(count=count):
+                pages = count // POSTS_LIMIT
+                self.assertEqual(
+                    self.get_range(count, pages // 2),
+                    [1, 2, '…', *range(pages // 2 - 3, pages // 2 + 4),
+                     '…', pages - 1, pages],
+                )
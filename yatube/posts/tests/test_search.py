@@ -0,0 +1,126 @@
+from io import StringIO
+
+from core.jobs import work
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from ..constants import POSTS_LIMIT
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    """Проверка полнотекстового поиска по постам"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='tolstoy',
+            first_name='Лев',
+            last_name='Толстой',
+        )
+        cls.other = User.objects.create_user(username='chekhov')
+        cls.group = Group.objects.create(title='Классика', slug='classics')
+        cls.war = Post.objects.create(
+            author=cls.user,
+            group=cls.group,
+            text='Война и мир',
+        )
+        cls.cherry = Post.objects.create(
+            author=cls.other,
+            text='Вишнёвый сад, и снова сад',
+        )
+        # Индекс обновляют фоновые задачи
+        work(once=True)
+
+    def search(self, query, page=None):
+        params = {'q': query}
+        if page:
+            params['page'] = page
+        response = self.client.get(reverse('posts:search'), params)
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_search_by_text_group_and_author(self):
+        """Ищутся слова и префиксы текста, сообщества и автора"""
+        cases = {
+            'война': [self.war.pk],
+            'вишн': [self.cherry.pk],
+            'классика': [self.war.pk],
+            'Толстой мир': [self.war.pk],
+            'chekhov': [self.cherry.pk],
+            'пушкин': [],
+            '"*': [],
+        }
+        for query, expected in cases.items():
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query), expected)
+
+    def test_index_follows_changes(self):
+        """Правка поста, сообщества и автора попадает в индекс"""
+        post = Post.objects.get(pk=self.war.pk)
+        post.text = 'Анна Каренина'
+        post.save()
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Романы'
+        group.save()
+        other = User.objects.get(pk=self.other.pk)
+        other.first_name = 'Антон'
+        other.save()
+        work(once=True)
+        self.assertEqual(self.search('каренина романы'), [post.pk])
+        self.assertEqual(self.search('антон'), [self.cherry.pk])
+
+        group.delete()
+        self.assertEqual(self.search('романы'), [])
+        post.delete()
+        work(once=True)
+        self.assertEqual(self.search('каренина'), [])
+
+    def test_rebuild_command(self):
+        """rebuild_search_index индексирует записи в обход сигналов"""
+        Post.objects.filter(pk=self.war.pk).update(text='Анна Каренина')
+        self.assertEqual(self.search('каренина'), [])
+        call_command('rebuild_search_index', batch_size=1, stdout=StringIO())
+        self.assertEqual(self.search('каренина'), [self.war.pk])
+        self.assertEqual(self.search('вишнёвый'), [self.cherry.pk])
+
+    def test_results_are_ranked_and_paginated(self):
+        """Релевантные посты выше, страницы сохраняют запрос"""
+        self.assertEqual(self.search('сад'), [self.cherry.pk])
+        for i in range(POSTS_LIMIT):
+            Post.objects.create(author=self.other, text=f'Сад {i}')
+        Post.objects.create(author=self.other, text='сад сад сад')
+        work(once=True)
+        first_page = self.search('сад')
+        self.assertEqual(len(first_page), POSTS_LIMIT)
+        self.assertEqual(len(self.search('сад', page=2)), 2)
+        self.assertEqual(
+            Post.objects.get(pk=first_page[0]).text,
+            'сад сад сад',
+        )
+
+        response = self.client.get(reverse('posts:search'), {'q': 'сад'})
+        self.assertContains(response, '?q=%D1%81%D0%B0%D0%B4&amp;page=2')
+
+    def admin_search(self, query):
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password',
+        )
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'),
+            {'q': query},
+        )
+        self.assertEqual(response.status_code, 200)
+        return [post.pk for post in response.context['cl'].result_list]
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке находит посты по индексу"""
+        self.assertEqual(self.admin_search('толстой'), [self.war.pk])
+
+    def test_admin_search_without_words(self):
+        """Запрос без слов в админке ничего не находит и не падает"""
+        self.assertEqual(self.admin_search('!!!'), [])
@@ -0,0 +1,166 @@
+import hashlib
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from ..constants import POSTS_LIMIT, THUMBNAIL_GEOMETRIES
+from ..kvstore import PrefetchingKVStore
+from ..models import Post
+from ..thumbnails import generate_thumbnails, prefetch_thumbnails
+
+User = get_user_model()
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+def uploaded_gif(name='small.gif'):
+    # Первый цвет палитры зависит от имени: хранилище хранит одинаковые
+    # картинки одним файлом, а тестам нужны разные
+    color = hashlib.md5(name.encode()).digest()[:3]
+    content = SMALL_GIF[:13] + color + SMALL_GIF[16:]
+    return SimpleUploadedFile(name, content, content_type='image/gif')
+
+
+class ThumbnailPipelineTests(TransactionTestCase):
+    """Проверка фоновой подготовки миниатюр"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='author')
+
+    @mock.patch('posts.signals.queue_thumbnails')
+    def test_upload_queues_thumbnails(self, queue_thumbnails):
+        """Миниатюры ставятся в очередь только при смене картинки"""
+        post = Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=uploaded_gif(),
+        )
+        self.assertEqual(queue_thumbnails.call_count, 1)
+
+        post = Post.objects.get(pk=post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        self.assertEqual(queue_thumbnails.call_count, 1)
+
+        post.image = uploaded_gif('other.gif')
+        post.save()
+        self.assertEqual(queue_thumbnails.call_count, 2)
+
+    @override_settings(POSTS_THUMBNAILS_PREGENERATE=False)
+    def test_command_generates_thumbnails(self):
+        """Команда generate_thumbnails готовит миниатюры всех размеров"""
+        post = Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=uploaded_gif(),
+        )
+        call_command('generate_thumbnails', workers=2, stdout=StringIO())
+        source = default.kvstore.get(ImageFile(post.image))
+        thumbnails = default.kvstore._get(source.key, identity='thumbnails')
+        self.assertEqual(len(thumbnails), len(THUMBNAIL_GEOMETRIES))
+
+
+@override_settings(POSTS_THUMBNAILS_PREGENERATE=False)
+class ThumbnailPrefetchTests(TransactionTestCase):
+    """Проверка пакетной загрузки записей о миниатюрах"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        default.kvstore.clear()
+        user = User.objects.create_user(username='author')
+        for i in range(POSTS_LIMIT):
+            post = Post.objects.create(
+                author=user,
+                text=f'Пост {i}',
+                image=uploaded_gif(f'small_{i}.gif'),
+            )
+            generate_thumbnails(post.image)
+        self.posts = list(Post.objects.all())
+
+    def tearDown(self):
+        cache.clear()
+        default.kvstore.clear()
+
+    def forget_recent(self):
+        """Имитирует новый процесс: пустой LRU и пустой кэш"""
+        PrefetchingKVStore._recent.clear()
+        cache.clear()
+
+    def test_prefetch_feeds_template_tags(self):
+        """Записи всей страницы грузятся одним запросом, теги их не ищут"""
+        self.forget_recent()
+        with self.assertNumQueries(1):
+            prefetch_thumbnails(self.posts)
+        geometry, options = THUMBNAIL_GEOMETRIES[0]
+        with self.assertNumQueries(0):
+            for post in self.posts:
+                get_thumbnail(post.image, geometry, **options)
+
+        self.forget_recent()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('posts:index'))
+        kvstore_queries = [
+            query for query in queries.captured_queries
+            if 'thumbnail_kvstore' in query['sql']
+        ]
+        self.assertEqual(len(kvstore_queries), 1)
+
+    @mock.patch('posts.kvstore.THUMBNAIL_LRU_SIZE', 3)
+    def test_recent_records_are_bounded(self):
+        """LRU хранит не больше заданного числа записей"""
+        self.forget_recent()
+        prefetch_thumbnails(self.posts)
+        self.assertEqual(len(PrefetchingKVStore._recent), 3)
+
+    @mock.patch('posts.kvstore.THUMBNAIL_LRU_TTL', -1)
+    def test_recent_records_expire(self):
+        """Устаревшая запись LRU не читается: её мог удалить другой процесс"""
+        self.forget_recent()
+        prefetch_thumbnails(self.posts)
+        key = next(iter(PrefetchingKVStore._recent))
+        self.assertIsNone(default.kvstore._recall(key))
+        self.assertNotIn(key, PrefetchingKVStore._recent)
@@ -208,3 +208,27 @@ class PostsPagesTests(TestCase):
             post,
             response.context.get('page_obj').object_list,
         )
+
+    def test_export_is_staff_only_stream(self):
+        """Выгрузка постов доступна только персоналу и отдаётся потоком"""
+        url = reverse('posts:export')
+        response = self.authorized_client.get(url)
+        self.assertEqual(response.status_code, 302)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.authorized_client.get(url, {'group': self.group.slug})
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual(
+            len(lines),
+            Post.objects.filter(group=self.group).count(),
+        )
+        response = self.authorized_client.get(
+            url, {'format': 'csv', 'gzip': 'on'},
+        )
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('filename="posts.csv.gz"',
+                      response['Content-Disposition'])
+        response = self.authorized_client.get(url, {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,97 @@
+from core.instrumentation import timed
+from core.jobs import enqueue
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from .constants import THUMBNAIL_GEOMETRIES
+from .models import Post
+
+
+class TimedThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl-thumbnail, замеряющий время создания миниатюр"""
+
+    def _create_thumbnail(self, *args, **kwargs):
+        with timed('thumbnail_time'):
+            return super()._create_thumbnail(*args, **kwargs)
+
+
+def generate_thumbnails(image):
+    """Готовит миниатюры картинки во всех размерах из шаблонов"""
+    for geometry, options in THUMBNAIL_GEOMETRIES:
+        get_thumbnail(image, geometry, **options)
+
+
+def field_file(name):
+    """Файл картинки поста по имени в хранилище.
+
+    FieldFile, а не строка: sorl-thumbnail ищет миниатюры по хранилищу
+    поля, по строке он искал бы в своём.
+    """
+    field = Post._meta.get_field('image')
+    return field.attr_class(None, field, name)
+
+
+def queue_thumbnails(image):
+    """Ставит подготовку миниатюр в очередь фоновых задач"""
+    return enqueue(
+        'posts.generate_thumbnails',
+        image.name,
+        key=f'thumbnails:{image.name}',
+    )
+
+
+def thumbnail_file(image, geometry, **options):
+    """ImageFile миниатюры, которую вернёт get_thumbnail, без обращения
+    к хранилищу: имя собирается так же, как в ThumbnailBackend
+    """
+    backend = default.backend
+    source = ImageFile(image)
+    if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(thumbnail_settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+
+    name = backend._get_thumbnail_filename(source, geometry, options)
+    return ImageFile(name, default.storage)
+
+
+def prefetch_images(images):
+    """Загружает записи о миниатюрах картинок за один проход"""
+    prefetch = getattr(default.kvstore, 'prefetch', None)
+    if prefetch is None:
+        return
+
+    prefetch([
+        thumbnail_file(image, geometry, **options)
+        for image in images
+        if image
+        for geometry, options in THUMBNAIL_GEOMETRIES
+    ])
+
+
+def prefetch_thumbnails(posts):
+    """Загружает записи о миниатюрах постов страницы за один проход"""
+    prefetch_images(post.image for post in posts)
+
+
+def thumbnail_url(image):
+    """Адрес миниатюры картинки поста, как в шаблонах.
+
+    Миниатюру здесь не рисуем: пока её нет, отдаём адрес оригинала и
+    ставим подготовку в очередь.
+    """
+    geometry, options = THUMBNAIL_GEOMETRIES[0]
+    thumbnail = default.kvstore.get(
+        thumbnail_file(image, geometry, **options),
+    )
+    if thumbnail is None:
+        queue_thumbnails(image)
+        return image.url
+    return thumbnail.url
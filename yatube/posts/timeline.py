@@ -0,0 +1,141 @@
+"""Предрассчитанные ленты: упорядоченные id постов каждой ленты в кэше.
+
+Новые посты дописываются в начало лент при создании (fan-out on write),
+удалённые вычёркиваются, а ленту, порядок которой изменился, просто
+сбрасываем - при следующем чтении она соберётся заново одним запросом.
+
+Чтение, правка и запись ленты идут под блокировкой на cache.add, иначе
+параллельные правки затирали бы друг друга. Кто не получил блокировку,
+не ждёт: он сбрасывает ленту и оставляет метку, по которой владелец
+блокировки сбросит её ещё раз после своей записи.
+"""
+from array import array
+from contextlib import contextmanager
+
+from django.core.cache import cache
+
+from .constants import (FEED_ORDERING, TIMELINE_CACHE_KEY,
+                        TIMELINE_DIRTY_KEY, TIMELINE_LENGTH,
+                        TIMELINE_LOCK_KEY, TIMELINE_LOCK_TIMEOUT,
+                        TIMELINE_TIMEOUT)
+
+ID_TYPECODE = 'q'
+
+
+def _pack(ids, complete):
+    return complete, array(ID_TYPECODE, ids).tobytes()
+
+
+def _unpack(value):
+    complete, raw = value
+    ids = array(ID_TYPECODE)
+    ids.frombytes(raw)
+    return ids.tolist(), complete
+
+
+@contextmanager
+def _locked(feed):
+    """Блокировка ленты, даёт False, если её держит другой процесс"""
+    lock = TIMELINE_LOCK_KEY.format(feed)
+    if not cache.add(lock, True, TIMELINE_LOCK_TIMEOUT):
+        yield False
+        return
+    dirty = TIMELINE_DIRTY_KEY.format(feed)
+    try:
+        yield True
+    finally:
+        if cache.get(dirty):
+            # Пока мы писали, правку другого процесса пропустили
+            cache.delete_many([dirty, TIMELINE_CACHE_KEY.format(feed)])
+        cache.delete(lock)
+
+
+def _skip_update(feed):
+    """Сбрасывает ленту, правку которой пришлось пропустить"""
+    cache.set(TIMELINE_DIRTY_KEY.format(feed), True, TIMELINE_LOCK_TIMEOUT)
+    cache.delete(TIMELINE_CACHE_KEY.format(feed))
+
+
+def build_timeline(feed, post_list):
+    """Собирает ленту из БД и кладёт её в кэш"""
+    with _locked(feed) as locked:
+        ids = list(
+            post_list.order_by(*FEED_ORDERING).values_list(
+                'pk', flat=True,
+            )[:TIMELINE_LENGTH]
+        )
+        complete = len(ids) < TIMELINE_LENGTH
+        # Без блокировки ленту правит другой процесс - не мешаем ему
+        if locked:
+            cache.set(
+                TIMELINE_CACHE_KEY.format(feed),
+                _pack(ids, complete),
+                TIMELINE_TIMEOUT,
+            )
+
+    return ids, complete
+
+
+def get_timeline(feed, post_list):
+    """id постов ленты по порядку и признак того, что лента в кэше целиком.
+
+    Если ленты нет в кэше, собирает её.
+    """
+    value = cache.get(TIMELINE_CACHE_KEY.format(feed))
+    if value is None:
+        return build_timeline(feed, post_list)
+
+    return _unpack(value)
+
+
+def _update(feed, change):
+    """Правит закэшированную ленту.
+
+    change(ids) меняет список на месте и возвращает, изменился ли он.
+    """
+    key = TIMELINE_CACHE_KEY.format(feed)
+    with _locked(feed) as locked:
+        if not locked:
+            _skip_update(feed)
+            return
+        value = cache.get(key)
+        if value is None:
+            return
+        ids, complete = _unpack(value)
+        if not change(ids):
+            return
+        complete = complete and len(ids) <= TIMELINE_LENGTH
+        cache.set(
+            key,
+            _pack(ids[:TIMELINE_LENGTH], complete),
+            TIMELINE_TIMEOUT,
+        )
+
+
+def push_post(post_id, feeds):
+    """Дописывает новый пост в начало закэшированных лент"""
+    def push(ids):
+        if post_id in ids:
+            return False
+        ids.insert(0, post_id)
+        return True
+
+    for feed in feeds:
+        _update(feed, push)
+
+
+def remove_post(post_id, feeds):
+    """Вычёркивает пост из закэшированных лент"""
+    def remove(ids):
+        if post_id not in ids:
+            return False
+        ids.remove(post_id)
+        return True
+
+    for feed in feeds:
+        _update(feed, remove)
+
+
+def reset_timelines(feeds):
+    """Сбрасывает ленты, чтобы они собрались заново при чтении"""
+    cache.delete_many([TIMELINE_CACHE_KEY.format(feed) for feed in feeds])
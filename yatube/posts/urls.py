@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import api, views
 
 app_name = 'posts'
 
@@ -10,5 +10,15 @@ urlpatterns = [
     path('create/', views.post_create, name='post_create'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('export/', views.export, name='export'),
+    path('search/', views.search, name='search'),
     path('', views.index, name='index'),
+    path('api/posts/', api.index, name='api_index'),
+    path(
+        'api/posts/<int:post_id>/',
+        api.post_detail,
+        name='api_post_detail',
+    ),
+    path('api/group/<slug:slug>/', api.group_posts, name='api_group_list'),
+    path('api/profile/<str:username>/', api.profile, name='api_profile'),
 ]
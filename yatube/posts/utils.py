@@ -1,11 +1,31 @@
-from django.core.paginator import Paginator
+from functools import partial
+
+from django.conf import settings
 
 from .constants import POSTS_LIMIT
+from .counts import get_request_feed_count
+from .paginators import KeysetPaginator
+from .timeline import get_timeline
 
 
-def get_ten_posts_per_page(request, post_list):
+def get_ten_posts_per_page(request, post_list, feed=None, counter=None):
     """Функция-утилита для Пагинации страниц"""
-    paginator = Paginator(post_list, POSTS_LIMIT)
+    count = timeline = None
+    if feed:
+        count = partial(
+            get_request_feed_count, request, feed, post_list, counter,
+        )
+    cursor = request.GET.get('cursor')
+    if feed and settings.POSTS_TIMELINE_ENABLED and not cursor:
+        timeline = get_timeline(feed, post_list)
+    paginator = KeysetPaginator(
+        post_list,
+        POSTS_LIMIT,
+        count=count,
+        timeline=timeline,
+    )
+    if cursor:
+        return paginator.get_cursor_page(cursor)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
 
@@ -1,59 +1,157 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-
-from .forms import PostForm
-from .models import Group, Post, User
+from django.utils.http import urlencode
+
+from .conditional import (conditional_get, group_validators, index_validators,
+                          post_validators, profile_validators)
+from .constants import POSTS_LIMIT
+from .export import CONTENT_TYPES, GZIP_CONTENT_TYPE, export_posts
+from .feeds import GLOBAL_FEED, author_feed, group_feed
+from .forms import ExportForm, PostForm
+from .lookups import authors, groups
+from .models import Post
+from .page_cache import (add_page_tags, add_post_tags, author_tag,
+                         cache_page_for_anonymous, feed_tag, group_tag,
+                         post_tag)
+from .search import SearchPaginator, search_posts
+from .thumbnails import prefetch_thumbnails
 from .utils import get_ten_posts_per_page
 
 
+@conditional_get(index_validators)
+@cache_page_for_anonymous
 def index(request):
     """Вью-функция главной страницы"""
     template = 'posts/index.html'
     post_list = Post.objects.select_related('group', 'author')
     context = {
-        'page_obj': get_ten_posts_per_page(request, post_list),
+        'page_obj': get_ten_posts_per_page(
+            request,
+            post_list,
+            feed=GLOBAL_FEED,
+        ),
     }
+    add_page_tags(request, feed_tag(GLOBAL_FEED))
+    add_post_tags(request, context['page_obj'])
+    prefetch_thumbnails(context['page_obj'])
 
     return render(request, template, context)
 
 
+@conditional_get(group_validators)
+@cache_page_for_anonymous
 def group_posts(request, slug):
     """Вью-функция страниц сообществ"""
-    group = get_object_or_404(Group, slug=slug)
+    group = groups.get_or_404(slug)
     post_list = group.posts.select_related('group', 'author')
     context = {
         'group': group,
-        'page_obj': get_ten_posts_per_page(request, post_list),
+        'page_obj': get_ten_posts_per_page(
+            request,
+            post_list,
+            feed=group_feed(group.pk),
+            counter=group.posts_count,
+        ),
     }
+    add_page_tags(request, feed_tag(group_feed(group.pk)), group_tag(group.pk))
+    add_post_tags(request, context['page_obj'])
+    prefetch_thumbnails(context['page_obj'])
 
     return render(request, 'posts/group_list.html', context)
 
 
+@conditional_get(profile_validators)
+@cache_page_for_anonymous
 def profile(request, username):
     """Вью-функция просмотра профиля пользователя с публикациями"""
-    author = get_object_or_404(
-        User.objects.select_related(),
-        username=username,
-    )
-    post_list = author.posts.all()
+    author = authors.get_or_404(username)
+    post_list = author.posts.select_related('group')
+    profile = getattr(author, 'profile', None)
     context = {
-        'page_obj': get_ten_posts_per_page(request, post_list),
+        'page_obj': get_ten_posts_per_page(
+            request,
+            post_list,
+            feed=author_feed(author.pk),
+            counter=profile and profile.posts_count,
+        ),
         'author': author,
     }
+    add_page_tags(
+        request,
+        feed_tag(author_feed(author.pk)),
+        author_tag(author.pk),
+    )
+    add_post_tags(request, context['page_obj'])
+    prefetch_thumbnails(context['page_obj'])
 
     return render(request, 'posts/profile.html', context)
 
 
+@conditional_get(post_validators)
+@cache_page_for_anonymous
 def post_detail(request, post_id):
     """Вью-функция просмотра отдельной публикации"""
     post = get_object_or_404(Post, id=post_id)
     context = {
         'post': post,
     }
+    add_page_tags(request, post_tag(post.pk))
+    add_post_tags(request, [post])
 
     return render(request, 'posts/post_detail.html', context)
 
 
+def search(request):
+    """Вью-функция полнотекстового поиска по постам"""
+    query = request.GET.get('q', '').strip()
+    post_list = Post.objects.select_related('group', 'author')
+    paginator = SearchPaginator(search_posts(post_list, query), POSTS_LIMIT)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    prefetch_thumbnails(page_obj)
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_params': urlencode({'q': query}) + '&',
+    }
+
+    return render(request, 'posts/search.html', context)
+
+
+@staff_member_required
+def export(request):
+    """Вью-функция потоковой выгрузки постов в JSONL или CSV"""
+    form = ExportForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_text())
+
+    options = form.cleaned_data
+    response = StreamingHttpResponse(
+        export_posts(
+            file_format=options['format'],
+            gzip=options['gzip'],
+            group=options['group'],
+            author=options['author'],
+            since=options['since'],
+            until=options['until'],
+        ),
+        # Отдаём файл .gz как есть: с Content-Encoding браузер распаковал
+        # бы его, а имя осталось бы с .gz
+        content_type=(
+            GZIP_CONTENT_TYPE if options['gzip']
+            else CONTENT_TYPES[options['format']]
+        ),
+    )
+    filename = 'posts.' + options['format']
+    if options['gzip']:
+        filename += '.gz'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+
+    return response
+
+
 @login_required
 def post_create(request):
     """Вью-функция страницы создания публикации"""
@@ -61,7 +159,8 @@ def post_create(request):
     if request.method == 'POST' and form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
-        form.save()
+        with transaction.atomic():
+            form.save()
 
         return redirect('posts:profile', username=post.author)
 
@@ -83,7 +182,8 @@ def post_edit(request, post_id):
     if request.method == 'POST' and form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
-        form.save()
+        with transaction.atomic():
+            form.save()
 
         return redirect('posts:post_detail', post_id=post_id)
 
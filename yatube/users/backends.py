@@ -0,0 +1,35 @@
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import transaction
+
+from .constants import USER_CACHE_KEY, USER_CACHE_TIMEOUT
+
+
+def forget_user(user_id):
+    """Убирает пользователя из кэша сейчас и ещё раз после коммита.
+
+    Второй раз - на случай, если параллельный запрос успел положить в
+    кэш строку, прочитанную до коммита.
+    """
+    key = USER_CACHE_KEY.format(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя сессии из кэша.
+
+    AuthenticationMiddleware загружает пользователя на каждом запросе,
+    с этим бэкендом - без запроса к БД. Хэш пароля из сессии Django
+    сверяет с пользователем из кэша так же, как с прочитанным из БД,
+    а сигналы сбрасывают кэш при любом сохранении пользователя.
+    """
+
+    def get_user(self, user_id):
+        key = USER_CACHE_KEY.format(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, USER_CACHE_TIMEOUT)
+        return user
@@ -0,0 +1,3 @@
+# Пользователь сессии в кэше (users.backends)
+USER_CACHE_KEY = 'users:user:{}'
+USER_CACHE_TIMEOUT = 60 * 15
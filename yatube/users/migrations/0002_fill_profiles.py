@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count
+
+
+def create_profiles(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Profile = apps.get_model('users', 'Profile')
+    users = User.objects.filter(profile__isnull=True).annotate(
+        total=Count('posts'),
+    )
+    Profile.objects.bulk_create(
+        Profile(user_id=user.pk, posts_count=user.total)
+        for user in users.iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('posts', '0009_group_posts_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_profiles, migrations.RunPython.noop),
+    ]
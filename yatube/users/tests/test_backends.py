@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..constants import USER_CACHE_KEY
+
+User = get_user_model()
+
+
+class CachedUserTests(TestCase):
+    """Проверка кэша сессий и пользователя сессии"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='cached',
+            password='old-password',
+        )
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_steady_state_needs_no_auth_queries(self):
+        """Повторные запросы не читают сессию и пользователя из БД"""
+        self.client.get(reverse('about:author'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('about:author'))
+        self.assertEqual(response.context['user'].pk, self.user.pk)
+
+    def test_password_change_drops_cached_user(self):
+        """После смены пароля старая сессия больше не действует"""
+        self.client.get(reverse('about:author'))
+        self.assertIsNotNone(cache.get(USER_CACHE_KEY.format(self.user.pk)))
+
+        self.user.set_password('new-password')
+        self.user.save()
+
+        self.assertIsNone(cache.get(USER_CACHE_KEY.format(self.user.pk)))
+        response = self.client.get(reverse('about:author'))
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_deactivated_user_is_logged_out(self):
+        self.client.get(reverse('about:author'))
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(reverse('about:author'))
+        self.assertFalse(response.context['user'].is_authenticated)
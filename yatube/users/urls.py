@@ -5,7 +5,7 @@ from django.contrib.auth.views import (LoginView, LogoutView,
                                        PasswordResetConfirmView,
                                        PasswordResetDoneView,
                                        PasswordResetView)
-from django.urls import path
+from django.urls import path, reverse_lazy
 
 from . import views
 
@@ -41,6 +41,8 @@ urlpatterns = [
         'password-reset/',
         PasswordResetView.as_view(
             template_name='users/password_reset_form.html',
+            email_template_name='users/password_reset_email.html',
+            success_url=reverse_lazy('users:password_reset_done'),
         ),
         name='password_reset',
     ),
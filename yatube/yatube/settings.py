@@ -50,7 +50,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -63,7 +65,8 @@ ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Шаблонизатор Django с замером времени рендера (core.instrumentation)
+        'BACKEND': 'core.instrumentation.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -91,6 +94,36 @@ DATABASES = {
     }
 }
 
+# Реплики для чтения (core.db_router), например
+# YATUBE_DB_REPLICAS=replica1.sqlite3,replica2.sqlite3 - файлы реплик
+# обновляет команда sync_replicas. Её метку синхронизации веб-процессы
+# читают из кэша, так что для реплик нужен общий кэш
+DATABASE_REPLICAS = []
+for number, name in enumerate(
+    filter(None, os.getenv('YATUBE_DB_REPLICAS', '').split(',')),
+    start=1,
+):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, name.strip()),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+
+# Сессии и пользователь сессии читаются из кэша, в БД - только запись.
+# Между процессами нужен общий кэш (memcached, redis), иначе каждый
+# процесс будет читать сессию из БД хотя бы раз
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend',
+    # Для сессий, открытых до перехода на кэш: без него их владельцы
+    # разлогинились бы. Можно убрать через SESSION_COOKIE_AGE
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -136,10 +169,43 @@ LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 PASSWORD_CHANGE_FORM_URL = 'users:password-change'
 PASSWORD_RESET_FORM_REDIRECT_URL = 'users:password-reset/done/'
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма ставятся в очередь (core.outbox) и уходят командой send_outbox
+# через EMAIL_OUTBOX_BACKEND, не чаще EMAIL_OUTBOX_RATE писем в секунду
+EMAIL_BACKEND = 'core.outbox.OutboxEmailBackend'
+EMAIL_OUTBOX_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_OUTBOX_RATE = 10
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+# Предрассчитанные ленты постов в кэше (posts.timeline)
+POSTS_TIMELINE_ENABLED = False
+# Кэш готовых страниц для анонимных посетителей (posts.page_cache)
+POSTS_PAGE_CACHE_ENABLED = False
+# Кэш сообществ и авторов по slug и username в памяти процесса
+# (posts.lookups); между процессами сбрасывается через общий кэш
+POSTS_LOOKUP_CACHE_ENABLED = True
+# Ставить подготовку миниатюр в очередь задач сразу после загрузки
+POSTS_THUMBNAILS_PREGENERATE = True
+# Записи sorl-thumbnail для всей страницы загружаются пакетно (posts.kvstore)
+THUMBNAIL_KVSTORE = 'posts.kvstore.PrefetchingKVStore'
+THUMBNAIL_BACKEND = 'posts.thumbnails.TimedThumbnailBackend'
+
+# Метрики запросов в заголовке Server-Timing (core.instrumentation):
+# доля запросов с подробными метриками и порог медленного запроса в мс.
+# Заголовок получает только персонал, с REQUEST_METRICS_PUBLIC - все
+REQUEST_METRICS_SAMPLE_RATE = 1.0
+REQUEST_METRICS_SLOW_MS = 500
+REQUEST_METRICS_PUBLIC = DEBUG
+
+# Очередь фоновых задач в БД (core.jobs), выполняет manage.py run_workers;
+# True - задачи выполняются сразу при постановке, без воркеров
+JOBS_EAGER = False
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Кто читает медиа с диска (core.media): None - Django через FileResponse,
+# 'x-accel-redirect' - nginx, internal location MEDIA_ACCEL_REDIRECT_PREFIX
+# с alias на MEDIA_ROOT; 'x-sendfile' - Apache с mod_xsendfile
+MEDIA_SENDFILE = None
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
@@ -1,7 +1,11 @@
+import re
+from urllib.parse import urlsplit
+
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from core.views import serve_media
 
 handler404 = 'core.views.page_not_found'
 
@@ -13,7 +17,12 @@ urlpatterns = [
     path('auth/', include('django.contrib.auth.urls')),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )
+# Медиа с другого домена (CDN) отдаёт не Django
+if not urlsplit(settings.MEDIA_URL).netloc:
+    urlpatterns += [
+        re_path(
+            rf'^{re.escape(settings.MEDIA_URL.lstrip("/"))}(?P<path>.*)$',
+            serve_media,
+            name='media',
+        ),
+    ]